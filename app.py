@@ -5,10 +5,19 @@ Instagram 이벤트 당첨자 선정을 위한 Streamlit 대시보드
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
+import ast
+import time
 from datetime import datetime
 from io import BytesIO
 
+from src.scoring import FINAL_WEIGHTS, N_WINNERS, N_RESERVES
+from src.cleaning import date_ns
+from src.features import compute_window_features, running_post_mask
+from src.segments import UserSegments
+from src.io_load import load_run_info
+
 # 페이지 설정
 st.set_page_config(
     page_title="관계형 영향력 기반 선정 대시보드",
@@ -22,6 +31,8 @@ DATA_DIR = "data/processed"
 RANKING_PATH = os.path.join(DATA_DIR, "ranking.csv")
 WINNERS_DRAFT_PATH = os.path.join(DATA_DIR, "winners_draft.csv")
 POSTS_PATH = os.path.join(DATA_DIR, "posts_clean.csv")
+WINDOW_FEATURES_PATH = os.path.join(DATA_DIR, "window_features.csv")  # pipeline.py 산출 (최근 5/12개, 전체, 30/90일)
+PROVISIONAL_PATH = os.path.join(DATA_DIR, "ranking_provisional.csv")  # anytime_collect.py 수집 중 갱신
 
 # 필요 컬럼 정의
 # CSV 컬럼명 기준 (팔로워 바로 뒤에 평균 좋아요/댓글)
@@ -42,6 +53,9 @@ COLUMN_MAPPING = {
     "risk_flag": "risk_flags"
 }
 
+# 가중치 시뮬레이터용 컴포넌트 점수 (FINAL_WEIGHTS 순서)
+SCORE_COMPONENTS = ["Relationship", "Reliability", "RunnerFit"]
+
 POST_COLUMNS = [
     "username", "date", "caption", "comments_count", "likes_count", "media_type", "is_running_related",
     "post_date", "comment_count", "like_count", "post_url"
@@ -110,7 +124,7 @@ def generate_sample_posts(usernames: list) -> pd.DataFrame:
 @st.cache_data
 def load_ranking_data() -> tuple[pd.DataFrame, str]:
     """
-    랭킹 데이터 로드 (Cache Reset v9 - low_frequency 플래그 추가)
+    랭킹 데이터 로드 (Cache Reset v10 - 윈도우 피처 사용)
     """
     if os.path.exists(RANKING_PATH):
         try:
@@ -149,10 +163,10 @@ def load_ranking_data() -> tuple[pd.DataFrame, str]:
                 # "nan" 문자열로 변환된 경우 다시 빈 문자열로
                 df["risk_flags"] = df["risk_flags"].replace("nan", "")
             
-            # 포스트 데이터가 있으면 누락된 메트릭 계산
-            posts_df = load_posts_data()
-            if posts_df is not None:
-                df = calculate_metrics(df, posts_df)
+            # 윈도우 피처가 있으면 누락된 메트릭 채우기
+            window_df = load_window_features()
+            if window_df is not None:
+                df = apply_window_features(df, window_df)
                 
             return df, "ranking"
         except Exception as e:
@@ -160,111 +174,79 @@ def load_ranking_data() -> tuple[pd.DataFrame, str]:
             return pd.DataFrame(), "error"
 
 
-def calculate_metrics(ranking_df: pd.DataFrame, posts_df: pd.DataFrame) -> pd.DataFrame:
-    """포스트 데이터를 기반으로 누락된 메트릭 계산 (v2 - 음수값 필터링)"""
+def read_posts_csv() -> pd.DataFrame:
+    """posts_clean.csv 로드 (CSV에 문자열로 저장된 해시태그를 리스트로 복원)"""
+    def parse_hashtags(value):
+        try:
+            tags = ast.literal_eval(value) if isinstance(value, str) and value.startswith("[") else []
+        except (ValueError, SyntaxError):
+            return []
+        return tags if isinstance(tags, list) else []
+    
+    df = pd.read_csv(POSTS_PATH)
+    if "hashtags" in df.columns:
+        df["hashtags"] = [parse_hashtags(value) for value in df["hashtags"]]
+    return df
+
+
+@st.cache_data
+def load_window_features() -> pd.DataFrame | None:
+    """윈도우 피처 로드 (파이프라인의 window_features.csv, 없으면 posts_clean.csv로 한 번 계산)"""
+    if os.path.exists(WINDOW_FEATURES_PATH):
+        try:
+            return pd.read_csv(WINDOW_FEATURES_PATH, index_col="username")
+        except Exception as e:
+            st.warning(f"윈도우 피처 로드 중 오류: {e}")
+    if os.path.exists(POSTS_PATH):
+        try:
+            posts_df = read_posts_csv()
+            return compute_window_features(posts_df, posts_df["username"].unique(), load_run_info().get("as_of"))
+        except Exception as e:
+            st.warning(f"윈도우 피처 계산 중 오류: {e}")
+    return None
+
+
+def apply_window_features(ranking_df: pd.DataFrame, window_df: pd.DataFrame) -> pd.DataFrame:
+    """사전 계산된 윈도우 피처로 대시보드 메트릭 채우기 (최근 5개 포스트 / 전체 기준, 포스트 없는 참여자는 유지)"""
     ranking_df = ranking_df.copy()
-    posts_df = posts_df.copy()
-    
-    # 음수값(-1) 필터링: 수집 실패한 데이터
-    if "likes_count" in posts_df.columns:
-        posts_df.loc[posts_df["likes_count"] < 0, "likes_count"] = pd.NA
-    if "comments_count" in posts_df.columns:
-        posts_df.loc[posts_df["comments_count"] < 0, "comments_count"] = pd.NA
+    w = window_df.reindex(ranking_df["username"]).set_axis(ranking_df.index)
+    has_posts = w["n_posts_all"].fillna(0) > 0
+    w = w[has_posts]
+    
+    avg_likes = w["avg_likes_5"]
+    avg_comments = w["avg_comments_5"]
+    ranking_df.loc[has_posts, "avg_likes_5"] = avg_likes.round(1)
+    ranking_df.loc[has_posts, "avg_comments_5"] = avg_comments.round(1)
+    ranking_df.loc[has_posts, "comment_like_ratio"] = np.where(
+        avg_likes > 0, avg_comments / avg_likes.where(avg_likes > 0, 1), 0
+    ).round(3)
+    
+    # Engagement Rate (팔로워 대비 댓글 비율)
+    followers = ranking_df.loc[has_posts, "followers"] if "followers" in ranking_df.columns else 0
+    ranking_df.loc[has_posts, "engagement_rate"] = np.where(
+        followers > 0, avg_comments / np.maximum(followers, 1) * 100, 0
+    ).round(2)
+    
+    ranking_df.loc[has_posts, "low_comment_post_rate"] = w["low_comment_post_rate_5"].round(2)
+    ranking_df.loc[has_posts, "running_hashtag_rate"] = w["running_rate_all"].round(2)
+    ranking_df.loc[has_posts, "last_post_days"] = w["last_post_days"]
+    
+    # 게시물 빈도 체크 (최근 5개 게시물이 365일 이상에 걸쳐있으면 플래그)
+    if "risk_flags" in ranking_df.columns:
+        flags = ranking_df["risk_flags"].fillna("").astype(str)
+        sparse = (w["span_days_5"] > 365).reindex(ranking_df.index, fill_value=False)
+        add = sparse & ~flags.str.contains("low_frequency")
+        ranking_df.loc[add, "risk_flags"] = np.where(flags[add] != "", flags[add] + "|low_frequency", "low_frequency")
     
-    # 날짜 컬럼 변환
-    if "date" in posts_df.columns:
-        posts_df["date"] = pd.to_datetime(posts_df["date"], errors='coerce')
-    
-    for idx, row in ranking_df.iterrows():
-        username = row["username"]
-        user_posts = posts_df[posts_df["username"] == username]
-        
-        if len(user_posts) == 0:
-            continue
-            
-        # 날짜 정렬 (최신순)
-        if "date" in user_posts.columns:
-            user_posts = user_posts.sort_values("date", ascending=False)
-            
-            # last_post_days 계산
-            last_date = user_posts.iloc[0]["date"]
-            if pd.notna(last_date):
-                days_diff = (datetime.now(last_date.tzinfo) - last_date).days
-                ranking_df.at[idx, "last_post_days"] = days_diff
-        
-        # 최근 5개 포스트 기준 집계 (수집 데이터 기준)
-        recent_posts = user_posts.head(5)
-        
-        # Avg Likes (음수 제외하고 평균 계산)
-        if "likes_count" in recent_posts.columns:
-            valid_likes = recent_posts["likes_count"].dropna()
-            avg_likes = valid_likes.mean() if len(valid_likes) > 0 else 0
-        else:
-            avg_likes = 0
-        ranking_df.at[idx, "avg_likes_5"] = round(avg_likes, 1) if pd.notna(avg_likes) else 0
-        
-        # Avg Comments (음수 제외)
-        if "comments_count" in recent_posts.columns:
-            valid_comments = recent_posts["comments_count"].dropna()
-            avg_comments = valid_comments.mean() if len(valid_comments) > 0 else 0
-        else:
-            avg_comments = 0
-        ranking_df.at[idx, "avg_comments_5"] = round(avg_comments, 1) if pd.notna(avg_comments) else 0
-        
-        # Comment/Like Ratio
-        if avg_likes > 0:
-            ratio = avg_comments / avg_likes
-            ranking_df.at[idx, "comment_like_ratio"] = round(ratio, 3)
-        else:
-            ranking_df.at[idx, "comment_like_ratio"] = 0
-        
-        # Engagement Rate (팔로워 대비 댓글 비율)
-        followers = row.get("followers", 0)
-        if pd.notna(followers) and followers > 0:
-            engagement = (avg_comments / followers) * 100
-            ranking_df.at[idx, "engagement_rate"] = round(engagement, 2)
-        else:
-            ranking_df.at[idx, "engagement_rate"] = 0
-            
-        # Low Comment Rate (댓글 3개 이하 비율)
-        if "comments_count" in recent_posts.columns:
-            valid_comments_df = recent_posts[recent_posts["comments_count"].notna()]
-            low_comment_count = len(valid_comments_df[valid_comments_df["comments_count"] <= 3])
-            low_rate = low_comment_count / len(valid_comments_df) if len(valid_comments_df) > 0 else 0
-        else:
-            low_rate = 0
-        ranking_df.at[idx, "low_comment_post_rate"] = round(low_rate, 2)
-        
-        # Running Hashtag Rate (전체 기준)
-        if "is_running_related" in user_posts.columns:
-            run_count = user_posts["is_running_related"].sum()
-            run_rate = run_count / len(user_posts)
-            ranking_df.at[idx, "running_hashtag_rate"] = round(run_rate, 2)
-        
-        # 게시물 빈도 체크 (5개 게시물이 365일 이상에 걸쳐있으면 플래그)
-        if "date" in recent_posts.columns and len(recent_posts) >= 2:
-            dates = recent_posts["date"].dropna()
-            if len(dates) >= 2:
-                newest = dates.iloc[0]
-                oldest = dates.iloc[-1]
-                if pd.notna(newest) and pd.notna(oldest):
-                    date_span = (newest - oldest).days
-                    if date_span > 365:
-                        # 리스크 플래그에 추가
-                        current_flags = str(ranking_df.at[idx, "risk_flags"]) if pd.notna(ranking_df.at[idx, "risk_flags"]) else ""
-                        if "low_frequency" not in current_flags:
-                            new_flags = f"{current_flags}|low_frequency" if current_flags else "low_frequency"
-                            ranking_df.at[idx, "risk_flags"] = new_flags
-            
     return ranking_df
 
 
 @st.cache_data
 def load_posts_data() -> pd.DataFrame | None:
-    """포스트 데이터 로드 (Cache Reset v4)"""
+    """포스트 데이터 로드 (Cache Reset v5)"""
     if os.path.exists(POSTS_PATH):
         try:
-            df = pd.read_csv(POSTS_PATH)
+            df = read_posts_csv()
             
             # 컬럼 매핑 (원본 -> 통일된 이름)
             rename_map = {
@@ -274,14 +256,9 @@ def load_posts_data() -> pd.DataFrame | None:
             }
             df = df.rename(columns=rename_map)
             
-            # Running Related 계산 (없으면)
+            # Running Related 계산 (없으면) - 랭킹의 running_hashtag_rate와 같은 키워드 (features.RUNNING_KEYWORDS)
             if "is_running_related" not in df.columns:
-                keywords = ["러닝", "달리기", "마라톤", "run", "조깅", "running", "트레일", "울트라"]
-                def check_running(row):
-                    text = str(row.get("caption", "")) + str(row.get("hashtags", ""))
-                    return any(k.lower() in text.lower() for k in keywords)
-                
-                df["is_running_related"] = df.apply(check_running, axis=1)
+                df["is_running_related"] = running_post_mask(df)
             
             # 모든 컬럼 반환 (필터링 제거)
             return df
@@ -320,237 +297,308 @@ def get_exceptions(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame()
 
 
+def simulate_weights(matrix: np.ndarray, weights: tuple) -> tuple[np.ndarray, np.ndarray]:
+    """
+    가중치 변경 시 Final 점수와 순위 재계산
+    
+    - 점수: 행렬-벡터 곱 1회 (matrix @ weights)
+    - 순위: 안정 정렬 (동점은 기존 랭킹 순서 유지)
+    """
+    scores = matrix @ np.asarray(weights, dtype=np.float64)
+    order = np.argsort(-scores, kind="stable")
+    ranks = np.empty(len(scores), dtype=np.int64)
+    ranks[order] = np.arange(1, len(scores) + 1)
+    return scores, ranks
+
+
+@st.cache_data
+def load_score_matrix() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    시뮬레이터 입력 (데이터 로드 시 1회 생성)
+    
+    Returns:
+    - usernames: 유저네임 배열
+    - matrix: 컴포넌트 점수 행렬 (n x 3, C-contiguous float64)
+    - base_ranks: 현재 가중치(FINAL_WEIGHTS) 기준 순위
+    """
+    df, _ = load_ranking_data()
+    if not all(col in df.columns for col in SCORE_COMPONENTS):
+        empty = np.empty(0)
+        return empty, np.empty((0, len(SCORE_COMPONENTS))), empty
+    
+    matrix = df[SCORE_COMPONENTS].apply(pd.to_numeric, errors="coerce").fillna(0)
+    matrix = np.ascontiguousarray(matrix.to_numpy(dtype=np.float64))
+    _, base_ranks = simulate_weights(matrix, FINAL_WEIGHTS)
+    return df["username"].to_numpy(), matrix, base_ranks
+
+
+def render_weight_simulator():
+    """사이드바 What-if 가중치 시뮬레이터"""
+    usernames, matrix, base_ranks = load_score_matrix()
+    if len(matrix) == 0:
+        st.caption("컴포넌트 점수 컬럼이 없어 시뮬레이션할 수 없습니다.")
+        return
+    
+    w_rel = st.slider("Relationship 가중치", 0.0, 1.0, FINAL_WEIGHTS[0], 0.05, key="w_relationship")
+    w_reli = st.slider("Reliability 가중치", 0.0, 1.0, FINAL_WEIGHTS[1], 0.05, key="w_reliability")
+    w_fit = st.slider("RunnerFit 가중치", 0.0, 1.0, FINAL_WEIGHTS[2], 0.05, key="w_runnerfit")
+    
+    started = time.perf_counter()
+    scores, ranks = simulate_weights(matrix, (w_rel, w_reli, w_fit))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    # 현재 Top 20 대비 변동 인원
+    k = min(N_WINNERS, len(ranks))
+    base_top = set(np.flatnonzero(base_ranks <= k))
+    new_top = np.flatnonzero(ranks <= k)
+    n_changed = k - len(base_top.intersection(new_top))
+    
+    st.metric(f"Top {k} 변동", f"{n_changed}명")
+    if abs(w_rel + w_reli + w_fit - 1.0) > 1e-9:
+        st.caption(f"⚠️ 가중치 합계 {w_rel + w_reli + w_fit:.2f} (기준 1.00)")
+    st.caption(f"{len(matrix):,}명 재계산: {elapsed_ms:.1f} ms")
+    
+    new_top = new_top[np.argsort(ranks[new_top])]
+    preview = pd.DataFrame({
+        "순위": ranks[new_top],
+        "username": usernames[new_top],
+        "Final": np.round(scores[new_top], 2),
+        "기존순위": base_ranks[new_top],
+    })
+    st.dataframe(preview, use_container_width=True, hide_index=True)
+
+
 def to_csv_download(df: pd.DataFrame) -> bytes:
     """DataFrame을 CSV 바이트로 변환"""
     return df.to_csv(index=False).encode("utf-8-sig")
 
 
-def main():
-    st.title("🏃 관계형 영향력 기반 선정 대시보드")
-    
-    # ========== 스코어 산출 공식 설명 (상단 배치) ==========
-    with st.expander("ℹ️ 스코어 산출 공식 및 로직 설명"):
-        st.markdown(r"""
-        ### 1. 지표별 상세 산식
+@st.cache_data
+def load_filtered_ranking(filters: dict) -> pd.DataFrame:
+    """필터 적용된 랭킹 (필터 조합별 캐시)"""
+    df, _ = load_ranking_data()
+    return apply_filters(df, filters)
 
-        #### ① Relationship (관계성, 50점)
-        구독자(팔로워)와의 실질적인 상호작용 능력을 평가합니다. 단순히 댓글이 많은 것뿐만 아니라, **'소통의 질(반응이 없는 게시물의 비율)'**을 감점 요인으로 반영합니다.
 
-        $$
-        Score_{Relationship} = B_{comm} - P_{lack}
-        $$
+@st.cache_data
+def load_exceptions() -> pd.DataFrame:
+    """예외풀 (비공개 계정) 캐시"""
+    df, _ = load_ranking_data()
+    return get_exceptions(df)
 
-        * $B_{comm}$ (평균 댓글 점수): 평균 댓글 수 및 팔로워 대비 참여율에 따라 부여 (Max 50점)
-        * $P_{lack}$ (소통 부재 페널티): (댓글 3개 이하 게시물 수 / 전체 게시물 수) × 가중치 (Max 15점)
 
-        #### ② Reliability (신뢰성, 30점)
-        계정의 운영 상태와 활동의 꾸준함을 평가합니다. 최근성(Recency)과 빈도(Frequency)를 핵심 지표로 사용합니다.
+@st.cache_resource
+def load_posts_index() -> dict[str, pd.DataFrame]:
+    """유저별 포스트 인덱스 (username -> 포스트 DataFrame), 읽기 전용으로 공유"""
+    posts_df = load_posts_data()
+    return index_posts_by_user(posts_df)
 
-        $$
-        Score_{Reliability} = \left(\frac{R_{score} + F_{score}}{2}\right) - P_{private}
-        $$
 
-        * $R_{score}$ (최근 활동 점수): 마지막 포스팅 날짜가 현재와 가까울수록 높은 점수
-        * $F_{score}$ (활동 빈도 점수): 최근 90일 내 업로드된 포스팅 개수 기반
-        * $P_{private}$ (비공개 감점): 비공개 계정일 경우 즉시 감점 적용
+def index_posts_by_user(posts_df: pd.DataFrame | None) -> dict[str, pd.DataFrame]:
+    """포스트를 유저별(최신순)로 1회 정렬/분할 (상세 패널은 dict 조회만 수행)"""
+    if posts_df is None or len(posts_df) == 0:
+        return {}
+    segments = UserSegments(posts_df["username"], date_ns(posts_df["date"]) if "date" in posts_df.columns else None)
+    rows = posts_df.iloc[segments.order]
+    return {username: rows.iloc[start:end] for username, start, end in segments.bounds()}
 
-        #### ③ RunnerFit (러닝 적합도, 20점)
-        해당 계정의 콘텐츠가 브랜드(러닝) 성격과 얼마나 일치하는지 분석합니다.
 
-        $$
-        Score_{RunnerFit} = \left(\frac{Post_{running}}{Post_{total}}\right) \times 20
-        $$
+# ========== 프래그먼트 (독립 리런 영역) ==========
+# 각 프래그먼트 내부 위젯 조작 시 해당 영역만 다시 실행됨
 
-        * $Post_{running}$: 캡션 내 러닝 관련 키워드 및 해시태그가 포함된 게시물 수
-        * $Post_{total}$: 분석 대상 전체 게시물 수
-        """)
+@st.fragment
+def render_ranking_table(filtered_df: pd.DataFrame, ranking_df: pd.DataFrame, show_low_post_warning: bool):
+    """랭킹 테이블 + 선정 현황 + Export (체크박스 편집 시 이 영역만 리런)
 
-    # 데이터 로드
-    df, data_source = load_ranking_data()
-    posts_df = load_posts_data()
-    
-    # 데이터 소스에 따른 안내 메시지
-    if data_source == "sample":
-        st.warning("""
-        ⚠️ **데이터가 없습니다!**
-        
-        `data/processed/ranking.csv` 또는 `data/processed/winners_draft.csv`가 없어 **샘플 데이터**로 표시 중입니다.
-        
-        👉 데이터 파이프라인을 실행하여 실제 데이터를 생성해주세요.
-        """)
-        # 샘플 포스트 데이터도 생성
-        if posts_df is None:
-            posts_df = generate_sample_posts(df["username"].tolist())
-    elif data_source == "winners_draft":
-        st.info("""
-        ℹ️ `ranking.csv`가 없어 `winners_draft.csv`로 표시 중입니다.
-        
-        전체 랭킹을 보려면 파이프라인을 실행하여 `ranking.csv`를 생성하세요.
-        """)
+    선정/예비 CSV는 필터와 무관하게 전체 랭킹(ranking_df)에서 추출
+    """
+    st.subheader(f"📊 랭킹 테이블 (Top {len(filtered_df)}명)")
+    
+    # 선정 체크박스 컬럼 추가
+    display_df = filtered_df.copy()
+    display_df.insert(0, "선정", False)
+    display_df.insert(1, "예비", False)
+    
+    # 기존 선택 상태 복원
+    display_df["선정"] = display_df["username"].isin(st.session_state.selected_users)
+    display_df["예비"] = display_df["username"].isin(st.session_state.backup_users)
+    
+    # post_count 경고 표시
+    if show_low_post_warning and "post_count" in display_df.columns:
+        display_df["⚠️"] = display_df["post_count"].apply(lambda x: "⚠️" if x <= 3 else "")
+    
+    # 데이터 에디터로 표시
+    column_config = {
+        "선정": st.column_config.CheckboxColumn("선정 (20)", default=False),
+        "예비": st.column_config.CheckboxColumn("예비 (10)", default=False),
+        "username": st.column_config.TextColumn("유저네임", width="medium"),
+        "is_private": st.column_config.CheckboxColumn("비공개", disabled=True),
+        "followers": st.column_config.NumberColumn("팔로워", format="%d"),
+        "engagement_rate": st.column_config.NumberColumn("참여율(%)", format="%.2f"),
+        "avg_likes_5": st.column_config.NumberColumn("평균좋아요", format="%.1f"),
+        "avg_comments_5": st.column_config.NumberColumn("평균댓글", format="%.1f"),
+        "last_post_days": st.column_config.NumberColumn("최근활동(일)", format="%d"),
+        "posts_90d": st.column_config.NumberColumn("90일포스트", format="%d"),
+        "comment_like_ratio": st.column_config.NumberColumn("댓글/좋아요비율", format="%.3f"),
+        "low_comment_post_rate": st.column_config.NumberColumn("저댓글비율", format="%.2f", help="댓글 3개 이하인 게시물의 비율 (소통 부재 지표)"),
+        "running_hashtag_rate": st.column_config.NumberColumn("러닝태그율", format="%.2f", help="전체 게시물 중 러닝 관련 게시물의 비율"),
+        "Final": st.column_config.ProgressColumn("Final", min_value=0, max_value=100, format="%.1f"),
+        "Relationship": st.column_config.ProgressColumn("Relationship", min_value=0, max_value=100, format="%.1f"),
+        "Reliability": st.column_config.ProgressColumn("Reliability", min_value=0, max_value=100, format="%.1f"),
+        "RunnerFit": st.column_config.ProgressColumn("RunnerFit", min_value=0, max_value=100, format="%.1f"),
+        "risk_flags": st.column_config.TextColumn("리스크", width="medium"),
+    }
     
-    # ========== 사이드바 ==========
-    with st.sidebar:
-        st.header("🔧 필터 설정")
-        
-        st.subheader("하드 필터")
-        exclude_private = st.toggle("비공개 계정 제외", value=True)
-        exclude_no_posts = st.toggle("posts_90d=0 제외", value=True)
-        exclude_low_frequency = st.toggle("자동 선정 제외 (low_frequency risk)", value=True)
-        show_low_post_warning = st.toggle("post_count≤3 경고 표시", value=True)
-        
-        st.divider()
-        
-        top_n = st.slider("Top N 표시", min_value=10, max_value=100, value=40, step=5)
-        
-        st.divider()
-        
-        show_exceptions = st.toggle("예외풀 (비공개) 보기", value=False)
+    # 컬럼 순서 지정 (팔로워 다음에 평균 좋아요/댓글)
+    column_order = [
+        "선정", "예비", "username", "is_private", "followers", "engagement_rate",
+        "avg_likes_5", "avg_comments_5",
+        "last_post_days", "posts_90d", "comment_like_ratio", "low_comment_post_rate",
+        "running_hashtag_rate", "Relationship", "Reliability", "RunnerFit", "Final", "risk_flags"
+    ]
+    
+    edited_df = st.data_editor(
+        display_df,
+        column_config=column_config,
+        column_order=column_order,
+        use_container_width=True,
+        hide_index=True,
+        num_rows="fixed",
+        key="ranking_table"
+    )
+    
+    # 선택 상태 업데이트 (현재 필터에 보이지 않는 유저의 선택은 유지)
+    hidden = lambda users: set(users) - set(edited_df["username"])
+    selected_users = hidden(st.session_state.selected_users) | set(edited_df[edited_df["선정"]]["username"].tolist())
+    backup_users = hidden(st.session_state.backup_users) | set(edited_df[edited_df["예비"]]["username"].tolist())
+    
+    st.session_state.selected_users = selected_users
+    st.session_state.backup_users = backup_users
+    
+    # 선택 수 표시 및 경고
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        selected_count = len(selected_users)
+        if selected_count > 20:
+            st.error(f"⚠️ 선정 인원 초과! ({selected_count}/20)")
+        else:
+            st.info(f"선정: {selected_count}/20")
     
-    # 필터 적용
-    filters = {
-        "exclude_private": exclude_private,
-        "exclude_no_posts": exclude_no_posts,
-        "exclude_low_frequency": exclude_low_frequency,
-        "top_n": top_n
-    }
+    with col2:
+        backup_count = len(backup_users)
+        if backup_count > 10:
+            st.error(f"⚠️ 예비 인원 초과! ({backup_count}/10)")
+        else:
+            st.info(f"예비: {backup_count}/10")
     
-    filtered_df = apply_filters(df, filters)
+    with col3:
+        overlap = selected_users & backup_users
+        if overlap:
+            st.warning(f"⚠️ 중복 선택: {', '.join(overlap)}")
     
-    # ========== 선정 상태 관리 ==========
-    # 자동 선정 로직
-    def auto_select():
-        # 후보군 추출 (필터링된 전체 리스트에서 시작)
-        candidates_df = filtered_df.copy()
-        
-        # low_frequency 제외 (자동 선정 시에만 제외)
-        if exclude_low_frequency and "risk_flags" in candidates_df.columns:
-            candidates_df = candidates_df[~candidates_df["risk_flags"].str.contains("low_frequency", na=False)]
-        
-        # 상위 20명/10명 선정
-        current_candidates = candidates_df["username"].tolist()
-        st.session_state.selected_users = set(current_candidates[:20])
-        st.session_state.backup_users = set(current_candidates[20:30])
-        st.toast("✅ 상위 20명(선정) / 10명(예비) 자동 선택 완료!")
-
-    # 초기화 또는 버튼 클릭 시
-    if "selected_users" not in st.session_state:
-        st.session_state.selected_users = set()
-        st.session_state.backup_users = set()
-        auto_select()  # 첫 로드 시 자동 선정
+    st.divider()
     
-    with st.sidebar:
-        st.divider()
-        if st.button("🔄 자동 선정 적용 (Top 20+10)", use_container_width=True):
-            auto_select()
-            st.rerun()
-
-    # ========== 메인 컨텐츠 ==========
+    # ========== Export 섹션 ==========
+    st.subheader("📥 Export")
     
-    # 탭 구성
-    if show_exceptions:
-        tab1, tab2 = st.tabs(["📊 랭킹 테이블", "🔒 예외풀 (비공개)"])
-    else:
-        tab1 = st.container()
-        tab2 = None
+    col1, col2, col3 = st.columns(3)
     
-    # ----- 랭킹 테이블 탭 -----
-    with tab1 if show_exceptions else st.container():
-        st.subheader(f"📊 랭킹 테이블 (Top {len(filtered_df)}명)")
-        
-        # 선정 체크박스 컬럼 추가
-        display_df = filtered_df.copy()
-        display_df.insert(0, "선정", False)
-        display_df.insert(1, "예비", False)
-        
-        # 기존 선택 상태 복원
-        display_df["선정"] = display_df["username"].isin(st.session_state.selected_users)
-        display_df["예비"] = display_df["username"].isin(st.session_state.backup_users)
-        
-        # post_count 경고 표시
-        if show_low_post_warning and "post_count" in display_df.columns:
-            display_df["⚠️"] = display_df["post_count"].apply(lambda x: "⚠️" if x <= 3 else "")
-        
-        # 데이터 에디터로 표시
-        column_config = {
-            "선정": st.column_config.CheckboxColumn("선정 (20)", default=False),
-            "예비": st.column_config.CheckboxColumn("예비 (10)", default=False),
-            "username": st.column_config.TextColumn("유저네임", width="medium"),
-            "is_private": st.column_config.CheckboxColumn("비공개", disabled=True),
-            "followers": st.column_config.NumberColumn("팔로워", format="%d"),
-            "engagement_rate": st.column_config.NumberColumn("참여율(%)", format="%.2f"),
-            "avg_likes_5": st.column_config.NumberColumn("평균좋아요", format="%.1f"),
-            "avg_comments_5": st.column_config.NumberColumn("평균댓글", format="%.1f"),
-            "last_post_days": st.column_config.NumberColumn("최근활동(일)", format="%d"),
-            "posts_90d": st.column_config.NumberColumn("90일포스트", format="%d"),
-            "comment_like_ratio": st.column_config.NumberColumn("댓글/좋아요비율", format="%.3f"),
-            "low_comment_post_rate": st.column_config.NumberColumn("저댓글비율", format="%.2f", help="댓글 3개 이하인 게시물의 비율 (소통 부재 지표)"),
-            "running_hashtag_rate": st.column_config.NumberColumn("러닝태그율", format="%.2f", help="전체 게시물 중 러닝 관련 게시물의 비율"),
-            "Final": st.column_config.ProgressColumn("Final", min_value=0, max_value=100, format="%.1f"),
-            "Relationship": st.column_config.ProgressColumn("Relationship", min_value=0, max_value=100, format="%.1f"),
-            "Reliability": st.column_config.ProgressColumn("Reliability", min_value=0, max_value=100, format="%.1f"),
-            "RunnerFit": st.column_config.ProgressColumn("RunnerFit", min_value=0, max_value=100, format="%.1f"),
-            "risk_flags": st.column_config.TextColumn("리스크", width="medium"),
-        }
-        
-        # 컬럼 순서 지정 (팔로워 다음에 평균 좋아요/댓글)
-        column_order = [
-            "선정", "예비", "username", "is_private", "followers", "engagement_rate",
-            "avg_likes_5", "avg_comments_5",
-            "last_post_days", "posts_90d", "comment_like_ratio", "low_comment_post_rate",
-            "running_hashtag_rate", "Relationship", "Reliability", "RunnerFit", "Final", "risk_flags"
-        ]
-        
-        edited_df = st.data_editor(
-            display_df,
-            column_config=column_config,
-            column_order=column_order,
-            use_container_width=True,
-            hide_index=True,
-            num_rows="fixed",
-            key="ranking_table"
-        )
-        
-        # 선택 상태 업데이트
-        selected_users = set(edited_df[edited_df["선정"]]["username"].tolist())
-        backup_users = set(edited_df[edited_df["예비"]]["username"].tolist())
-        
-        st.session_state.selected_users = selected_users
-        st.session_state.backup_users = backup_users
-        
-        # 선택 수 표시 및 경고
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            selected_count = len(selected_users)
-            if selected_count > 20:
-                st.error(f"⚠️ 선정 인원 초과! ({selected_count}/20)")
-            else:
-                st.info(f"선정: {selected_count}/20")
-        
-        with col2:
-            backup_count = len(backup_users)
-            if backup_count > 10:
-                st.error(f"⚠️ 예비 인원 초과! ({backup_count}/10)")
-            else:
-                st.info(f"예비: {backup_count}/10")
-        
-        with col3:
-            overlap = selected_users & backup_users
-            if overlap:
-                st.warning(f"⚠️ 중복 선택: {', '.join(overlap)}")
+    with col1:
+        # 선정 20명 다운로드
+        if selected_users:
+            selected_df = ranking_df[ranking_df["username"].isin(selected_users)]
+            st.download_button(
+                label=f"🏆 선정 {len(selected_users)}명 CSV 다운로드",
+                data=to_csv_download(selected_df),
+                file_name=f"selected_winners_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv",
+                disabled=len(selected_users) > 20
+            )
+            if len(selected_users) > 20:
+                st.caption("⚠️ 20명 이하로 선정해주세요")
+        else:
+            st.button("🏆 선정 0명 (선택 필요)", disabled=True)
     
-    # ----- 예외풀 탭 -----
-    if show_exceptions and tab2 is not None:
-        with tab2:
-            exceptions_df = get_exceptions(df)
-            if len(exceptions_df) > 0:
-                st.subheader(f"🔒 예외풀 - 비공개 계정 ({len(exceptions_df)}명)")
-                st.dataframe(exceptions_df, use_container_width=True, hide_index=True)
-            else:
-                st.info("예외풀에 해당하는 계정이 없습니다.")
+    with col2:
+        # 예비 10명 다운로드
+        if backup_users:
+            backup_df = ranking_df[ranking_df["username"].isin(backup_users)]
+            st.download_button(
+                label=f"📋 예비 {len(backup_users)}명 CSV 다운로드",
+                data=to_csv_download(backup_df),
+                file_name=f"backup_winners_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv",
+                disabled=len(backup_users) > 10
+            )
+            if len(backup_users) > 10:
+                st.caption("⚠️ 10명 이하로 선정해주세요")
+        else:
+            st.button("📋 예비 0명 (선택 필요)", disabled=True)
     
-    st.divider()
+    with col3:
+        # 전체 랭킹 다운로드
+        st.download_button(
+            label=f"📊 전체 랭킹 CSV ({len(filtered_df)}명)",
+            data=to_csv_download(filtered_df),
+            file_name=f"full_ranking_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv"
+        )
     
-    # ========== 유저 상세 패널 ==========
+
+
+
+@st.fragment
+def render_exceptions():
+    """예외풀 (비공개) 탭"""
+    exceptions_df = load_exceptions()
+    if len(exceptions_df) > 0:
+        st.subheader(f"🔒 예외풀 - 비공개 계정 ({len(exceptions_df)}명)")
+        st.dataframe(exceptions_df, use_container_width=True, hide_index=True)
+    else:
+        st.info("예외풀에 해당하는 계정이 없습니다.")
+
+
+def collection_in_progress() -> bool:
+    """anytime_collect.py 수집 중 여부 (잠정 순위 파일이 있고 ranking.csv보다 최신)"""
+    try:
+        provisional_mtime = os.path.getmtime(PROVISIONAL_PATH)
+    except OSError:
+        return False  # 수집 완료 시 삭제됨
+    return not (os.path.exists(RANKING_PATH) and os.path.getmtime(RANKING_PATH) >= provisional_mtime)
+
+
+@st.fragment(run_every="10s")
+def render_live_standings():
+    """수집 중 실시간 순위 (ranking_provisional.csv를 10초마다 다시 읽음)"""
+    if not collection_in_progress():
+        st.info("진행 중인 수집이 없습니다. `python src/anytime_collect.py` 실행 시 표시됩니다.")
+        return
+    
+    try:
+        live_df = pd.read_csv(PROVISIONAL_PATH)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError):
+        return  # 파일 쓰기 중 - 다음 주기에 다시 읽음
+    
+    updated = datetime.fromtimestamp(os.path.getmtime(PROVISIONAL_PATH))
+    st.caption(f"랭킹 {len(live_df)}명 · 마지막 갱신 {updated.strftime('%H:%M:%S')}")
+    
+    live_df = live_df.rename(columns=COLUMN_MAPPING)
+    live_df["status"] = ""
+    live_df.loc[live_df.index < N_WINNERS, "status"] = "선정"
+    live_df.loc[(live_df.index >= N_WINNERS) & (live_df.index < N_WINNERS + N_RESERVES), "status"] = "예비"
+    
+    display_cols = [c for c in ["rank", "status", "username", "Final", "Relationship",
+                                "Reliability", "RunnerFit", "risk_flags"] if c in live_df.columns]
+    st.dataframe(
+        live_df[display_cols].head(N_WINNERS + N_RESERVES),
+        use_container_width=True,
+        hide_index=True
+    )
+
+
+@st.fragment
+def render_user_detail(filtered_df: pd.DataFrame, posts_index: dict[str, pd.DataFrame]):
+    """유저 상세 패널 (유저 선택/러닝 필터 조작 시 이 영역만 리런)"""
     st.subheader("👤 유저 상세 정보")
     
     # 유저 선택
@@ -616,17 +664,13 @@ def main():
             # 러닝 관련 필터
             show_running_only = st.toggle("러닝 관련 포스트만 보기", value=False, key="running_filter")
             
-            if posts_df is not None and len(posts_df) > 0:
-                user_posts = posts_df[posts_df["username"] == selected_username].copy()
+            if posts_index:
+                user_posts = posts_index.get(selected_username, pd.DataFrame()).copy()
                 
                 if show_running_only and "is_running_related" in user_posts.columns:
                     user_posts = user_posts[user_posts["is_running_related"] == True]
                 
                 if len(user_posts) > 0:
-                    # 날짜 정렬
-                    if "date" in user_posts.columns:
-                        user_posts = user_posts.sort_values("date", ascending=False)
-                    
                     # 음수값(-1)을 0으로 변환 (수집 실패 데이터)
                     if "likes_count" in user_posts.columns:
                         user_posts.loc[user_posts["likes_count"] < 0, "likes_count"] = 0
@@ -676,56 +720,164 @@ def main():
                 st.info("📭 포스트 데이터가 없습니다. `data/processed/posts_clean.csv`를 생성하세요.")
     else:
         st.info("표시할 유저가 없습니다.")
+
+
+def main():
+    st.title("🏃 관계형 영향력 기반 선정 대시보드")
     
-    st.divider()
+    # ========== 스코어 산출 공식 설명 (상단 배치) ==========
+    with st.expander("ℹ️ 스코어 산출 공식 및 로직 설명"):
+        st.markdown(r"""
+        ### 1. 지표별 상세 산식
+
+        #### ① Relationship (관계성, 50점)
+        구독자(팔로워)와의 실질적인 상호작용 능력을 평가합니다. 단순히 댓글이 많은 것뿐만 아니라, **'소통의 질(반응이 없는 게시물의 비율)'**을 감점 요인으로 반영합니다.
+
+        $$
+        Score_{Relationship} = B_{comm} - P_{lack}
+        $$
+
+        * $B_{comm}$ (평균 댓글 점수): 평균 댓글 수 및 팔로워 대비 참여율에 따라 부여 (Max 50점)
+        * $P_{lack}$ (소통 부재 페널티): (댓글 3개 이하 게시물 수 / 전체 게시물 수) × 가중치 (Max 15점)
+
+        #### ② Reliability (신뢰성, 30점)
+        계정의 운영 상태와 활동의 꾸준함을 평가합니다. 최근성(Recency)과 빈도(Frequency)를 핵심 지표로 사용합니다.
+
+        $$
+        Score_{Reliability} = \left(\frac{R_{score} + F_{score}}{2}\right) - P_{private}
+        $$
+
+        * $R_{score}$ (최근 활동 점수): 마지막 포스팅 날짜가 현재와 가까울수록 높은 점수
+        * $F_{score}$ (활동 빈도 점수): 최근 90일 내 업로드된 포스팅 개수 기반
+        * $P_{private}$ (비공개 감점): 비공개 계정일 경우 즉시 감점 적용
+
+        #### ③ RunnerFit (러닝 적합도, 20점)
+        해당 계정의 콘텐츠가 브랜드(러닝) 성격과 얼마나 일치하는지 분석합니다.
+
+        $$
+        Score_{RunnerFit} = \left(\frac{Post_{running}}{Post_{total}}\right) \times 20
+        $$
+
+        * $Post_{running}$: 캡션 내 러닝 관련 키워드 및 해시태그가 포함된 게시물 수
+        * $Post_{total}$: 분석 대상 전체 게시물 수
+        """)
+
+    # 데이터 로드
+    df, data_source = load_ranking_data()
+    posts_index = load_posts_index()
     
-    # ========== Export 섹션 ==========
-    st.subheader("📥 Export")
+    # 데이터 소스에 따른 안내 메시지
+    if data_source == "sample":
+        st.warning("""
+        ⚠️ **데이터가 없습니다!**
+        
+        `data/processed/ranking.csv` 또는 `data/processed/winners_draft.csv`가 없어 **샘플 데이터**로 표시 중입니다.
+        
+        👉 데이터 파이프라인을 실행하여 실제 데이터를 생성해주세요.
+        """)
+        # 샘플 포스트 데이터도 생성
+        if not posts_index:
+            posts_index = index_posts_by_user(generate_sample_posts(df["username"].tolist()))
+    elif data_source == "winners_draft":
+        st.info("""
+        ℹ️ `ranking.csv`가 없어 `winners_draft.csv`로 표시 중입니다.
+        
+        전체 랭킹을 보려면 파이프라인을 실행하여 `ranking.csv`를 생성하세요.
+        """)
     
-    col1, col2, col3 = st.columns(3)
+    run_info = load_run_info()
+    if run_info.get("as_of"):
+        snapshot_note = f" · 스냅샷 `{run_info['snapshot']}`" if run_info.get("snapshot") else ""
+        st.caption(f"🕒 기준 시각(as_of): {run_info['as_of']}{snapshot_note}")
     
-    with col1:
-        # 선정 20명 다운로드
-        if selected_users:
-            selected_df = df[df["username"].isin(selected_users)]
-            st.download_button(
-                label=f"🏆 선정 {len(selected_users)}명 CSV 다운로드",
-                data=to_csv_download(selected_df),
-                file_name=f"selected_winners_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
-                disabled=len(selected_users) > 20
-            )
-            if len(selected_users) > 20:
-                st.caption("⚠️ 20명 이하로 선정해주세요")
-        else:
-            st.button("🏆 선정 0명 (선택 필요)", disabled=True)
+    # ========== 사이드바 ==========
+    with st.sidebar:
+        st.header("🔧 필터 설정")
+        
+        st.subheader("하드 필터")
+        exclude_private = st.toggle("비공개 계정 제외", value=True)
+        exclude_no_posts = st.toggle("posts_90d=0 제외", value=True)
+        exclude_low_frequency = st.toggle("자동 선정 제외 (low_frequency risk)", value=True)
+        show_low_post_warning = st.toggle("post_count≤3 경고 표시", value=True)
+        
+        st.divider()
+        
+        top_n = st.slider("Top N 표시", min_value=10, max_value=100, value=40, step=5)
+        
+        st.divider()
+        
+        show_exceptions = st.toggle("예외풀 (비공개) 보기", value=False)
+        
+        st.divider()
+        
+        with st.expander("🧪 가중치 시뮬레이터 (What-if)"):
+            render_weight_simulator()
     
-    with col2:
-        # 예비 10명 다운로드
-        if backup_users:
-            backup_df = df[df["username"].isin(backup_users)]
-            st.download_button(
-                label=f"📋 예비 {len(backup_users)}명 CSV 다운로드",
-                data=to_csv_download(backup_df),
-                file_name=f"backup_winners_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
-                disabled=len(backup_users) > 10
-            )
-            if len(backup_users) > 10:
-                st.caption("⚠️ 10명 이하로 선정해주세요")
-        else:
-            st.button("📋 예비 0명 (선택 필요)", disabled=True)
+    # 필터 적용
+    filters = {
+        "exclude_private": exclude_private,
+        "exclude_no_posts": exclude_no_posts,
+        "exclude_low_frequency": exclude_low_frequency,
+        "top_n": top_n
+    }
     
-    with col3:
-        # 전체 랭킹 다운로드
-        st.download_button(
-            label=f"📊 전체 랭킹 CSV ({len(filtered_df)}명)",
-            data=to_csv_download(filtered_df),
-            file_name=f"full_ranking_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
-        )
+    filtered_df = load_filtered_ranking(filters)
     
+    # ========== 선정 상태 관리 ==========
+    # 자동 선정 로직
+    def auto_select():
+        # 후보군 추출 (필터링된 전체 리스트에서 시작)
+        candidates_df = filtered_df.copy()
+        
+        # low_frequency 제외 (자동 선정 시에만 제외)
+        if exclude_low_frequency and "risk_flags" in candidates_df.columns:
+            candidates_df = candidates_df[~candidates_df["risk_flags"].str.contains("low_frequency", na=False)]
+        
+        # 상위 20명/10명 선정 (랭킹은 파이프라인 순위대로 이미 정렬됨)
+        current_candidates = candidates_df["username"].head(N_WINNERS + N_RESERVES).tolist()
+        st.session_state.selected_users = set(current_candidates[:N_WINNERS])
+        st.session_state.backup_users = set(current_candidates[N_WINNERS:N_WINNERS + N_RESERVES])
+        st.toast("✅ 상위 20명(선정) / 10명(예비) 자동 선택 완료!")
 
+    # 초기화 또는 버튼 클릭 시
+    if "selected_users" not in st.session_state:
+        st.session_state.selected_users = set()
+        st.session_state.backup_users = set()
+        auto_select()  # 첫 로드 시 자동 선정
+    
+    with st.sidebar:
+        st.divider()
+        if st.button("🔄 자동 선정 적용 (Top 20+10)", use_container_width=True):
+            auto_select()
+            st.rerun()
+
+    # ========== 메인 컨텐츠 ==========
+    
+    # 수집 진행 중일 때만 실시간 순위 표시
+    if collection_in_progress():
+        with st.expander("📡 실시간 순위 (수집 중)", expanded=False):
+            render_live_standings()
+    
+    # 탭 구성
+    if show_exceptions:
+        tab1, tab2 = st.tabs(["📊 랭킹 테이블", "🔒 예외풀 (비공개)"])
+    else:
+        tab1 = st.container()
+        tab2 = None
+    
+    # ----- 랭킹 테이블 탭 -----
+    with tab1:
+        render_ranking_table(filtered_df, df, show_low_post_warning)
+    
+    # ----- 예외풀 탭 -----
+    if show_exceptions and tab2 is not None:
+        with tab2:
+            render_exceptions()
+    
+    st.divider()
+    
+    # ========== 유저 상세 패널 ==========
+    render_user_detail(filtered_df, posts_index)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+"""
+anytime_collect.py - Priority-ordered collection with provisional rankings
+
+Users are collected in order of cheap early signals instead of arbitrary
+set order, and a provisional ranking is published after every posts batch,
+so the likely top 30 can be reviewed long before a large collection ends.
+The provisional file is removed when the collection finishes.
+Standings are kept in an OnlineRanking, so each batch re-scores only the
+users it touched.
+
+Usage:
+    python src/anytime_collect.py [--resume]
+"""
+import sys
+import argparse
+import heapq
+import math
+from pathlib import Path
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import load_json, save_json, PROCESSED_DIR, ensure_dirs
+from src.online_ranking import OnlineRanking
+from src.post_merge import PostIndex, print_merge_stats
+from src.apify_collect import (
+    run_actor_batch, collect_posts_adaptive, normalize_profile, normalize_post
+)
+from src.collect_journal import CollectionJournal, batch_key
+
+PROFILE_BATCH = 50  # usernames per profile-scraper run
+POSTS_BATCH = 25    # users per provisional ranking update
+PROVISIONAL_PATH = PROCESSED_DIR / "ranking_provisional.csv"
+
+
+def priority(comment: dict, profile: dict = None) -> float:
+    """
+    Cheap likelihood of ranking high (higher = collect earlier).
+
+    - comment present: +1, tagged friends: +0.5 each (max 3)
+    - once the profile is known: +0.5 * log10(followers) (max 2),
+      low post_count -1, private accounts last (no posts to score)
+    """
+    score = 0.0
+    if comment:
+        score += 1.0
+        score += 0.5 * min(int(comment.get("tagged_users_count") or 0), 3)
+    if profile:
+        if profile.get("is_private"):
+            return score - 10.0
+        followers = profile.get("followers") or 0
+        score += 0.5 * min(math.log10(followers + 1), 4.0)
+        if (profile.get("post_count") or 0) <= 3:
+            score -= 1.0
+    return score
+
+
+def pop_batch(heap: list, size: int) -> list:
+    """Pop up to size usernames in priority order (ties by username)."""
+    return [heapq.heappop(heap)[1] for _ in range(min(size, len(heap)))]
+
+
+def publish_provisional(ranking: OnlineRanking, scored_users: set):
+    """
+    Write the current standings to ranking_provisional.csv.
+    """
+    df = ranking.to_frame()
+    df.to_csv(PROVISIONAL_PATH, index=False, encoding="utf-8-sig")
+
+    print(f"[Provisional] {len(ranking)} ranked / {len(scored_users)} scored users "
+          f"-> {PROVISIONAL_PATH.name}")
+    top = ranking.top(10)
+    if top:
+        print("  Top: " + ", ".join(f"{r['username']}({r['final_score']})" for r in top))
+    return df
+
+
+def collect_anytime(resume: bool = False):
+    """
+    Interleave profile and post batches in priority order:
+    1. profiles for the highest-priority users without a profile
+    2. posts for the highest-priority public users (re-prioritized with followers)
+    3. publish a provisional ranking
+    """
+    ensure_dirs()
+    journal = CollectionJournal("anytime", resume=resume)
+
+    comments = load_json("comments.json")
+    comment_by_user = {}
+    for c in comments:
+        if c.get("username"):
+            comment_by_user.setdefault(c["username"], c)
+
+    profile_heap = [(-priority(c), u) for u, c in comment_by_user.items()]
+    heapq.heapify(profile_heap)
+    post_heap = []
+
+    profiles = []
+    posts = PostIndex()
+    scored_users = set()
+    ranking = OnlineRanking()
+    ranking.apply_many("comment", list(comment_by_user.values()))
+
+    print(f"[Anytime] {len(profile_heap)} participants queued")
+
+    while profile_heap or post_heap:
+        # 1) Profiles for the next most promising users
+        if profile_heap:
+            batch = sorted(pop_batch(profile_heap, PROFILE_BATCH))
+            items = run_actor_batch(journal, batch_key("profiles", batch),
+                                    "apify~instagram-profile-scraper", {"usernames": batch}, batch)
+            for item in items:
+                profile = normalize_profile(item)
+                profiles.append(profile)
+                ranking.apply("profile", profile)
+                username = profile["username"]
+                if profile["is_private"]:
+                    scored_users.add(username)  # Scored from profile alone (excluded pool)
+                else:
+                    heapq.heappush(post_heap, (-priority(comment_by_user.get(username), profile), username))
+
+        # 2) Posts for the most promising public users, then publish
+        if post_heap:
+            batch = pop_batch(post_heap, POSTS_BATCH)
+            post_counts = {p["username"]: p.get("post_count") for p in profiles}
+            posts_by_user = collect_posts_adaptive(batch, journal=journal, post_counts=post_counts)
+            for username in batch:
+                user_posts = [normalize_post(p, username) for p in posts_by_user.get(username, [])]
+                posts.merge(user_posts)
+                ranking.apply_many("post", user_posts)
+            scored_users.update(batch)
+
+            publish_provisional(ranking, scored_users)
+
+    save_json(profiles, "profiles.json")
+    print_merge_stats(posts.stats)
+    save_json(posts.posts, "posts.json")
+    # Collection finished: the provisional standings are superseded by the pipeline's ranking.csv
+    PROVISIONAL_PATH.unlink(missing_ok=True)
+    print(f"[Anytime] Done: {len(profiles)} profiles, {len(posts)} posts "
+          f"(run python src/pipeline.py for the final ranking)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Priority-ordered collection with provisional rankings")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip finished batches and reattach to in-flight actor runs")
+    args = parser.parse_args()
+    collect_anytime(resume=args.resume)
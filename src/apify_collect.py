@@ -1,15 +1,32 @@
 """
 apify_collect.py - Collect Instagram data from event posts using Apify
 """
+import os
+import sys
+import argparse
 import requests
-import json
 import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.collect_journal import CollectionJournal, batch_key
+from src.io_load import save_json
+from src import run_metrics
+from src.post_merge import PostIndex, print_merge_stats
 
 # Apify API configuration
 APIFY_TOKEN = os.getenv("APIFY_TOKEN", "")
-BASE_URL = "https://api.apify.com/v2"
+BASE_URL = os.getenv("APIFY_BASE_URL", "https://api.apify.com/v2")  # fake_apify.py for offline runs
+
+# Retries for rate limits (429) and transient errors; POSTs only retry 429s
+# (a 5xx on start may still have created the run)
+MAX_RETRIES = 5
+RETRY_BASE_SECS = 1.0
+RETRY_MAX_SECS = 60.0
 
 # Target Instagram posts (shortcodes)
 TARGET_POSTS = [
@@ -18,6 +35,23 @@ TARGET_POSTS = [
     "DSlsKZGE9KS"
 ]
 
+# Terminal actor run statuses
+FINISHED_STATUSES = ["SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"]
+
+# Batched post scraping: usernames per post-scraper run, resized so each
+# run takes about TARGET_RUN_SECS
+POST_BATCH_SIZE = 20
+POST_BATCH_MIN = 5
+POST_BATCH_MAX = 100
+TARGET_RUN_SECS = 120
+
+# Adaptive post depth: a small first page for everyone, the full feature
+# window (features.compute_features n_recent) only for users whose score can
+# still change. 4 posts are enough to reach the top score_posts_90d bucket.
+POSTS_FIRST_PAGE = 4
+POSTS_FULL_DEPTH = 12
+ACTIVE_WINDOW_DAYS = 90
+
 # Paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 RAW_DIR = BASE_DIR / "data" / "raw"
@@ -27,75 +61,289 @@ def ensure_dirs():
     RAW_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def run_apify_actor(actor_id: str, input_data: dict, wait: bool = True) -> List[Dict]:
+def _headers() -> dict:
+    return {"Authorization": f"Bearer {APIFY_TOKEN}"}
+
+
+def _request(method: str, url: str, **kwargs) -> requests.Response:
     """
-    Run an Apify actor and return results.
+    requests.request with backoff on 429 (honours Retry-After) and, for
+    GETs, on 5xx and connection errors.
+    """
+    retry_on = {429} if method == "POST" else {429, 500, 502, 503, 504}
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = requests.request(method, url, headers=_headers(), **kwargs)
+        except requests.ConnectionError:
+            if method == "POST" or attempt == MAX_RETRIES:
+                raise
+            response = None
+        
+        if response is not None and (response.status_code not in retry_on or attempt == MAX_RETRIES):
+            return response
+        
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = RETRY_BASE_SECS * 2 ** attempt
+        delay = min(delay, RETRY_MAX_SECS)
+        reason = response.status_code if response is not None else "connection error"
+        print(f"[Apify] {reason} - retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def start_actor_run(actor_id: str, input_data: dict, wait_secs: int = 0,
+                    phase: str = "") -> Optional[Dict]:
+    """
+    Start an Apify actor run and return its run data (None on error).
+    The run is tracked in run_metrics under the given phase.
     """
     url = f"{BASE_URL}/acts/{actor_id}/runs"
-    headers = {"Authorization": f"Bearer {APIFY_TOKEN}"}
     
     print(f"[Apify] Starting actor: {actor_id}")
     
-    response = requests.post(
-        url,
-        headers=headers,
+    response = _request(
+        "POST", url,
         json=input_data,
-        params={"waitForFinish": 300} if wait else {}
+        params={"waitForFinish": wait_secs} if wait_secs else {}
     )
     
     if response.status_code != 201:
         print(f"[Apify] Error starting actor: {response.status_code}")
         print(response.text)
-        return []
+        return None
     
     run_data = response.json()["data"]
-    run_id = run_data["id"]
-    print(f"[Apify] Run started: {run_id}")
-    
-    # Wait for completion if not already done
-    if wait:
-        status = run_data.get("status")
-        while status not in ["SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"]:
-            time.sleep(5)
-            status_url = f"{BASE_URL}/actor-runs/{run_id}"
-            status_resp = requests.get(status_url, headers=headers)
-            if status_resp.status_code == 200:
-                status = status_resp.json()["data"]["status"]
-                print(f"[Apify] Status: {status}")
-    
-    # Get results
-    dataset_id = run_data.get("defaultDatasetId")
+    print(f"[Apify] Run started: {run_data['id']}")
+    run_metrics.begin_run(run_data, actor_id, input_data, phase, len(response.content))
+    return run_data
+
+
+def wait_for_run(run_id: str, run_data: Optional[Dict] = None, wait_secs: int = 60,
+                 retry_secs: int = 5, max_errors: int = 12) -> Optional[Dict]:
+    """
+    Long-poll an actor run (waitForFinish) until it finishes and return the
+    final run data. Returns None if the run cannot be found (e.g. expired
+    run ID) or status requests fail max_errors times in a row.
+    """
+    status = run_data.get("status") if run_data else None
+    errors = 0
+    while status not in FINISHED_STATUSES:
+        status_resp = _request("GET", f"{BASE_URL}/actor-runs/{run_id}", params={"waitForFinish": wait_secs})
+        run_metrics.track_request(run_id, response_bytes=len(status_resp.content), poll=True)
+        if status_resp.status_code == 200:
+            run_data = status_resp.json()["data"]
+            run_metrics.link_dataset(run_id, run_data.get("defaultDatasetId"))
+            status = run_data["status"]
+            errors = 0
+            print(f"[Apify] Status: {status}")
+        elif run_data is None:
+            print(f"[Apify] Run not found: {run_id} ({status_resp.status_code})")
+            return None
+        else:
+            errors += 1
+            if errors >= max_errors:
+                print(f"[Apify] Giving up on run {run_id}: {errors} failed status requests "
+                      f"({status_resp.status_code})")
+                return None
+            time.sleep(retry_secs)  # errors return at once: do not spin
+    return run_data
+
+
+def fetch_dataset_items(dataset_id: Optional[str]) -> List[Dict]:
+    """
+    Download all items of a run's default dataset.
+    """
     if not dataset_id:
         print("[Apify] No dataset found")
         return []
     
     items_url = f"{BASE_URL}/datasets/{dataset_id}/items"
-    items_resp = requests.get(items_url, headers=headers)
+    items_resp = _request("GET", items_url)
     
     if items_resp.status_code == 200:
         items = items_resp.json()
+        run_metrics.track_request(dataset_id=dataset_id, response_bytes=len(items_resp.content),
+                                  items=len(items))
         print(f"[Apify] Retrieved {len(items)} items")
         return items
     
+    run_metrics.track_request(dataset_id=dataset_id, response_bytes=len(items_resp.content))
     return []
 
 
-def collect_post_comments(shortcode: str) -> List[Dict]:
+def fetch_dataset_page(dataset_id: str, offset: int, limit: int) -> List[Dict]:
+    """
+    Download one page of dataset items (works while the run is still going).
+    """
+    items_resp = _request(
+        "GET", f"{BASE_URL}/datasets/{dataset_id}/items",
+        params={"offset": offset, "limit": limit}
+    )
+    page = items_resp.json() if items_resp.status_code == 200 else []
+    run_metrics.track_request(dataset_id=dataset_id, response_bytes=len(items_resp.content),
+                              items=len(page))
+    return page
+
+
+def get_run(run_id: str) -> Optional[Dict]:
+    """
+    Current run data (status, dataset ID), or None if unavailable.
+    """
+    status_resp = _request("GET", f"{BASE_URL}/actor-runs/{run_id}")
+    run_metrics.track_request(run_id, response_bytes=len(status_resp.content), poll=True)
+    if status_resp.status_code == 200:
+        return status_resp.json()["data"]
+    return None
+
+
+def abort_run(run_id: str):
+    """
+    Abort a running actor (stops further scraping and billing).
+    """
+    resp = _request("POST", f"{BASE_URL}/actor-runs/{run_id}/abort")
+    run_metrics.track_request(run_id, response_bytes=len(resp.content))
+    print(f"[Apify] Abort run {run_id}: {resp.status_code}")
+
+
+def run_apify_actor(actor_id: str, input_data: dict, wait: bool = True, phase: str = "") -> List[Dict]:
     """
-    Collect comments from a single Instagram post.
+    Run an Apify actor and return results.
     """
-    # Using apify/instagram-comment-scraper
-    actor_id = "apify~instagram-comment-scraper"
+    run_data = start_actor_run(actor_id, input_data, wait_secs=300 if wait else 0, phase=phase)
+    if run_data is None:
+        return []
     
-    input_data = {
-        "directUrls": [f"https://www.instagram.com/p/{shortcode}/"],
-        "resultsLimit": 500,  # Get all comments
+    # Wait for completion if not already done
+    if wait:
+        run_data = wait_for_run(run_data["id"], run_data) or run_data
+    
+    # Get results
+    items = fetch_dataset_items(run_data.get("defaultDatasetId"))
+    run_metrics.finish_run(run_data)
+    return items
+
+
+def run_actor_batch(
+    journal: Optional[CollectionJournal],
+    key: str,
+    actor_id: str,
+    input_data: dict,
+    users: Optional[list] = None
+) -> List[Dict]:
+    """
+    Run an actor for one batch with checkpointing.
+    
+    - Batch already in the journal: return its journaled items (no API call)
+    - Run started before a crash: reattach to it by run ID
+    - Otherwise: start a new run and record its ID before waiting
+    
+    Items of a SUCCEEDED run are appended to the journal before returning.
+    A failed, aborted or timed-out run is forgotten and the batch stays
+    pending (its partial items are still returned); a run that could not be
+    waited for keeps its run ID so --resume reattaches to it.
+    """
+    phase = key.split(":")[0]
+    if journal is None:
+        return run_apify_actor(actor_id, input_data, phase=phase)
+    
+    if journal.is_done(key):
+        print(f"[Journal] Skip finished batch: {key}")
+        return journal.items(key)
+    
+    run_data = None
+    run_id = journal.pending_run(key)
+    if run_id:
+        print(f"[Journal] Reattaching to run {run_id} ({key})")
+        run_data = wait_for_run(run_id)
+        if run_data is None:
+            journal.drop_run(key)
+    
+    if run_data is None:
+        run_data = start_actor_run(actor_id, input_data, phase=phase)
+        if run_data is None:
+            return []
+        journal.record_run(key, run_data["id"], users)
+        run_data = wait_for_run(run_data["id"], run_data) or run_data
+    
+    items = fetch_dataset_items(run_data.get("defaultDatasetId"))
+    run_metrics.finish_run(run_data)
+    status = run_data.get("status")
+    if status == "SUCCEEDED":
+        journal.append(key, items, users)
+    else:
+        print(f"[Journal] Batch {key} not finished (run {status}): left pending")
+        if status in FINISHED_STATUSES:
+            journal.drop_run(key)
+    return items
+
+
+def normalize_profile(profile: Dict, username: str = "") -> Dict:
+    """
+    Map a profile-scraper item to the profiles.json schema.
+    """
+    return {
+        "username": profile.get("username", username),
+        "followers": profile.get("followersCount", 0),
+        "following": profile.get("followsCount", 0),
+        "is_private": profile.get("isPrivate", False),
+        "post_count": profile.get("postsCount", 0),
+        "bio": profile.get("biography", "")
     }
+
+
+def normalize_post(post: Dict, username: str) -> Dict:
+    """
+    Map a post-scraper item to the posts.json schema.
+    """
+    return {
+        "username": username,
+        "post_date": post.get("timestamp", ""),
+        "caption": post.get("caption", ""),
+        "like_count": post.get("likesCount", 0),
+        "comment_count": post.get("commentsCount", 0),
+        "media_type": post.get("type", "Image"),
+        "hashtags": post.get("hashtags", []),
+        "post_url": post.get("url", f"https://www.instagram.com/p/{post.get('shortCode', '')}/"),
+        "shortcode": post.get("shortCode", "")
+    }
+
+
+def normalize_comment(comment: Dict, shortcode: str = "") -> Optional[Dict]:
+    """
+    Map a comment item (comment-scraper or instagram-scraper) to the
+    comments.json schema. Returns None for items that are not comments.
+    """
+    # The general instagram-scraper returns the post object when it cannot read comments
+    if "caption" in comment and "commentsCount" in comment:
+        return None
+    username = (comment.get("ownerUsername") or comment.get("username")
+                or (comment.get("owner") or {}).get("username"))
+    if not username:
+        return None
+    post_url = comment.get("postUrl") or ""
+    if "/p/" in post_url:
+        shortcode = post_url.split("/p/")[-1].strip("/").split("/")[0] or shortcode
+    return {
+        "username": username,
+        "comment_text": comment.get("text") or comment.get("content") or "",
+        "tagged_users_count": len(comment.get("mentions") or []),
+        "post_shortcode": shortcode or "unknown"
+    }
+
+
+def collect_post_comments(shortcode: str, journal: Optional[CollectionJournal] = None) -> List[Dict]:
+    """
+    Collect comments from a single Instagram post (comment_scraper adapter).
+    """
+    # Imported here: scraper_adapters builds on this module
+    from src.scraper_adapters import get_adapter
     
-    return run_apify_actor(actor_id, input_data)
+    return get_adapter("comment_scraper").fetch([shortcode], journal=journal)
 
 
-def collect_user_profile(username: str) -> Dict:
+def collect_user_profile(username: str, journal: Optional[CollectionJournal] = None) -> Dict:
     """
     Collect profile data for a single user.
     """
@@ -106,30 +354,197 @@ def collect_user_profile(username: str) -> Dict:
         "usernames": [username],
     }
     
-    results = run_apify_actor(actor_id, input_data)
+    results = run_actor_batch(journal, f"profile:{username}", actor_id, input_data, [username])
     return results[0] if results else {}
 
 
-def collect_user_posts(username: str, limit: int = 12) -> List[Dict]:
+def next_batch_size(batch_size: int, n_users: int, elapsed_secs: float,
+                    target_secs: float = TARGET_RUN_SECS) -> int:
     """
-    Collect recent posts from a user.
+    Size the next post batch from the observed run duration.
+    
+    Aims for target_secs per run, changing at most 2x per step and staying
+    within [POST_BATCH_MIN, POST_BATCH_MAX].
+    """
+    if elapsed_secs <= 0 or n_users == 0:
+        return batch_size
+    secs_per_user = elapsed_secs / n_users
+    size = int(target_secs / secs_per_user)
+    size = max(batch_size // 2, min(batch_size * 2, size))
+    return max(POST_BATCH_MIN, min(POST_BATCH_MAX, size))
+
+
+def split_posts_by_owner(items: List[Dict], usernames: list) -> Dict[str, List[Dict]]:
+    """
+    Split a multi-username post-scraper dataset back into per-user lists
+    using ownerUsername (case-insensitive). Items of unknown owners are dropped.
+    """
+    lookup = {u.lower(): u for u in usernames}
+    by_user = {u: [] for u in usernames}
+    unmatched = 0
+    for item in items:
+        owner = item.get("ownerUsername") or item.get("username")
+        username = lookup.get(str(owner).lower()) if owner else None
+        if username is None:
+            unmatched += 1
+            continue
+        by_user[username].append(item)
+    if unmatched:
+        print(f"[Posts] {unmatched} items without a matching ownerUsername dropped")
+    return by_user
+
+
+def collect_posts_batched(
+    usernames: list,
+    limit: int = 12,
+    journal: Optional[CollectionJournal] = None,
+    kind: str = "posts"
+) -> Dict[str, List[Dict]]:
+    """
+    Collect recent posts for many users, packing usernames into shared
+    instagram-post-scraper runs (resultsLimit applies per user).
+    
+    Batch size adapts to observed run duration (next_batch_size). With a
+    journal, finished batches are reused and in-flight runs reattached.
+    
+    Returns: {username: [raw post items]}
     """
-    # Using apify/instagram-post-scraper
     actor_id = "apify~instagram-post-scraper"
+    results = {u: [] for u in usernames}
+    remaining = sorted(set(usernames))
     
-    input_data = {
-        "username": [username],
-        "resultsLimit": limit,
-    }
+    if journal is not None:
+        wanted = set(remaining)
+        covered = set()
+        for entry in journal.done_batches(kind):
+            if wanted.isdisjoint(entry["users"]):
+                continue
+            for u, posts in split_posts_by_owner(entry["items"], entry["users"]).items():
+                if u in wanted:
+                    results[u].extend(posts)
+            covered.update(entry["users"])
+        for key, run in journal.pending_runs(kind).items():
+            batch = run["users"]
+            if wanted.isdisjoint(batch):
+                continue
+            input_data = {"username": batch, "resultsLimit": limit}
+            items = run_actor_batch(journal, key, actor_id, input_data, batch)
+            for u, posts in split_posts_by_owner(items, batch).items():
+                if u in wanted:
+                    results[u].extend(posts)
+            covered.update(batch)
+        remaining = [u for u in remaining if u not in covered]
+        if covered & wanted:
+            print(f"[Posts] {len(covered & wanted)} users restored from journal, {len(remaining)} remaining")
+    
+    batch_size = POST_BATCH_SIZE
+    while remaining:
+        batch, remaining = remaining[:batch_size], remaining[batch_size:]
+        print(f"[Posts] Fetching {len(batch)} users in one run ({len(remaining)} left)")
+        
+        input_data = {"username": batch, "resultsLimit": limit}
+        started = time.time()
+        items = run_actor_batch(journal, batch_key(kind, batch), actor_id, input_data, batch)
+        elapsed = time.time() - started
+        
+        for u, posts in split_posts_by_owner(items, batch).items():
+            results[u].extend(posts)
+        
+        batch_size = next_batch_size(batch_size, len(batch), elapsed)
     
-    return run_apify_actor(actor_id, input_data)
+    return results
 
 
-def collect_all_data():
+def parse_timestamp(value) -> Optional[datetime]:
+    """Parse an Apify ISO timestamp ('2025-07-25T03:01:11.000Z') as UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def needs_more_posts(
+    posts: List[Dict],
+    first_page: int = POSTS_FIRST_PAGE,
+    post_count: Optional[int] = None,
+    as_of: Optional[datetime] = None
+) -> bool:
+    """
+    Decide from a first page of posts whether deeper fetching can change the score.
+    
+    No deeper fetch when:
+    - the page came back short, or the profile has no more posts (exhausted)
+    - the newest post is older than ACTIVE_WINDOW_DAYS: posts_90d == 0, so the
+      user lands in the excluded pool whatever the older posts look like
+    
+    Otherwise the user is active and the 12-post features (avg comments,
+    low-comment rate, running rate) still depend on the remaining posts.
+    """
+    if len(posts) < first_page:
+        return False
+    if post_count is not None and post_count <= first_page:
+        return False
+    
+    dates = [d for d in (parse_timestamp(p.get("timestamp")) for p in posts) if d]
+    if not dates:
+        return True  # Undated page: fetch the full window to be safe
+    
+    as_of = as_of or datetime.now(timezone.utc)
+    return max(dates) >= as_of - timedelta(days=ACTIVE_WINDOW_DAYS)
+
+
+def collect_posts_adaptive(
+    usernames: list,
+    journal: Optional[CollectionJournal] = None,
+    post_counts: Optional[Dict[str, int]] = None
+) -> Dict[str, List[Dict]]:
+    """
+    Two-stage post collection:
+    1. POSTS_FIRST_PAGE posts for every user (batched)
+    2. POSTS_FULL_DEPTH posts only for users where needs_more_posts() holds
+    
+    Returns: {username: [raw post items]}
+    """
+    post_counts = post_counts or {}
+    posts_by_user = collect_posts_batched(usernames, limit=POSTS_FIRST_PAGE,
+                                          journal=journal, kind="posts_p1")
+    
+    deeper = [
+        u for u in sorted(posts_by_user)
+        if needs_more_posts(posts_by_user[u], POSTS_FIRST_PAGE, post_counts.get(u))
+    ]
+    print(f"[Posts] First page done: {len(deeper)}/{len(posts_by_user)} users need "
+          f"{POSTS_FULL_DEPTH} posts")
+    
+    if deeper:
+        full = collect_posts_batched(deeper, limit=POSTS_FULL_DEPTH,
+                                     journal=journal, kind="posts_p2")
+        for u in deeper:
+            if full.get(u):
+                posts_by_user[u] = full[u]  # Full page includes the first page
+    
+    return posts_by_user
+
+
+def collect_user_posts(username: str, limit: int = 12, journal: Optional[CollectionJournal] = None) -> List[Dict]:
+    """
+    Collect recent posts from a user.
+    """
+    return collect_posts_batched([username], limit=limit, journal=journal)[username]
+
+
+def collect_all_data(resume: bool = False):
     """
     Main collection function: collect comments, profiles, and posts.
+    
+    Every actor run is checkpointed in the 'collect_all' journal; with
+    resume=True finished batches are skipped and in-flight runs reattached.
     """
     ensure_dirs()
+    journal = CollectionJournal("collect_all", resume=resume)
     
     all_comments = []
     unique_usernames = set()
@@ -141,22 +556,18 @@ def collect_all_data():
     
     for shortcode in TARGET_POSTS:
         print(f"\n[Collecting] Post: {shortcode}")
-        comments = collect_post_comments(shortcode)
+        resumed = journal.is_done(f"comments:{shortcode}")
+        comments = collect_post_comments(shortcode, journal)
         
         for comment in comments:
-            # Normalize comment data
-            username = comment.get("ownerUsername") or comment.get("username")
-            if username:
-                unique_usernames.add(username)
-                all_comments.append({
-                    "username": username,
-                    "comment_text": comment.get("text", ""),
-                    "tagged_users_count": len(comment.get("mentions", [])),
-                    "post_shortcode": shortcode
-                })
+            record = normalize_comment(comment, shortcode)
+            if record:
+                unique_usernames.add(record["username"])
+                all_comments.append(record)
         
         print(f"  - Collected {len(comments)} comments")
-        time.sleep(2)  # Rate limiting
+        if not resumed:
+            time.sleep(2)  # Rate limiting
     
     # Deduplicate comments by username (keep first)
     seen_users = set()
@@ -169,9 +580,7 @@ def collect_all_data():
     print(f"\nTotal unique participants: {len(unique_usernames)}")
     
     # Save comments
-    with open(RAW_DIR / "comments.json", "w", encoding="utf-8") as f:
-        json.dump(deduped_comments, f, ensure_ascii=False, indent=2)
-    print(f"Saved comments to {RAW_DIR / 'comments.json'}")
+    save_json(deduped_comments, "comments.json")
     
     # Step 2: Collect profiles for all unique users
     print("\n" + "=" * 60)
@@ -179,56 +588,38 @@ def collect_all_data():
     print("=" * 60)
     
     all_profiles = []
-    for username in list(unique_usernames):
+    for username in sorted(unique_usernames):
         print(f"[Profile] {username}")
-        profile = collect_user_profile(username)
+        resumed = journal.is_done(f"profile:{username}")
+        profile = collect_user_profile(username, journal)
         if profile:
-            all_profiles.append({
-                "username": profile.get("username", username),
-                "followers": profile.get("followersCount", 0),
-                "following": profile.get("followsCount", 0),
-                "is_private": profile.get("isPrivate", False),
-                "post_count": profile.get("postsCount", 0),
-                "bio": profile.get("biography", "")
-            })
-        time.sleep(1)
-    
-    with open(RAW_DIR / "profiles.json", "w", encoding="utf-8") as f:
-        json.dump(all_profiles, f, ensure_ascii=False, indent=2)
-    print(f"Saved profiles to {RAW_DIR / 'profiles.json'}")
+            all_profiles.append(normalize_profile(profile, username))
+        if not resumed:
+            time.sleep(1)
+    
+    save_json(all_profiles, "profiles.json")
     
     # Step 3: Collect recent posts for each user
     print("\n" + "=" * 60)
     print("Step 3: Collecting user posts")
     print("=" * 60)
     
-    all_posts = []
-    for username in list(unique_usernames):
-        # Skip private users
-        profile = next((p for p in all_profiles if p["username"] == username), None)
-        if profile and profile.get("is_private"):
-            print(f"[Skip] {username} (private)")
-            continue
-        
-        print(f"[Posts] {username}")
-        posts = collect_user_posts(username, limit=12)
-        
-        for post in posts:
-            all_posts.append({
-                "username": username,
-                "post_date": post.get("timestamp"),
-                "caption": post.get("caption", ""),
-                "like_count": post.get("likesCount", 0),
-                "comment_count": post.get("commentsCount", 0),
-                "media_type": post.get("type", "Image"),
-                "hashtags": post.get("hashtags", [])
-            })
-        
-        time.sleep(1)
+    private_users = {p["username"] for p in all_profiles if p.get("is_private")}
+    for username in sorted(private_users & unique_usernames):
+        print(f"[Skip] {username} (private)")
+    public_users = sorted(unique_usernames - private_users)
+    
+    post_counts = {p["username"]: p.get("post_count") for p in all_profiles}
+    posts_by_user = collect_posts_adaptive(public_users, journal=journal, post_counts=post_counts)
+    
+    index = PostIndex()
+    for username in public_users:
+        for post in posts_by_user.get(username, []):
+            index.upsert(normalize_post(post, username))
+    print_merge_stats(index.stats)
+    all_posts = index.posts
     
-    with open(RAW_DIR / "posts.json", "w", encoding="utf-8") as f:
-        json.dump(all_posts, f, ensure_ascii=False, indent=2)
-    print(f"Saved posts to {RAW_DIR / 'posts.json'}")
+    save_json(all_posts, "posts.json")
     
     print("\n" + "=" * 60)
     print("Data collection complete!")
@@ -239,4 +630,8 @@ def collect_all_data():
 
 
 if __name__ == "__main__":
-    collect_all_data()
+    parser = argparse.ArgumentParser(description="Collect Instagram event data via Apify")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip finished batches and reattach to in-flight actor runs")
+    args = parser.parse_args()
+    collect_all_data(resume=args.resume)
@@ -5,6 +5,7 @@ import json
 import random
 from pathlib import Path
 from src.io_load import generate_sample_data, load_json, save_json
+from src.post_merge import merge_posts, print_merge_stats
 
 TARGET_SIZE = 100
 
@@ -39,7 +40,8 @@ def augment_data():
     # Merge
     final_comments = real_comments + sample_comments
     final_profiles = real_profiles + sample_profiles
-    final_posts = real_posts + sample_posts
+    final_posts, merge_stats = merge_posts(real_posts, sample_posts)
+    print_merge_stats(merge_stats)
     
     # Save merged data
     save_json(final_comments, "comments.json")
@@ -0,0 +1,117 @@
+"""
+bench_adapters.py - Coverage/throughput benchmark for scraper adapters
+
+Runs every adapter of one kind against the same targets and reports unique
+usernames captured (and coverage vs. the union of all adapters), items/sec,
+requests and cost from run_metrics. By default a local fake_apify server is
+started, so fixtures recorded with `fake_apify.py --record` are replayed;
+pass --base-url to benchmark against another endpoint (real API = paid).
+
+Usage:
+    python src/bench_adapters.py [--kind comments] [--adapters a,b]
+                                 [--targets DSuGGGvDFB7,...] [--limit 300]
+                                 [--latency 0.05] [--rate-429 0.05] [--item-secs 0.01]
+"""
+import sys
+import argparse
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import apify_collect, run_metrics
+from src.apify_collect import TARGET_POSTS
+from src.fake_apify import start_fake_server
+from src.scraper_adapters import ADAPTERS, adapters_for
+
+BENCH_METRICS_PATH = run_metrics.METRICS_DIR / "bench_adapters.jsonl"
+
+
+def bench_adapter(adapter, targets: list, limit=None) -> dict:
+    """Collect once with an adapter and measure it."""
+    started_at = datetime.now(timezone.utc).isoformat()
+    t0 = time.perf_counter()
+    records = adapter.collect(targets, limit)
+    wall = time.perf_counter() - t0
+
+    runs = run_metrics.load_metrics(since=started_at)
+    usernames = {r["username"] for r in records}
+    return {
+        "adapter": adapter.name,
+        "actor": adapter.actor_id,
+        "items": len(records),
+        "users": usernames,
+        "wall_secs": wall,
+        "items_per_sec": len(records) / wall if wall > 0 else 0.0,
+        "runs": len(runs),
+        "requests": sum(r.get("requests") or 0 for r in runs),
+        "usd": sum(r.get("usage_usd") or 0 for r in runs),
+    }
+
+
+def report(results: list):
+    union = set().union(*(r["users"] for r in results)) if results else set()
+    print(f"\n{'adapter':<24}{'users':>7}{'cover':>8}{'items':>7}{'items/s':>9}"
+          f"{'wall s':>8}{'runs':>6}{'reqs':>6}{'USD':>10}")
+    for r in sorted(results, key=lambda r: -r["items_per_sec"]):
+        coverage = len(r["users"]) / len(union) if union else 0.0
+        r["coverage"] = coverage
+        print(f"{r['adapter']:<24}{len(r['users']):>7}{coverage:>7.0%} {r['items']:>7}"
+              f"{r['items_per_sec']:>9.1f}{r['wall_secs']:>8.2f}{r['runs']:>6}{r['requests']:>6}"
+              f"{r['usd']:>10.5f}")
+
+    full = [r for r in results if r.get("coverage", 0) >= 1.0]
+    if full:
+        best = max(full, key=lambda r: r["items_per_sec"])
+        print(f"\nFastest with full coverage: {best['adapter']} ({best['actor']})")
+    elif results:
+        best = max(results, key=lambda r: (r["coverage"], r["items_per_sec"]))
+        print(f"\nNo adapter has full coverage; best: {best['adapter']} ({best['coverage']:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper adapters on the same targets")
+    parser.add_argument("--kind", default="comments", choices=["comments", "profiles", "posts"])
+    parser.add_argument("--adapters", help="comma-separated adapter names (default: all of --kind)")
+    parser.add_argument("--targets", help="comma-separated shortcodes/usernames (default: event posts)")
+    parser.add_argument("--limit", type=int, help="resultsLimit override")
+    parser.add_argument("--base-url", help="use this API instead of a local fake server")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--run-secs", type=float, default=0.5)
+    parser.add_argument("--item-secs", type=float, default=0.002)
+    args = parser.parse_args()
+
+    if args.adapters:
+        adapters = [ADAPTERS[name] for name in args.adapters.split(",")]
+    else:
+        adapters = adapters_for(args.kind)
+    if args.targets:
+        targets = args.targets.split(",")
+    elif args.kind == "comments":
+        targets = list(TARGET_POSTS)
+    else:
+        parser.error("--targets (usernames) is required for profiles/posts")
+
+    server = None
+    if args.base_url:
+        apify_collect.BASE_URL = args.base_url
+    else:
+        server, apify_collect.BASE_URL = start_fake_server(
+            latency=args.latency, rate_429=args.rate_429, retry_after=0.2,
+            run_secs=args.run_secs, item_secs=args.item_secs
+        )
+    run_metrics.METRICS_PATH = BENCH_METRICS_PATH
+    print(f"[Bench] {len(adapters)} adapters x {len(targets)} targets on {apify_collect.BASE_URL}")
+
+    results = [bench_adapter(adapter, targets, args.limit) for adapter in adapters]
+    report(results)
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
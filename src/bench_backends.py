@@ -0,0 +1,52 @@
+"""
+bench_backends.py - Cleaning + features + scoring: pandas vs Polars backend
+
+Times run_pipeline's stages 2-4 (clean_participants/clean_posts,
+compute_features, apply_scores + apply_hard_filters) on synthetic raw
+records (parity_polars.synthetic_raw) with each backend, and checks the
+two rankings agree.
+
+Usage:
+    python src/bench_backends.py [--n 1000000]
+"""
+import sys
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.cleaning import as_of_timestamp
+from src.scoring import create_rankings
+from src.polars_backend import run_polars
+from src.parity_polars import run_pandas, synthetic_raw
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pandas and Polars backends")
+    parser.add_argument("--n", type=int, default=1_000_000, help="synthetic posts")
+    args = parser.parse_args()
+
+    raw = synthetic_raw(args.n)
+    as_of = as_of_timestamp(datetime(2025, 10, 1))
+    print(f"[Bench] {len(raw[2])} posts, {len(raw[1])} profiles")
+
+    results = {}
+    for name, backend in [("pandas", run_pandas), ("polars", run_polars)]:
+        secs, outputs = timed(lambda: backend(*raw, as_of))
+        results[name] = (secs, create_rankings(outputs[4], outputs[5])[0])
+
+    baseline = results["pandas"][0]
+    print(f"\n{'backend':<10}{'secs':>10}{'speedup':>10}")
+    for name, (secs, _) in results.items():
+        print(f"{name:<10}{secs:>10.2f}{baseline / secs:>9.1f}x")
+    same = results["pandas"][1].astype(str).equals(results["polars"][1].astype(str))
+    print(f"\nRankings {'match' if same else 'DIFFER'}")
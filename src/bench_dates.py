@@ -0,0 +1,103 @@
+"""
+bench_dates.py - Post date parsing / day-math benchmark
+
+Generates --n mixed-form ISO timestamps (Z-suffixed, naive, +09:00 and
++0900 offsets, some empty) and compares the ways the code base has computed "days since
+post":
+- per_row:  datetime.fromisoformat per value, then per-row subtraction
+            (the old app.calculate_metrics path)
+- to_datetime: pd.to_datetime with format inference, Series arithmetic, .dt.days
+- int64:    cleaning.parse_post_dates once + cleaning.days_since (int64 math)
+
+Usage:
+    python src/bench_dates.py [--n 1000000] [--repeat 3]
+"""
+import sys
+import argparse
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.cleaning import parse_post_dates, days_since
+
+AS_OF = datetime(2026, 1, 7, 12, tzinfo=timezone.utc)
+
+
+def mixed_dates(n: int, seed: int = 42) -> list:
+    """n ISO strings over the past two years in mixed timezone forms."""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 2 * 365 * 86_400, n)
+    forms = rng.integers(0, 5, n)
+    base = pd.Timestamp(AS_OF).value // 10**9
+    values = []
+    for s, form in zip(seconds.tolist(), forms.tolist()):
+        ts = datetime.fromtimestamp(base - s, tz=timezone.utc)
+        if form == 0:
+            values.append(ts.strftime("%Y-%m-%dT%H:%M:%S.000Z"))
+        elif form == 1:
+            values.append(ts.replace(tzinfo=None).isoformat())
+        elif form == 2:
+            values.append(ts.astimezone(timezone(pd.Timedelta(hours=9))).isoformat())
+        elif form == 3:
+            values.append(ts.astimezone(timezone(pd.Timedelta(hours=9))).strftime("%Y-%m-%dT%H:%M:%S%z"))
+        else:
+            values.append("" if s % 50 == 0 else ts.isoformat())
+    return values
+
+
+def per_row(values: list) -> np.ndarray:
+    out = []
+    for value in values:
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            out.append((AS_OF - dt).days)
+        except ValueError:
+            out.append(999)
+    return np.array(out)
+
+
+def to_datetime(values: list) -> np.ndarray:
+    dates = pd.to_datetime(pd.Series(values), utc=True, errors="coerce", format="mixed")
+    return (pd.Timestamp(AS_OF) - dates).dt.days.fillna(999).astype(int).to_numpy()
+
+
+def int64(values: list) -> np.ndarray:
+    return days_since(parse_post_dates(values), AS_OF)
+
+
+METHODS = {"per_row": per_row, "to_datetime": to_datetime, "int64": int64}
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark post date parsing and day math")
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    values = mixed_dates(args.n)
+    print(f"[Bench] {len(values)} timestamps (Z / naive / +09:00 / +0900 / empty)")
+
+    reference = per_row(values)
+    results = {}
+    for name, fn in METHODS.items():
+        same = np.array_equal(fn(values), reference)
+        results[name] = best_of(lambda: fn(values), args.repeat)
+        print(f"  {name:<12}{results[name]:>9.3f}s  {args.n / results[name] / 1e6:>6.2f}M/s"
+              f"  {results['per_row'] / results[name]:>6.1f}x  {'same' if same else 'DIFFERENT'}")
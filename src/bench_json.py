@@ -0,0 +1,94 @@
+"""
+bench_json.py - Raw JSON codec benchmark (backend x on-disk form)
+
+Scales posts.json (or sample data) up to --n records and measures, for every
+installed backend (json / orjson / msgspec) and form (json / compact /
+jsonl): serialize and parse throughput, encoded size, and for msgspec the
+typed struct decoding used by io_load.load_typed.
+
+Usage:
+    python src/bench_json.py [--n 200000] [--repeat 3] [--kind posts]
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import json_codec
+from src.io_load import load_json, generate_sample_data
+
+KINDS = {"comments": 0, "profiles": 1, "posts": 2}
+
+
+def scaled_records(kind: str, n: int) -> list:
+    """n records of a raw file, repeated with distinct usernames/shortcodes."""
+    base = load_json(f"{kind}.json") or generate_sample_data(50)[KINDS[kind]]
+    records = []
+    for i in range(n):
+        record = dict(base[i % len(base)])
+        record["username"] = f"{record.get('username', 'user')}_{i // len(base)}"
+        if "shortcode" in record:
+            record["shortcode"] = f"{record['shortcode']}{i}"
+        records.append(record)
+    return records
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def bench(records: list, kind: str, repeat: int) -> list:
+    backends = ["json"] + [b for b in ("orjson", "msgspec") if getattr(json_codec, b) is not None]
+    results = []
+    for backend in backends:
+        for fmt in json_codec.FORMATS:
+            payload = json_codec.dumps(records, fmt, backend)
+            row = {
+                "backend": backend,
+                "format": fmt,
+                "bytes": len(payload),
+                "dump_secs": best_of(lambda: json_codec.dumps(records, fmt, backend), repeat),
+                "load_secs": best_of(lambda: json_codec.loads(payload, backend), repeat),
+                "typed_secs": None,
+            }
+            if backend == "msgspec":
+                try:
+                    row["typed_secs"] = best_of(lambda: json_codec.decode_typed(payload, kind), repeat)
+                except json_codec.msgspec.ValidationError as e:
+                    print(f"[Bench] Typed decode skipped ({e})")
+            results.append(row)
+    return results
+
+
+def report(results: list, n: int):
+    baseline = next(r for r in results if r["backend"] == "json" and r["format"] == "json")
+    print(f"\n{'backend':<9}{'format':<9}{'size MB':>9}{'dump s':>9}{'MB/s':>8}"
+          f"{'load s':>9}{'MB/s':>8}{'typed s':>9}{'load x':>8}")
+    for r in results:
+        mb = r["bytes"] / 1e6
+        typed = f"{r['typed_secs']:>9.3f}" if r["typed_secs"] is not None else f"{'-':>9}"
+        print(f"{r['backend']:<9}{r['format']:<9}{mb:>9.2f}{r['dump_secs']:>9.3f}{mb / r['dump_secs']:>8.0f}"
+              f"{r['load_secs']:>9.3f}{mb / r['load_secs']:>8.0f}{typed}"
+              f"{baseline['load_secs'] / r['load_secs']:>7.1f}x")
+    print(f"\n{n} records; baseline = stdlib json, indented (current on-disk format)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark raw JSON backends and forms")
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--kind", default="posts", choices=list(KINDS))
+    args = parser.parse_args()
+
+    records = scaled_records(args.kind, args.n)
+    print(f"[Bench] {args.kind}: {len(records)} records, backends: json"
+          f"{', orjson' if json_codec.orjson else ''}{', msgspec' if json_codec.msgspec else ''}")
+    report(bench(records, args.kind, args.repeat), args.n)
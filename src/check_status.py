@@ -1,43 +1,37 @@
 """
-check_status.py - Check counts of collected data
+check_status.py - Check counts of collected data (from the raw manifest,
+see io_load.manifest_entry; files are only parsed if the manifest is stale)
 """
-import json
+import sys
 from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-RAW_DIR = BASE_DIR / "data" / "raw"
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import RAW_DIR, manifest_entry
 
 def check():
     if not RAW_DIR.exists():
         print("No data directory.")
         return
 
-    comments_file = RAW_DIR / "comments.json"
-    profiles_file = RAW_DIR / "profiles.json"
-    posts_file = RAW_DIR / "posts.json"
-    
-    c_count = 0
-    p_count = 0
-    po_count = 0
-    
-    if comments_file.exists():
-        with open(comments_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            c_count = len(data)
-            unique_c = len(set(c.get("username") for c in data))
-            print(f"Comments: {c_count} (Unique Users: {unique_c})")
-            
-    if profiles_file.exists():
-        with open(profiles_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            p_count = len(data)
-            print(f"Profiles: {p_count}")
-            
-    if posts_file.exists():
-        with open(posts_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            po_count = len(data)
-            print(f"Posts: {po_count}")
+    comments = manifest_entry("comments.json")
+    profiles = manifest_entry("profiles.json")
+    posts = manifest_entry("posts.json")
+
+    if comments:
+        print(f"Comments: {comments['records']} (Unique Users: {comments['unique_users']})")
+
+    if profiles:
+        print(f"Profiles: {profiles['records']}")
+
+    if posts:
+        print(f"Posts: {posts['records']} (Users: {posts['unique_users']}, "
+              f"{(posts['min_post_date'] or '-')[:10]} ~ {(posts['max_post_date'] or '-')[:10]})")
+
+    for name, entry in [("comments.json", comments), ("profiles.json", profiles), ("posts.json", posts)]:
+        if entry:
+            print(f"  {name:<14} {entry['bytes'] / 1024:>8.1f} KB  updated {entry['updated_at']}")
 
 if __name__ == "__main__":
     check()
@@ -0,0 +1,218 @@
+"""
+chunked.py - Out-of-core pipeline: posts partitioned by username range
+
+run_pipeline(chunked=True) for post histories larger than memory. Comments
+and profiles (one row per user) are still loaded whole; posts never are:
+
+1. Partition: posts.json is read in batches (JSON Lines are streamed line
+   by line, so write large histories with RAW_FORMAT=jsonl; a JSON array is
+   parsed whole once). Each batch is validated, cleaned (clean_posts is
+   row-local) and split by username range into columnar spill files,
+   chunks/run-*/part-NNN/batch-NNNNN.parquet. Ranges hold equal numbers of
+   profiles.
+2. Features: per partition, its posts (all posts of its users, in input
+   order) are loaded, and activity, window, 12-post and decay features are
+   computed for its participants. Partial results are spilled and the
+   posts appended to posts_clean.csv (grouped by username range).
+3. Merge: partial results are concatenated in profile order, so scoring
+   and ranking give the same output as the in-memory pipeline.
+
+Peak memory is one batch or one partition of posts plus the per-user
+frames. Spill files are parquet when pyarrow is installed (pickle
+otherwise, or for batches Arrow cannot type) and are removed after the run.
+
+Usage:
+    python src/pipeline.py --chunked [--partitions 16]
+"""
+import pickle
+import shutil
+import tempfile
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:  # Optional dependency: pickle spill files
+    pyarrow = None
+
+from .io_load import PROCESSED_DIR
+from .cleaning import (
+    as_of_timestamp, clean_profiles, add_post_activity, clean_posts, clean_comments, POST_KEYS, PROFILE_KEYS
+)
+from .features import compute_features, compute_window_features, compute_decay_features
+from .raw_schema import validate_records, print_validation_report
+
+CHUNK_DIR = PROCESSED_DIR / "chunks"
+BATCH_SIZE = 200_000
+POSTS_PER_PARTITION = 500_000
+
+
+def default_partitions(n_posts: int) -> int:
+    return max(1, -(-n_posts // POSTS_PER_PARTITION))
+
+
+def batched(records: list, size: int = BATCH_SIZE) -> Iterator[list]:
+    """In-memory records (e.g. a snapshot) in the batches iter_record_batches yields."""
+    for start in range(0, len(records), size):
+        yield records[start:start + size]
+
+
+# -----------------------------------------------------------------------------
+# Username ranges
+# -----------------------------------------------------------------------------
+def range_bounds(usernames: pd.Series, partitions: int) -> np.ndarray:
+    """Lower bounds of ranges 1..n-1 splitting the usernames into equal counts (fewer if few users)."""
+    users = np.sort(usernames.dropna().astype(str).unique().astype(object))
+    if len(users) == 0 or partitions <= 1:
+        return np.array([], dtype=object)
+    cuts = (np.arange(1, partitions) * len(users)) // partitions
+    return np.unique(users[cuts])
+
+
+def partition_of(usernames: pd.Series, bounds: np.ndarray) -> np.ndarray:
+    """Range index of each username (missing usernames go to range 0)."""
+    keys = usernames.fillna("").astype(str).to_numpy(dtype=object)
+    return np.searchsorted(bounds, keys, side="right")
+
+
+# -----------------------------------------------------------------------------
+# Spill files
+# -----------------------------------------------------------------------------
+def _write_spill(df: pd.DataFrame, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if pyarrow is not None:
+        try:
+            df.to_parquet(path.with_suffix(".parquet"), index=False)
+            return
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError):
+            pass  # mixed-type column: keep this batch as pickle
+    df.to_pickle(path.with_suffix(".pkl"))
+
+
+def _read_spill(path: Path) -> pd.DataFrame:
+    if path.suffix == ".pkl":
+        return pd.read_pickle(path)
+    df = pd.read_parquet(path)
+    # Parquet lists come back as arrays; clean_posts has lists
+    df["hashtags"] = [list(tags) if tags is not None else [] for tags in df["hashtags"]]
+    return df
+
+
+def load_partition(run_dir: Path, part: int) -> pd.DataFrame:
+    """Clean posts of one username range, in input order."""
+    files = sorted((run_dir / f"part-{part:03d}").glob("batch-*"))
+    if not files:
+        return pd.DataFrame(columns=POST_KEYS)
+    return pd.concat([_read_spill(path) for path in files], ignore_index=True)
+
+
+def _merge_reports(total: Optional[dict], report: dict) -> dict:
+    if total is None:
+        return {**report, "fields": Counter(report["fields"])}
+    for key in ["records", "valid", "flagged", "aliased", "dropped"]:
+        total[key] += report[key]
+    total["fields"].update(report["fields"])
+    return total
+
+
+def spill_posts(post_batches: Iterable[list], bounds: np.ndarray, as_of: pd.Timestamp, run_dir: Path) -> int:
+    """Validate, clean and partition post batches into run_dir; returns the number of clean posts."""
+    n_posts, report = 0, None
+    for b, batch in enumerate(post_batches):
+        batch, batch_report = validate_records(batch, "posts")
+        report = _merge_reports(report, batch_report)
+        posts_df = clean_posts(batch, as_of)
+        if posts_df.empty:
+            continue
+        n_posts += len(posts_df)
+        for part, chunk in posts_df.groupby(partition_of(posts_df["username"], bounds), sort=True):
+            _write_spill(chunk, run_dir / f"part-{part:03d}" / f"batch-{b:05d}")
+        print(f"  [Chunked] batch {b + 1}: {n_posts} posts spilled")
+    if report is not None:
+        print_validation_report({**report, "fields": dict(report["fields"])})
+    return n_posts
+
+
+# -----------------------------------------------------------------------------
+# Entry point
+# -----------------------------------------------------------------------------
+def _in_order(df: pd.DataFrame, order: pd.Index, keys) -> pd.DataFrame:
+    return df.iloc[np.argsort(order.get_indexer(keys), kind="stable")]
+
+
+def run_chunked(
+    comments: list,
+    profiles: list,
+    post_batches: Iterable[list],
+    as_of: Optional[datetime],
+    n_recent: int = 12,
+    half_life_days: Optional[float] = None,
+    partitions: int = 1,
+    posts_csv: Optional[Path] = None
+) -> Tuple[pd.DataFrame, ...]:
+    """
+    Clean and featurize with posts spilled to disk by username range.
+
+    Returns per-user frames shaped like the in-memory stages:
+    (participants_df, comments_df, features_df, window_df, decay_df or None).
+    posts_csv, if given, receives every clean post (grouped by range).
+    """
+    as_of = as_of_timestamp(as_of)
+    comments, report = validate_records(comments, "comments")
+    print_validation_report(report)
+    profiles, report = validate_records(profiles, "profiles")
+    print_validation_report(report)
+
+    profiles_df = clean_profiles(profiles)
+    if profiles_df.empty:
+        profiles_df = pd.DataFrame(columns=PROFILE_KEYS)
+    bounds = range_bounds(profiles_df["username"], partitions)
+    profile_part = partition_of(profiles_df["username"], bounds)
+    order = pd.Index(profiles_df["username"].drop_duplicates())
+    print(f"  [Chunked] {len(bounds) + 1} username ranges, {len(order)} profiles")
+
+    CHUNK_DIR.mkdir(parents=True, exist_ok=True)
+    run_dir = Path(tempfile.mkdtemp(prefix="run-", dir=CHUNK_DIR))
+    try:
+        spill_posts(post_batches, bounds, as_of, run_dir)
+
+        wrote_header = False
+        for part in range(len(bounds) + 1):
+            posts_df = load_partition(run_dir, part)
+            participants_df = add_post_activity(profiles_df[profile_part == part], posts_df, as_of)
+            usernames = participants_df["username"]
+            window_df = compute_window_features(posts_df, usernames, as_of)
+            features_df = compute_features(participants_df, posts_df, n_recent, as_of, window_df)
+            decay_df = compute_decay_features(posts_df, usernames, as_of, half_life_days) if half_life_days else None
+            with open(run_dir / f"result-{part:03d}.pkl", "wb") as f:
+                pickle.dump((participants_df, features_df, window_df, decay_df), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            if posts_csv is not None and (len(posts_df) or not wrote_header):
+                posts_df.to_csv(posts_csv, index=False, mode="a" if wrote_header else "w", header=not wrote_header,
+                                encoding="utf-8" if wrote_header else "utf-8-sig")
+                wrote_header = True
+            print(f"  [Chunked] range {part + 1}/{len(bounds) + 1}: {len(participants_df)} participants, "
+                  f"{len(posts_df)} posts")
+            del posts_df
+
+        results = []
+        for part in range(len(bounds) + 1):
+            with open(run_dir / f"result-{part:03d}.pkl", "rb") as f:
+                results.append(pickle.load(f))
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    participants_df, features_df, window_df, decay_df = (
+        pd.concat([r[i] for r in results]) if results[0][i] is not None else None for i in range(4)
+    )
+    participants_df = _in_order(participants_df, order, participants_df["username"]).reset_index(drop=True)
+    features_df = _in_order(features_df, order, features_df["username"]).reset_index(drop=True)
+    window_df = _in_order(window_df, order, window_df.index)
+    if decay_df is not None:
+        decay_df = _in_order(decay_df, order, decay_df["username"]).reset_index(drop=True)
+    return participants_df, clean_comments(comments), features_df, window_df, decay_df
@@ -3,27 +3,143 @@ cleaning.py - Data preprocessing and cleaning
 """
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Optional
 from .io_load import normalize_record
+from .segments import UserSegments, NAT_NS
+
+PROFILE_KEYS = ["username", "followers", "following", "is_private", "post_count", "bio"]
+POST_KEYS = ["username", "post_date", "caption", "like_count", "comment_count", "media_type", "hashtags", "post_url"]
+
+
+# -----------------------------------------------------------------------------
+# As-of Time
+# -----------------------------------------------------------------------------
+def as_of_timestamp(as_of: Optional[datetime] = None) -> pd.Timestamp:
+    """
+    Reference time for activity metrics as a UTC Timestamp (naive values
+    are taken as UTC; None = now). Passing the data snapshot time instead of
+    now makes cleaning reproducible and cacheable.
+    """
+    ts = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.now(tz="UTC")
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def posts_as_of(posts_df: pd.DataFrame, as_of: Optional[datetime]) -> pd.DataFrame:
+    """Drop posts dated after as_of (undated posts are kept)."""
+    if as_of is None or posts_df.empty or "post_date" not in posts_df.columns:
+        return posts_df
+    return posts_df[~(parse_post_dates(posts_df["post_date"]) > as_of_timestamp(as_of))]
+
+
+# -----------------------------------------------------------------------------
+# Dates (one normalization for all post timestamps)
+# -----------------------------------------------------------------------------
+NS_PER_DAY = 86_400 * 10**9
+# UTC offsets after a time of day: (width, colon position) of "+09:00", "+0900", "+09"
+OFFSET_FORMS = [(6, 3), (5, None), (3, None)]
+
+
+def parse_post_dates(values) -> pd.Series:
+    """
+    Post timestamps as datetime64[ns, UTC]: ISO 8601 strings are parsed once
+    (naive values are UTC, unparseable ones NaT); already-parsed datetimes
+    are only converted. Every date column goes through here so naive and
+    aware values never mix (which falls back to slow object dtype).
+    """
+    dates = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        return dates.dt.tz_convert("UTC").dt.as_unit("ns")
+    if pd.api.types.is_datetime64_dtype(dates.dtype):
+        return dates.dt.tz_localize("UTC").dt.as_unit("ns")
+    if dates.empty:
+        return pd.Series(index=dates.index, dtype="datetime64[ns, UTC]")
+
+    # pandas parses mixed "+09:00"-style offsets value by value, so offsets
+    # ("+HH:MM", "+HHMM" or "+HH" after a time) are cut off, the wall times
+    # parsed in one pass and shifted in int64
+    text = dates.astype("str")
+    local = text.copy()
+    shift = np.zeros(len(text), dtype="int64")
+    pending = (text.str[10].isin(["T", " "]) & ~text.str.endswith("Z")).to_numpy().copy()
+    for size, colon in OFFSET_FORMS:
+        rows = np.flatnonzero(pending)
+        tail = text.iloc[rows].str[-size:]
+        signed = tail.str[0].isin(["+", "-"]).to_numpy()
+        rows, tail = rows[signed], tail[signed]
+        digits = tail.str[1:3] + (tail.str[-2:] if size > 3 else "00")
+        form = digits.str.isdigit() & (digits.str.len() == 4)
+        if colon:
+            form &= tail.str[colon] == ":"
+        form = form.to_numpy()
+        if not form.any():
+            continue
+        rows, tail, digits = rows[form], tail[form], digits[form]
+        minutes = (digits.str[:2].astype("int64") * 60 + digits.str[2:].astype("int64")).to_numpy()
+        shift[rows] = np.where(tail.str[0].to_numpy() == "-", -minutes, minutes) * 60 * 10**9
+        local.iloc[rows] = text.iloc[rows].str[:-size].to_numpy()
+        pending[rows] = False
+    try:
+        ns = pd.to_datetime(local.str.removesuffix("Z"), format="ISO8601", errors="coerce").dt.as_unit("ns")
+    except ValueError:
+        # Offsets in other forms remain: pandas' own (slower) parsing
+        return pd.to_datetime(dates, format="ISO8601", utc=True, errors="coerce").dt.as_unit("ns")
+    ns = ns.array.asi8
+    ns = np.where(ns != NAT_NS, ns - shift, NAT_NS)
+    return pd.Series(pd.DatetimeIndex(ns.view("M8[ns]")).tz_localize("UTC"), index=dates.index)
+
+
+def date_ns(dates: pd.Series) -> np.ndarray:
+    """Epoch nanoseconds (int64, NAT_NS for missing) of parsed dates."""
+    return parse_post_dates(dates).array.asi8
+
+
+def days_since(dates, as_of: Optional[datetime] = None, missing: int = 999) -> np.ndarray:
+    """Whole days from each date to as_of (int64 math; `missing` for NaT)."""
+    ref = as_of_timestamp(as_of).as_unit("ns").value
+    ns = date_ns(dates)
+    valid = ns != NAT_NS
+    return np.where(valid, (ref - np.where(valid, ns, ref)) // NS_PER_DAY, missing)
+
+
+def within_days(dates, as_of: Optional[datetime], days: int) -> np.ndarray:
+    """Mask of dates no more than `days` days before as_of."""
+    ref = as_of_timestamp(as_of).as_unit("ns").value
+    ns = date_ns(dates)
+    return (ns != NAT_NS) & (ns >= ref - days * NS_PER_DAY)
 
 
 # -----------------------------------------------------------------------------
 # Cleaning Functions
 # -----------------------------------------------------------------------------
-def clean_participants(profiles: list, posts: list) -> pd.DataFrame:
+def clean_participants(profiles: list, posts: list, as_of: Optional[datetime] = None) -> pd.DataFrame:
     """
-    Clean and enrich participant profiles with activity metrics.
+    Clean and enrich participant profiles with activity metrics
+    (relative to as_of; posts after it are ignored).
     
     Output columns:
     - username, is_private, followers, following, post_count, bio
     - last_post_date, last_post_days, posts_90d
     """
-    # Normalize profiles
-    profile_keys = ["username", "followers", "following", "is_private", "post_count", "bio"]
-    df = pd.DataFrame([normalize_record(p, profile_keys) for p in profiles])
+    df = clean_profiles(profiles)
+    if df.empty:
+        return pd.DataFrame(columns=PROFILE_KEYS + ["last_post_date", "last_post_days", "posts_90d"])
     
+    # Use UTC for consistency as Apify returns UTC dates
+    now = as_of_timestamp(as_of)
+    posts_df = pd.DataFrame([normalize_record(p, ["username", "post_date"]) for p in posts])
+    if not posts_df.empty:
+        # Normalize post dates
+        posts_df["post_date"] = parse_post_dates(posts_df["post_date"])
+        posts_df = posts_as_of(posts_df, now)
+    return add_post_activity(df, posts_df, now)
+
+
+def clean_profiles(profiles: list) -> pd.DataFrame:
+    """Normalized profiles with missing values filled (no activity metrics, not deduplicated)."""
+    df = pd.DataFrame([normalize_record(p, PROFILE_KEYS) for p in profiles])
     if df.empty:
-        return pd.DataFrame(columns=profile_keys + ["last_post_date", "last_post_days", "posts_90d"])
+        return df
     
     # Handle missing values
     df["is_private"] = df["is_private"].fillna(False).astype(bool)
@@ -31,41 +147,36 @@ def clean_participants(profiles: list, posts: list) -> pd.DataFrame:
     df["following"] = pd.to_numeric(df["following"], errors="coerce").fillna(0).astype(int)
     df["post_count"] = pd.to_numeric(df["post_count"], errors="coerce").fillna(0).astype(int)
     df["bio"] = df["bio"].fillna("")
-    
-    # Calculate activity metrics from posts
-    # Use UTC for consistency as Apify returns UTC dates
-    now = datetime.now().astimezone()
-    cutoff_90d = now - timedelta(days=90)
-    
-    posts_df = pd.DataFrame(posts) if posts else pd.DataFrame()
-    
+    return df
+
+
+def add_post_activity(df: pd.DataFrame, posts_df: pd.DataFrame, as_of: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    clean_profiles rows + last_post_date / last_post_days / posts_90d from
+    posts_df (username, UTC post_date, already cut at as_of), deduplicated
+    by username. posts_df only needs the posts of these profiles' users.
+    """
+    now = as_of_timestamp(as_of)
     if not posts_df.empty:
-        # Normalize post dates
-        posts_df["username"] = posts_df.apply(
-            lambda r: normalize_record(r.to_dict(), ["username"])["username"], axis=1
-        )
-        posts_df["post_date"] = posts_df.apply(
-            lambda r: normalize_record(r.to_dict(), ["post_date"])["post_date"], axis=1
-        )
-        posts_df["post_date"] = pd.to_datetime(posts_df["post_date"], errors="coerce", utc=True)
-        
-        # Last post date per user
-        last_post = posts_df.groupby("username")["post_date"].max().reset_index()
-        last_post.columns = ["username", "last_post_date"]
-        
-        # Posts in last 90 days per user
-        posts_90d = posts_df[posts_df["post_date"] >= cutoff_90d].groupby("username").size().reset_index(name="posts_90d")
+        # Last post date / posts in last 90 days per user (segment reductions)
+        segments = UserSegments(posts_df["username"], date_ns(posts_df["post_date"]))
+        recent = segments.take(within_days(posts_df["post_date"], now, 90))
+        last_post = pd.DataFrame({
+            "username": segments.keys,
+            "last_post_date": pd.DatetimeIndex(segments.newest().view("M8[ns]")).tz_localize("UTC"),
+        })
+        posts_90d = pd.DataFrame({"username": segments.keys, "posts_90d": segments.sum(recent)})
+        posts_90d = posts_90d[posts_90d["posts_90d"] > 0]
         
         # Merge with profiles
         df = df.merge(last_post, on="username", how="left")
         df = df.merge(posts_90d, on="username", how="left")
     else:
-        df["last_post_date"] = pd.NaT
-        df["posts_90d"] = 0
+        df = df.assign(last_post_date=pd.NaT, posts_90d=0)
     
     # Calculate days since last post
-    df["last_post_date"] = pd.to_datetime(df["last_post_date"], errors="coerce")
-    df["last_post_days"] = (now - df["last_post_date"]).dt.days.fillna(999).astype(int)
+    df["last_post_date"] = parse_post_dates(df["last_post_date"])
+    df["last_post_days"] = days_since(df["last_post_date"], now)
     df["posts_90d"] = df["posts_90d"].fillna(0).astype(int)
     
     # Deduplicate by username
@@ -74,21 +185,20 @@ def clean_participants(profiles: list, posts: list) -> pd.DataFrame:
     return df
 
 
-def clean_posts(posts: list) -> pd.DataFrame:
+def clean_posts(posts: list, as_of: Optional[datetime] = None) -> pd.DataFrame:
     """
-    Clean posts data.
+    Clean posts data (posts dated after as_of are dropped).
     
     Output columns:
     - username, post_date, caption, like_count, comment_count, media_type, hashtags, post_url
     """
-    post_keys = ["username", "post_date", "caption", "like_count", "comment_count", "media_type", "hashtags", "post_url"]
-    df = pd.DataFrame([normalize_record(p, post_keys) for p in posts])
+    df = pd.DataFrame([normalize_record(p, POST_KEYS) for p in posts])
     
     if df.empty:
-        return pd.DataFrame(columns=post_keys)
+        return pd.DataFrame(columns=POST_KEYS)
     
     # Type conversions
-    df["post_date"] = pd.to_datetime(df["post_date"], errors="coerce")
+    df["post_date"] = parse_post_dates(df["post_date"])
     df["like_count"] = pd.to_numeric(df["like_count"], errors="coerce").fillna(0).astype(int)
     df["comment_count"] = pd.to_numeric(df["comment_count"], errors="coerce").fillna(0).astype(int)
     df["caption"] = df["caption"].fillna("")
@@ -96,7 +206,7 @@ def clean_posts(posts: list) -> pd.DataFrame:
     df["media_type"] = df["media_type"].fillna("Unknown")
     df["hashtags"] = df["hashtags"].apply(lambda x: x if isinstance(x, list) else [])
     
-    return df
+    return posts_as_of(df, as_of)
 
 
 def clean_comments(comments: list) -> pd.DataFrame:
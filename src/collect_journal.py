@@ -0,0 +1,151 @@
+"""
+collect_journal.py - Durable per-batch journal for resumable collection runs
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+JOURNAL_DIR = BASE_DIR / "data" / "raw" / "journal"
+
+
+def batch_key(kind: str, names: list) -> str:
+    """Stable key for a batch of usernames/shortcodes (order independent)."""
+    digest = hashlib.sha1(",".join(sorted(names)).encode("utf-8")).hexdigest()[:12]
+    return f"{kind}:{digest}"
+
+
+class CollectionJournal:
+    """
+    Append-only journal of finished actor batches plus a progress cursor.
+
+    Files (under data/raw/journal/):
+    - <name>.jsonl: one line per finished batch {key, users, items, ts}
+    - <name>.cursor.json: {"done": {key: count}, "runs": {key: {run_id, users}}}
+
+    Batch lines are fsync'd before the cursor marks them done, so a crash
+    loses at most the batch in flight. Actor runs are recorded in the cursor
+    as soon as they start, so a resumed collection can reattach to them by ID
+    instead of paying for a new run.
+    """
+
+    def __init__(self, name: str, resume: bool = False):
+        self.name = name
+        self.log_path = JOURNAL_DIR / f"{name}.jsonl"
+        self.cursor_path = JOURNAL_DIR / f"{name}.cursor.json"
+        JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
+
+        if not resume:
+            self.reset()
+
+        self.cursor = self._load_cursor()
+        self.batches = self._load_batches()
+
+        if resume:
+            print(f"[Journal] Resuming '{name}': {len(self.batches)} batches done, "
+                  f"{len(self.cursor['runs'])} runs pending")
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+    def reset(self):
+        """Start a fresh journal (drops previous progress)."""
+        for path in [self.log_path, self.cursor_path]:
+            if path.exists():
+                path.unlink()
+
+    def _load_cursor(self) -> dict:
+        if self.cursor_path.exists():
+            with open(self.cursor_path, "r", encoding="utf-8") as f:
+                cursor = json.load(f)
+            cursor.setdefault("done", {})
+            cursor.setdefault("runs", {})
+            return cursor
+        return {"done": {}, "runs": {}}
+
+    def _save_cursor(self):
+        tmp_path = self.cursor_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.cursor, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.cursor_path)
+
+    def _load_batches(self) -> dict:
+        """Read finished batches; a torn last line (crash mid-write) is ignored."""
+        batches = {}
+        if not self.log_path.exists():
+            return batches
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("key") in self.cursor["done"]:
+                    batches[entry["key"]] = entry
+        return batches
+
+    # -------------------------------------------------------------------------
+    # Batch state
+    # -------------------------------------------------------------------------
+    def is_done(self, key: str) -> bool:
+        return key in self.batches
+
+    def items(self, key: str) -> list:
+        return self.batches[key]["items"] if key in self.batches else []
+
+    def done_batches(self, kind: str) -> list:
+        """Finished batch entries of the given kind ({key, users, items, ts})."""
+        return [
+            entry for key, entry in self.batches.items()
+            if key.startswith(f"{kind}:")
+        ]
+
+    def done_users(self, kind: str) -> set:
+        """Usernames covered by finished batches of the given kind."""
+        users = set()
+        for entry in self.done_batches(kind):
+            users.update(entry.get("users") or [])
+        return users
+
+    def pending_run(self, key: str):
+        run = self.cursor["runs"].get(key)
+        return run["run_id"] if run else None
+
+    def pending_runs(self, kind: str) -> dict:
+        """Started-but-unfinished runs of the given kind: {key: {run_id, users}}."""
+        return {
+            key: run for key, run in self.cursor["runs"].items()
+            if key.startswith(f"{kind}:")
+        }
+
+    def record_run(self, key: str, run_id: str, users: list = None):
+        """Remember a started actor run so it can be reattached after a crash."""
+        self.cursor["runs"][key] = {"run_id": run_id, "users": users or []}
+        self._save_cursor()
+
+    def drop_run(self, key: str):
+        """Forget a run that can no longer be reattached (expired/failed)."""
+        if self.cursor["runs"].pop(key, None) is not None:
+            self._save_cursor()
+
+    def append(self, key: str, items: list, users: list = None):
+        """Durably append a finished batch, then advance the cursor."""
+        entry = {
+            "key": key,
+            "users": users or [],
+            "items": items,
+            "ts": datetime.now().isoformat(),
+        }
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.batches[key] = entry
+        self.cursor["done"][key] = len(items)
+        self.cursor["runs"].pop(key, None)
+        self._save_cursor()
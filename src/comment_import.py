@@ -0,0 +1,139 @@
+"""
+comment_import.py - Bulk import of manual comment lists (CSV) into comments.json
+
+The CSV is read in chunks with string dtypes. Usernames are normalized
+(strip, leading '@', lowercase) and @mentions counted with one compiled
+regex over each chunk's text column; only the unique users reach the
+Python upsert loop. Rows are upserted into comments.json by (username, post_shortcode): the first row per
+user in the CSV wins, and it replaces that user's earlier import while
+comments collected from other posts are kept.
+
+Accepted layouts:
+- header with `username` and one of comment_text / comment_combined / comment
+- headerless: col 0 = username, col 1 = comment text
+
+Usage:
+    python src/comment_import.py "username and comment.csv" [--chunksize 100000]
+"""
+import sys
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+import pandas as pd
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import load_json, save_json
+
+COMMENTS_FILE = "comments.json"
+MANUAL_SHORTCODE = "manual_import"
+CHUNKSIZE = 100_000
+TEXT_COLUMNS = ["comment_text", "comment_combined", "comment"]
+
+# Instagram usernames: letters, digits, '.', '_' (max 30)
+MENTION_RE = re.compile(r"@[A-Za-z0-9._]{1,30}")
+
+
+def normalize_usernames(usernames: pd.Series) -> pd.Series:
+    """Strip whitespace and a leading '@', lowercase."""
+    return usernames.fillna("").str.strip().str.lstrip("@").str.lower()
+
+
+def read_comment_chunks(csv_path, chunksize: int = CHUNKSIZE):
+    """Yield DataFrames with username / comment_text columns (all strings)."""
+    header = pd.read_csv(csv_path, nrows=0, encoding="utf-8-sig").columns
+    columns = {str(c).strip().lower(): c for c in header}
+
+    if "username" in columns:
+        text_col = next((columns[c] for c in TEXT_COLUMNS if c in columns), None)
+        usecols = [columns["username"]] + ([text_col] if text_col else [])
+        rename = {columns["username"]: "username", text_col: "comment_text"}
+        reader = pd.read_csv(csv_path, usecols=usecols, dtype="string", keep_default_na=False,
+                             encoding="utf-8-sig", chunksize=chunksize)
+    else:
+        print("[Import] 'username' column not found. Assuming headerless: col 0=username, col 1=comment")
+        rename = {}
+        reader = pd.read_csv(csv_path, header=None, usecols=[0, 1], names=["username", "comment_text"],
+                             dtype="string", keep_default_na=False, encoding="utf-8-sig",
+                             chunksize=chunksize)
+
+    for chunk in reader:
+        chunk = chunk.rename(columns=rename)
+        if "comment_text" not in chunk.columns:
+            chunk["comment_text"] = ""
+        yield chunk
+
+
+def chunk_to_records(chunk: pd.DataFrame, shortcode: str = MANUAL_SHORTCODE) -> pd.DataFrame:
+    """Vectorized CSV chunk -> comments.json columns (blank usernames dropped)."""
+    usernames = normalize_usernames(chunk["username"])
+    text = chunk["comment_text"].fillna("")
+    df = pd.DataFrame({
+        "username": usernames,
+        "comment_text": text,
+        "tagged_users_count": text.str.count(MENTION_RE).astype("int64"),
+        "post_shortcode": shortcode,
+    })
+    return df[df["username"] != ""]
+
+
+def import_comment_csv(csv_path, chunksize: int = CHUNKSIZE, shortcode: str = MANUAL_SHORTCODE,
+                       filename: str = COMMENTS_FILE) -> dict:
+    """Upsert a comment CSV into data/raw/<filename>; returns import stats."""
+    t0 = time.perf_counter()
+    comments = load_json(filename)
+    slots: Dict[Tuple[str, str], int] = {
+        (str(c.get("username", "")).lower(), c.get("post_shortcode", "")): i
+        for i, c in enumerate(comments)
+    }
+    stats = {"rows": 0, "blank": 0, "duplicates": 0, "inserted": 0, "updated": 0}
+    seen = set()
+
+    for chunk in read_comment_chunks(csv_path, chunksize):
+        stats["rows"] += len(chunk)
+        df = chunk_to_records(chunk, shortcode)
+        stats["blank"] += len(chunk) - len(df)
+
+        # First row per user wins, within the chunk and across earlier chunks
+        fresh = df.drop_duplicates(subset=["username"], keep="first")
+        stats["duplicates"] += len(df) - len(fresh)
+
+        for record in fresh.to_dict("records"):
+            if record["username"] in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(record["username"])
+            key = (record["username"], shortcode)
+            slot = slots.get(key)
+            if slot is None:
+                slots[key] = len(comments)
+                comments.append(record)
+                stats["inserted"] += 1
+            else:
+                comments[slot] = record
+                stats["updated"] += 1
+
+    save_json(comments, filename)
+    stats["total"] = len(comments)
+    stats["secs"] = time.perf_counter() - t0
+    print_import_stats(stats, filename)
+    return stats
+
+
+def print_import_stats(stats: dict, filename: str = COMMENTS_FILE):
+    print(f"[Import] {stats['rows']} rows -> {stats['inserted']} inserted, {stats['updated']} updated "
+          f"({stats['duplicates']} duplicate users, {stats['blank']} blank usernames) "
+          f"in {stats['secs']:.1f}s; {filename}: {stats['total']} records")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import a comment CSV into comments.json")
+    parser.add_argument("csv_path")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    parser.add_argument("--shortcode", default=MANUAL_SHORTCODE, help="post_shortcode for imported rows")
+    args = parser.parse_args()
+    import_comment_csv(args.csv_path, args.chunksize, args.shortcode)
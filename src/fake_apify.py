@@ -0,0 +1,499 @@
+"""
+fake_apify.py - Local stand-in for the Apify REST API (offline testing/benchmarks)
+
+Serves the endpoints used by the collectors:
+- POST /v2/acts/{actor}/runs           (waitForFinish supported)
+- GET  /v2/actor-runs/{id}             (status polling)
+- POST /v2/actor-runs/{id}/abort
+- GET  /v2/datasets/{id}/items         (offset/limit pagination; grows while running)
+- GET  /v2/users/me
+
+Run items come from a recorded fixture when one matches the actor + input,
+otherwise from a deterministic synthetic generator. Latency, 429 rate limits,
+HTTP 500s, failed runs and a concurrent-run limit (queued runs stay READY)
+can be injected. With --record the server proxies to the real API instead
+and saves every dataset it serves as a replayable fixture.
+
+Usage:
+    python src/fake_apify.py [--port 8765] [--latency 0.05] [--rate-429 0.1]
+                             [--fail-rate 0.05] [--run-secs 2] [--max-concurrent 4]
+    python src/fake_apify.py --record     # needs APIFY_TOKEN
+
+    APIFY_BASE_URL=http://127.0.0.1:8765/v2 python src/apify_collect.py
+"""
+import os
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = BASE_DIR / "data" / "fixtures" / "apify"
+UPSTREAM_URL = "https://api.apify.com/v2"
+
+# Simulated billing (1 GB actor memory)
+USD_PER_COMPUTE_UNIT = 0.4
+
+# Synthetic data shape
+PARTICIPANT_POOL = 300     # distinct commenter usernames across event posts
+COMMENTS_PER_POST = 150    # comments generated per directUrl (before resultsLimit)
+
+
+# -----------------------------------------------------------------------------
+# Fixtures
+# -----------------------------------------------------------------------------
+def fixture_key(actor_id: str, input_data: dict) -> str:
+    """Stable key for an actor + input (key order independent)."""
+    payload = actor_id + "|" + json.dumps(input_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def fixture_path(actor_id: str, input_data: dict) -> Path:
+    return FIXTURES_DIR / f"{actor_id}__{fixture_key(actor_id, input_data)}.json"
+
+
+def load_fixture(actor_id: str, input_data: dict) -> Optional[List[Dict]]:
+    path = fixture_path(actor_id, input_data)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["items"]
+
+
+def save_fixture(actor_id: str, input_data: dict, items: List[Dict]):
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    path = fixture_path(actor_id, input_data)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"actor_id": actor_id, "input": input_data, "items": items},
+                  f, ensure_ascii=False, indent=2)
+
+
+# -----------------------------------------------------------------------------
+# Synthetic items (same fields the real scrapers return)
+# -----------------------------------------------------------------------------
+def _iso(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def _shortcode(url: str) -> str:
+    parts = [p for p in urlparse(url).path.split("/") if p]
+    return parts[-1] if parts else url
+
+
+def synthetic_items(actor_id: str, input_data: dict) -> List[Dict]:
+    """Deterministic fake dataset for the instagram scrapers used in this repo."""
+    # Anchored to midnight so repeated runs on the same day return identical items
+    now = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    limit = int(input_data.get("resultsLimit") or 0)
+
+    if "profile-scraper" in actor_id:
+        items = []
+        for username in input_data.get("usernames", []):
+            rng = random.Random(f"profile:{username}")
+            items.append({
+                "username": username,
+                "followersCount": int(10 ** rng.uniform(1.5, 4.5)),
+                "followsCount": rng.randint(50, 2000),
+                "isPrivate": rng.random() < 0.1,
+                "postsCount": rng.randint(0, 400),
+                "biography": rng.choice(["", "러닝 🏃", "마라톤 준비 중", "daily"]),
+            })
+        return items
+
+    if "post-scraper" in actor_id:
+        usernames = input_data.get("username", [])
+        if isinstance(usernames, str):
+            usernames = [usernames]
+        items = []
+        for username in usernames:
+            rng = random.Random(f"posts:{username}")
+            gap_days = rng.choice([1, 3, 7, 20, 60])
+            posted = now - timedelta(days=rng.randint(0, 120))
+            for k in range(limit or 12):
+                code = hashlib.md5(f"{username}:{k}".encode()).hexdigest()[:11]
+                running = rng.random() < 0.5
+                items.append({
+                    "ownerUsername": username,
+                    "timestamp": _iso(posted),
+                    "caption": "오늘도 러닝 #러닝 #마라톤" if running else "일상 기록",
+                    "likesCount": rng.randint(5, 800),
+                    "commentsCount": rng.randint(0, 40),
+                    "type": rng.choice(["Image", "Video", "Sidecar"]),
+                    "hashtags": ["러닝", "마라톤"] if running else [],
+                    "shortCode": code,
+                    "url": f"https://www.instagram.com/p/{code}/",
+                })
+                posted -= timedelta(days=gap_days, hours=rng.randint(0, 23))
+        return items
+
+    if "comment-scraper" in actor_id or input_data.get("resultsType") == "comments":
+        items = []
+        for url in input_data.get("directUrls", []):
+            shortcode = _shortcode(url)
+            rng = random.Random(f"comments:{shortcode}")
+            posted = now - timedelta(days=3)
+            n = COMMENTS_PER_POST if not limit else min(limit, COMMENTS_PER_POST)
+            for k in range(n):
+                mentions = [f"friend{rng.randint(0, 999):03d}" for _ in range(rng.choice([0, 0, 1, 2, 3]))]
+                items.append({
+                    "id": f"{shortcode}-{k}",
+                    "postUrl": url,
+                    "text": " ".join("@" + m for m in mentions) + " 참여합니다!",
+                    "ownerUsername": f"runner{rng.randint(0, PARTICIPANT_POOL - 1):04d}",
+                    "timestamp": _iso(posted - timedelta(minutes=k * 7)),
+                    "mentions": mentions,
+                })
+        return items
+
+    return []
+
+
+# -----------------------------------------------------------------------------
+# Fake API state
+# -----------------------------------------------------------------------------
+class FakeApify:
+    """
+    In-memory actor runs and datasets with fault injection.
+
+    Options:
+    - latency: seconds added to every request (+-50% jitter)
+    - rate_429: probability of answering 429 (Retry-After: retry_after)
+    - error_rate: probability of answering HTTP 500
+    - fail_rate: probability that a run ends FAILED (half its items written)
+    - run_secs / item_secs: run duration = run_secs + item_secs * items
+    - max_concurrent: runs beyond this stay READY until a slot frees
+    """
+
+    def __init__(self, latency: float = 0.0, rate_429: float = 0.0, error_rate: float = 0.0,
+                 fail_rate: float = 0.0, run_secs: float = 1.0, item_secs: float = 0.0,
+                 max_concurrent: int = 0, retry_after: float = 1.0, seed: int = 0,
+                 record: bool = False):
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.error_rate = error_rate
+        self.fail_rate = fail_rate
+        self.run_secs = run_secs
+        self.item_secs = item_secs
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self.record = record
+
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.runs: Dict[str, dict] = {}
+        self.datasets: Dict[str, str] = {}    # dataset id -> run id
+        self.slot_ends: List[float] = []      # busy-until per concurrency slot
+        self.recorded: Dict[str, dict] = {}   # upstream dataset id -> {actor_id, input, items}
+        self.stats: Dict[str, int] = {}
+
+    def count(self, name: str):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    # -------------------------------------------------------------------------
+    # Fault injection
+    # -------------------------------------------------------------------------
+    def injected_fault(self) -> Optional[int]:
+        """HTTP status to answer instead of the real response (None = no fault)."""
+        if self.latency:
+            time.sleep(self.latency * self.rng.uniform(0.5, 1.5))
+        roll = self.rng.random()
+        if roll < self.rate_429:
+            self.count("injected_429")
+            return 429
+        if roll < self.rate_429 + self.error_rate:
+            self.count("injected_500")
+            return 500
+        return None
+
+    # -------------------------------------------------------------------------
+    # Runs
+    # -------------------------------------------------------------------------
+    def start_run(self, actor_id: str, input_data: dict) -> dict:
+        items = load_fixture(actor_id, input_data)
+        source = "fixture"
+        if items is None:
+            items, source = synthetic_items(actor_id, input_data), "synthetic"
+
+        now = time.monotonic()
+        duration = self.run_secs + self.item_secs * len(items)
+        with self.lock:
+            start = now
+            if self.max_concurrent:
+                if len(self.slot_ends) < self.max_concurrent:
+                    self.slot_ends.append(start + duration)
+                else:
+                    slot = min(range(len(self.slot_ends)), key=self.slot_ends.__getitem__)
+                    start = max(now, self.slot_ends[slot])
+                    self.slot_ends[slot] = start + duration
+
+            n = len(self.runs) + 1
+            run_id = f"fakerun{n:06d}"
+            dataset_id = f"fakeds{n:06d}"
+            run = {
+                "id": run_id,
+                "actId": actor_id,
+                "defaultDatasetId": dataset_id,
+                "createdAt": _iso(datetime.now(timezone.utc)),
+                "_created": now,
+                "_created_wall": datetime.now(timezone.utc),
+                "_start": start,
+                "_end": start + duration,
+                "_fail": self.rng.random() < self.fail_rate,
+                "_aborted_at": None,
+                "_items": items,
+                "_source": source,
+            }
+            self.runs[run_id] = run
+            self.datasets[dataset_id] = run_id
+        self.count(f"runs_{source}")
+        return run
+
+    def _progress(self, run: dict, at: float) -> float:
+        """Fraction of the run's items written at monotonic time `at`."""
+        span = run["_end"] - run["_start"]
+        if at <= run["_start"]:
+            return 0.0
+        if span <= 0 or at >= run["_end"]:
+            return 1.0
+        return (at - run["_start"]) / span
+
+    def status(self, run: dict) -> str:
+        now = time.monotonic()
+        if run["_aborted_at"] is not None:
+            return "ABORTED"
+        if now < run["_start"]:
+            return "READY"
+        if now < run["_end"]:
+            return "RUNNING"
+        return "FAILED" if run["_fail"] else "SUCCEEDED"
+
+    def visible_items(self, run: dict) -> List[Dict]:
+        at = run["_aborted_at"] if run["_aborted_at"] is not None else time.monotonic()
+        fraction = self._progress(run, at)
+        if run["_fail"]:
+            fraction = min(fraction, 0.5)
+        return run["_items"][:int(len(run["_items"]) * fraction)]
+
+    def public_run(self, run: dict) -> dict:
+        status = self.status(run)
+        data = {k: v for k, v in run.items() if not k.startswith("_")}
+        data["status"] = status
+        def wall(t: float) -> str:
+            return _iso(run["_created_wall"] + timedelta(seconds=t - run["_created"]))
+
+        if status != "READY":
+            data["startedAt"] = wall(min(run["_start"], run["_aborted_at"] or run["_start"]))
+        if status in ("SUCCEEDED", "FAILED"):
+            data["finishedAt"] = wall(run["_end"])
+        elif status == "ABORTED":
+            data["finishedAt"] = wall(run["_aborted_at"])
+
+        # Usage so far, as reported on real run objects
+        ran_until = min(time.monotonic(), run["_end"], run["_aborted_at"] or run["_end"])
+        compute_units = max(ran_until - run["_start"], 0) / 3600
+        data["stats"] = {"computeUnits": round(compute_units, 6)}
+        data["usageTotalUsd"] = round(compute_units * USD_PER_COMPUTE_UNIT, 6)
+        return data
+
+    def wait(self, run: dict, wait_secs: float):
+        """Block up to wait_secs for the run to finish (waitForFinish)."""
+        deadline = time.monotonic() + min(wait_secs, 300)
+        while self.status(run) in ("READY", "RUNNING") and time.monotonic() < deadline:
+            time.sleep(min(0.05, max(deadline - time.monotonic(), 0)))
+
+    def abort(self, run: dict):
+        if self.status(run) in ("READY", "RUNNING"):
+            run["_aborted_at"] = time.monotonic()
+
+
+# -----------------------------------------------------------------------------
+# HTTP layer
+# -----------------------------------------------------------------------------
+class FakeApifyHandler(BaseHTTPRequestHandler):
+    server_version = "FakeApify/1.0"
+
+    @property
+    def fake(self) -> FakeApify:
+        return self.server.fake
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload, headers: Optional[dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, error_type: str, message: str = ""):
+        headers = {"Retry-After": str(self.fake.retry_after)} if status == 429 else None
+        self._send_json(status, {"error": {"type": error_type, "message": message}}, headers)
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else {}
+
+    def _route(self, method: str):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+        if parts and parts[0] == "v2":
+            parts = parts[1:]
+        body = self._read_body() if method == "POST" else None  # Always drain before replying
+
+        if parts == ["fake", "stats"]:
+            return self._send_json(200, self.fake.stats)
+
+        self.fake.count(f"{method} {parts[0] if parts else '/'}")
+        if self.fake.record:
+            return self._proxy(method, url, parts, body)
+
+        fault = self.fake.injected_fault()
+        if fault == 429:
+            return self._error(429, "rate-limit-exceeded", "Injected rate limit")
+        if fault == 500:
+            return self._error(500, "internal-server-error", "Injected failure")
+
+        if method == "POST" and len(parts) == 3 and parts[0] == "acts" and parts[2] == "runs":
+            run = self.fake.start_run(parts[1], body)
+            if query.get("waitForFinish"):
+                self.fake.wait(run, float(query["waitForFinish"]))
+            return self._send_json(201, {"data": self.fake.public_run(run)})
+
+        if len(parts) >= 2 and parts[0] == "actor-runs":
+            run = self.fake.runs.get(parts[1])
+            if run is None:
+                return self._error(404, "record-not-found", f"Run {parts[1]} not found")
+            if method == "POST" and parts[2:] == ["abort"]:
+                self.fake.abort(run)
+                return self._send_json(200, {"data": self.fake.public_run(run)})
+            if method == "GET" and len(parts) == 2:
+                if query.get("waitForFinish"):
+                    self.fake.wait(run, float(query["waitForFinish"]))
+                return self._send_json(200, {"data": self.fake.public_run(run)})
+
+        if method == "GET" and len(parts) == 3 and parts[0] == "datasets" and parts[2] == "items":
+            run_id = self.fake.datasets.get(parts[1])
+            if run_id is None:
+                return self._error(404, "record-not-found", f"Dataset {parts[1]} not found")
+            items = self.fake.visible_items(self.fake.runs[run_id])
+            offset = int(query.get("offset") or 0)
+            limit = int(query["limit"]) if query.get("limit") else None
+            page = items[offset:offset + limit] if limit is not None else items[offset:]
+            return self._send_json(200, page, {"X-Apify-Pagination-Total": str(len(items))})
+
+        if method == "GET" and parts == ["users", "me"]:
+            return self._send_json(200, {"data": {"id": "fake", "username": "fake-apify"}})
+
+        return self._error(404, "page-not-found", self.path)
+
+    # -------------------------------------------------------------------------
+    # Recorder (proxy to the real API, capture datasets as fixtures)
+    # -------------------------------------------------------------------------
+    def _proxy(self, method: str, url, parts: list, body: Optional[dict]):
+        upstream = UPSTREAM_URL + "/" + "/".join(parts)
+        resp = requests.request(
+            method, upstream,
+            params={k: v[-1] for k, v in parse_qs(url.query).items()},
+            json=body,
+            headers={"Authorization": self.headers.get("Authorization")
+                     or f"Bearer {os.getenv('APIFY_TOKEN', '')}"}
+        )
+        payload = resp.json() if resp.content else {}
+
+        if method == "POST" and len(parts) == 3 and parts[0] == "acts" and resp.status_code == 201:
+            dataset_id = payload["data"].get("defaultDatasetId")
+            self.fake.recorded[dataset_id] = {"actor_id": parts[1], "input": body or {}, "items": []}
+        elif (method == "GET" and len(parts) == 3 and parts[0] == "datasets"
+              and resp.status_code == 200 and parts[1] in self.fake.recorded):
+            entry = self.fake.recorded[parts[1]]
+            offset = int(parse_qs(url.query).get("offset", ["0"])[-1])
+            entry["items"][offset:offset + len(payload)] = payload
+            save_fixture(entry["actor_id"], entry["input"], entry["items"])
+            print(f"[FakeApify] Recorded {len(entry['items'])} items "
+                  f"-> {fixture_path(entry['actor_id'], entry['input']).name}")
+
+        headers = {}
+        if "Retry-After" in resp.headers:
+            headers["Retry-After"] = resp.headers["Retry-After"]
+        self._send_json(resp.status_code, payload, headers)
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+
+def start_fake_server(port: int = 0, verbose: bool = False, **options) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the fake API in a background thread.
+
+    Returns (server, base_url); point collectors at it with
+    apify_collect.BASE_URL = base_url (or APIFY_BASE_URL), stop with
+    server.shutdown().
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeApifyHandler)
+    server.daemon_threads = True
+    server.fake = FakeApify(**options)
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Apify API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of a 429 response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an HTTP 500")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="probability a run ends FAILED")
+    parser.add_argument("--run-secs", type=float, default=1.0, help="base run duration")
+    parser.add_argument("--item-secs", type=float, default=0.0, help="extra run duration per item")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="concurrent run limit (0 = none)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with 429s")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", action="store_true",
+                        help=f"proxy to {UPSTREAM_URL} and save datasets to {FIXTURES_DIR}")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    if args.record and not os.getenv("APIFY_TOKEN"):
+        print("[FakeApify] --record needs APIFY_TOKEN (or an Authorization header from the client)")
+
+    server, base_url = start_fake_server(
+        port=args.port, verbose=args.verbose,
+        latency=args.latency, rate_429=args.rate_429, error_rate=args.error_rate,
+        fail_rate=args.fail_rate, run_secs=args.run_secs, item_secs=args.item_secs,
+        max_concurrent=args.max_concurrent, retry_after=args.retry_after,
+        seed=args.seed, record=args.record
+    )
+    mode = "recording" if args.record else "serving"
+    print(f"[FakeApify] {mode} on {base_url}")
+    print(f"  export APIFY_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"[FakeApify] Stats: {json.dumps(server.fake.stats, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,149 @@ features.py - Feature engineering for relationship-based runner selection
 """
 import pandas as pd
 import numpy as np
-from typing import Tuple
+import re
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from .cleaning import posts_as_of, as_of_timestamp, date_ns, days_since, NS_PER_DAY
+from .segments import UserSegments, NAT_NS
 
 # Running keywords for RunnerFit score
 RUNNING_KEYWORDS = [
     "러닝", "런닝", "러너", "러닝크루", "마라톤", "하프", 
     "10k", "5k", "런린이", "트레일러닝"
 ]
+RUNNING_PATTERN = "|".join(re.escape(keyword.lower()) for keyword in RUNNING_KEYWORDS)
+
+# Feature windows: name -> ("posts", N most recent) | ("posts", None = all) | ("days", last N days)
+WINDOWS: Dict[str, Tuple[str, Optional[int]]] = {
+    "5": ("posts", 5),
+    "12": ("posts", 12),
+    "all": ("posts", None),
+    "30d": ("days", 30),
+    "90d": ("days", 90),
+}
+# Time-decayed features: a post's weight halves every DECAY_HALF_LIFE_DAYS before as_of
+DECAY_HALF_LIFE_DAYS = 30.0
+DECAY_COLUMNS = ["decayed_posts", "decayed_avg_comments", "decayed_avg_likes", "decayed_running_rate"]
+WINDOW_METRICS = [
+    "n_posts", "avg_comments", "avg_likes", "comment_like_ratio",
+    "low_comment_post_rate", "community_signal", "running_rate", "span_days",
+]
+
+
+def running_post_mask(posts_df: pd.DataFrame) -> np.ndarray:
+    """Posts whose caption or hashtags contain a running keyword."""
+    if posts_df.empty:
+        return np.zeros(0, dtype=bool)
+    captions = posts_df["caption"].astype("str") if "caption" in posts_df.columns else ""
+    hashtags = (pd.Series([" ".join(map(str, x)) if isinstance(x, list) and x else "" for x in posts_df["hashtags"]],
+                          index=posts_df.index, dtype="str")
+                if "hashtags" in posts_df.columns else "")
+    text = (captions + " " + hashtags).str.lower()
+    return text.str.contains(RUNNING_PATTERN, regex=True).to_numpy(dtype=bool)
+
+
+def compute_window_features(
+    posts_df: pd.DataFrame,
+    usernames: Iterable[str],
+    as_of: Optional[datetime] = None,
+    windows: Dict[str, Tuple[str, Optional[int]]] = WINDOWS
+) -> pd.DataFrame:
+    """
+    Per-user post metrics for every window in one pass, indexed by username.
+
+    Posts are sorted once by (user, date desc); every window is a mask over
+    that order (rank within the user < N, or date within N days of as_of),
+    and all metrics of a window come from one segment sum over the user
+    runs (segments.UserSegments). Columns are f"{metric}_{window}" for
+    WINDOW_METRICS, plus last_post_days; users without posts get the
+    empty-window defaults.
+    Metric definitions are those listed in compute_features.
+    """
+    usernames = pd.Index(pd.unique(pd.Series(list(usernames), dtype=object)), name="username")
+    columns = [f"{metric}_{name}" for name in windows for metric in WINDOW_METRICS] + ["last_post_days"]
+    posts_df = posts_as_of(posts_df, as_of)
+    if not posts_df.empty:
+        posts_df = posts_df[usernames.get_indexer(posts_df["username"]) >= 0]
+
+    result = pd.DataFrame(index=usernames, columns=columns, dtype=float)
+    for name in windows:
+        result[f"n_posts_{name}"] = 0
+        result[f"low_comment_post_rate_{name}"] = 1.0
+    result = result.fillna(0.0)
+    result["last_post_days"] = days_since(pd.Series(pd.NaT, index=usernames), as_of)
+    counts = {c: int for c in columns if c.startswith(("n_posts_", "span_days_"))} | {"last_post_days": int}
+    if posts_df.empty:
+        return result.astype(counts)
+
+    # One sort: by user, newest first (undated last, ties in input order)
+    segments = UserSegments(posts_df["username"], date_ns(posts_df["post_date"]))
+    ns = segments.ns
+    comments = segments.take(posts_df["comment_count"].to_numpy(dtype=np.int64))
+    likes = segments.take(posts_df["like_count"].to_numpy(dtype=np.int64))
+    running = segments.take(running_post_mask(posts_df))
+    dated = ns != NAT_NS
+    rank = segments.rank()
+
+    valid_comments = comments >= 0
+    valid_likes = likes >= 0
+    quantities = np.stack([
+        np.ones_like(comments),
+        comments,
+        valid_comments,
+        valid_comments & (comments <= 3),
+        valid_likes,
+        np.where(valid_likes, likes, 0),
+        running,
+    ]).astype(np.int64)
+
+    ref = as_of_timestamp(as_of).as_unit("ns").value
+    out = {}
+    for name, (kind, size) in windows.items():
+        if kind == "days":
+            mask = dated & (ns >= ref - size * NS_PER_DAY)
+        else:
+            mask = rank < size if size is not None else np.ones(len(ns), dtype=bool)
+        n, comment_sum, n_valid, n_low, n_likes, like_sum, n_running = segments.sum(quantities * mask)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_comments = np.where(n > 0, comment_sum / np.maximum(n, 1), 0.0)
+            avg_likes = np.where(n_likes > 0, like_sum / np.maximum(n_likes, 1), 0.0)
+            ratio = np.where(avg_likes > 0, avg_comments / np.maximum(avg_likes, 1), 0.0)
+            low_rate = np.where(n_valid > 0, n_low / np.maximum(n_valid, 1), 1.0)
+        community = np.where(n > 0, np.log1p(avg_comments) + 0.5 * ratio - low_rate, 0.0)
+
+        newest = segments.newest(mask)
+        span = np.where(newest != NAT_NS, (newest - segments.oldest(mask)) // NS_PER_DAY, 0)
+
+        out.update({
+            f"n_posts_{name}": n,
+            f"avg_comments_{name}": avg_comments,
+            f"avg_likes_{name}": avg_likes,
+            f"comment_like_ratio_{name}": ratio,
+            f"low_comment_post_rate_{name}": low_rate,
+            f"community_signal_{name}": community,
+            f"running_rate_{name}": np.where(n > 0, n_running / np.maximum(n, 1), 0.0),
+            f"span_days_{name}": span,
+        })
+
+    out["last_post_days"] = days_since(pd.Series(segments.newest().view("M8[ns]")), as_of)
+    result.loc[segments.keys, columns] = pd.DataFrame(out, index=segments.keys)[columns]
+    return result.astype(counts)
 
 
 def compute_features(
     participants_df: pd.DataFrame,
     posts_df: pd.DataFrame,
-    n_recent: int = 12
+    n_recent: int = 12,
+    as_of: Optional[datetime] = None,
+    window_df: Optional[pd.DataFrame] = None
 ) -> pd.DataFrame:
     """
-    Compute relationship-focused features for each participant.
+    Compute relationship-focused features for each participant
+    (from posts up to as_of), read from the n_recent-post window of
+    compute_window_features (window_df, computed here if not given).
     
     Features:
     - avg_comments_12: Average comments on last N posts
@@ -28,72 +155,72 @@ def compute_features(
     - community_signal: log1p(avg_comments) + 0.5*comment_like_ratio - low_comment_post_rate
     - running_hashtag_rate: Ratio of posts with running keywords
     """
-    features = []
+    usernames = participants_df["username"] if "username" in participants_df.columns else []
+    window = str(n_recent)
+    if window_df is None or f"n_posts_{window}" not in window_df.columns:
+        window_df = compute_window_features(posts_df, usernames, as_of, {window: ("posts", n_recent)})
     
-    for _, participant in participants_df.iterrows():
-        username = participant["username"]
-        user_posts = posts_df[posts_df["username"] == username].copy()
-        
-        # Sort by date and take N most recent
-        if not user_posts.empty and "post_date" in user_posts.columns:
-            user_posts = user_posts.sort_values("post_date", ascending=False).head(n_recent)
-        
-        n_posts = len(user_posts)
-        
-        if n_posts == 0:
-            # No posts available
-            features.append({
-                "username": username,
-                "avg_comments_12": 0,
-                "avg_likes_12": 0,
-                "comment_like_ratio": 0,
-                "low_comment_post_rate": 1.0,
-                "community_signal": 0,
-                "running_hashtag_rate": 0
-            })
-            continue
-        
-        # Engagement metrics - filter out invalid like_count (-1 means data not available)
-        valid_likes = user_posts[user_posts["like_count"] >= 0]["like_count"]
-        avg_comments = user_posts["comment_count"].mean()
-        avg_likes = valid_likes.mean() if len(valid_likes) > 0 else 0
-        comment_like_ratio = avg_comments / max(avg_likes, 1) if avg_likes > 0 else 0
-        
-        # Low comment post rate (posts with <=3 comments, excluding invalid data)
-        valid_comment_posts = user_posts[user_posts["comment_count"] >= 0]
-        if len(valid_comment_posts) > 0:
-            low_comment_posts = (valid_comment_posts["comment_count"] <= 3).sum()
-            low_comment_post_rate = low_comment_posts / len(valid_comment_posts)
-        else:
-            low_comment_post_rate = 1.0
-        
-        # Community signal (higher is better community engagement)
-        community_signal = np.log1p(avg_comments) + 0.5 * comment_like_ratio - low_comment_post_rate
-        
-        # Running hashtag rate
-        running_posts = 0
-        for _, post in user_posts.iterrows():
-            caption = str(post.get("caption", "")).lower()
-            hashtags = post.get("hashtags", [])
-            hashtag_text = " ".join([str(h).lower() for h in hashtags]) if isinstance(hashtags, list) else ""
-            combined_text = caption + " " + hashtag_text
-            
-            if any(keyword.lower() in combined_text for keyword in RUNNING_KEYWORDS):
-                running_posts += 1
-        
-        running_hashtag_rate = running_posts / n_posts
-        
-        features.append({
-            "username": username,
-            "avg_comments_12": round(avg_comments, 2),
-            "avg_likes_12": round(avg_likes, 2),
-            "comment_like_ratio": round(comment_like_ratio, 4),
-            "low_comment_post_rate": round(low_comment_post_rate, 4),
-            "community_signal": round(community_signal, 4),
-            "running_hashtag_rate": round(running_hashtag_rate, 4)
-        })
+    w = window_df.reindex(pd.Index(usernames, dtype=object))
+    return pd.DataFrame({
+        "username": list(usernames),
+        "avg_comments_12": w[f"avg_comments_{window}"].round(2).to_numpy(),
+        "avg_likes_12": w[f"avg_likes_{window}"].round(2).to_numpy(),
+        "comment_like_ratio": w[f"comment_like_ratio_{window}"].round(4).to_numpy(),
+        "low_comment_post_rate": w[f"low_comment_post_rate_{window}"].round(4).to_numpy(),
+        "community_signal": w[f"community_signal_{window}"].round(4).to_numpy(),
+        "running_hashtag_rate": w[f"running_rate_{window}"].round(4).to_numpy(),
+    })
+
+
+def compute_decay_features(
+    posts_df: pd.DataFrame,
+    usernames: Iterable[str],
+    as_of: Optional[datetime] = None,
+    half_life_days: float = DECAY_HALF_LIFE_DAYS
+) -> pd.DataFrame:
+    """
+    Exponentially time-decayed engagement per user (from posts up to as_of).
+
+    Each dated post weighs 0.5 ** (age_days / half_life_days), so recency is
+    continuous instead of a fixed window; undated posts weigh 0. All sums
+    are segment sums over one user sort (segments.UserSegments).
+    
+    Features:
+    - decayed_posts: sum of weights (recency-weighted post count)
+    - decayed_avg_comments / decayed_avg_likes: weighted means over valid (>= 0) counts
+    - decayed_running_rate: weighted share of running-keyword posts
+    """
+    usernames = pd.Index(pd.unique(pd.Series(list(usernames), dtype=object)), name="username")
+    result = pd.DataFrame(0.0, index=usernames, columns=DECAY_COLUMNS)
+    posts_df = posts_as_of(posts_df, as_of)
+    if not posts_df.empty:
+        posts_df = posts_df[usernames.get_indexer(posts_df["username"]) >= 0]
+    if posts_df.empty:
+        return result.reset_index()
+    
+    segments = UserSegments(posts_df["username"], date_ns(posts_df["post_date"]))
+    comments = segments.take(posts_df["comment_count"].to_numpy(dtype=np.int64))
+    likes = segments.take(posts_df["like_count"].to_numpy(dtype=np.int64))
+    running = segments.take(running_post_mask(posts_df))
+    
+    ref = as_of_timestamp(as_of).as_unit("ns").value
+    dated = segments.ns != NAT_NS
+    age_days = np.maximum(ref - np.where(dated, segments.ns, ref), 0) / NS_PER_DAY
+    weight = np.where(dated, 0.5 ** (age_days / half_life_days), 0.0)
+    w_comments = np.where(comments >= 0, weight, 0.0)
+    w_likes = np.where(likes >= 0, weight, 0.0)
     
-    return pd.DataFrame(features)
+    total, comment_weight, comment_sum, like_weight, like_sum, running_sum = segments.sum(np.stack([
+        weight, w_comments, w_comments * comments, w_likes, w_likes * likes, weight * running,
+    ]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result.loc[segments.keys, DECAY_COLUMNS] = np.column_stack([
+            total.round(4),
+            np.where(comment_weight > 0, comment_sum / comment_weight, 0.0).round(2),
+            np.where(like_weight > 0, like_sum / like_weight, 0.0).round(2),
+            np.where(total > 0, running_sum / total, 0.0).round(4),
+        ])
+    return result.reset_index()
 
 
 if __name__ == "__main__":
@@ -4,8 +4,12 @@ io_load.py - Data loading utilities and sample data generation
 import json
 import random
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from itertools import chain
+from typing import Iterable, Iterator
+
+from . import json_codec
 
 # -----------------------------------------------------------------------------
 # Paths
@@ -14,6 +18,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 RAW_DIR = BASE_DIR / "data" / "raw"
 PROCESSED_DIR = BASE_DIR / "data" / "processed"
 
+# On-disk form for save_json: "json" (indented), "compact" or "jsonl"
+RAW_FORMAT = os.getenv("RAW_FORMAT", "json")
+
 
 def ensure_dirs():
     """Ensure data directories exist."""
@@ -61,28 +68,167 @@ def normalize_record(record: dict, keys: list) -> dict:
     return {key: map_key(record, key) for key in keys}
 
 
+def record_column(records: list, key: str) -> list:
+    """map_key over records: one dict lookup per record for the standard name, aliases only where missing."""
+    missing = object()
+    values = [r.get(key, missing) for r in records]
+    for i, value in enumerate(values):
+        if value is missing:
+            values[i] = map_key(records[i], key)
+    return values
+
+
 # -----------------------------------------------------------------------------
 # JSON Loading
 # -----------------------------------------------------------------------------
-def load_json(filename: str):
-    """Load JSON file from raw directory."""
-    filepath = RAW_DIR / filename
+def read_records(filepath: Path) -> list:
+    """Records of a raw file in any json_codec form ([] if missing)."""
     if not filepath.exists():
         return []
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = json_codec.loads(filepath.read_bytes())
     return data if isinstance(data, list) else [data]
 
 
-def save_json(data: list, filename: str):
-    """Save data to JSON file in raw directory."""
+def iter_record_batches(filepath: Path, batch_size: int = 100_000) -> Iterator[list]:
+    """
+    Records of a raw file in lists of up to batch_size. JSON Lines files
+    are streamed line by line; a JSON array has to be parsed whole first.
+    """
+    if not filepath.exists():
+        return
+    with open(filepath, "rb") as f:
+        if json_codec.detect_format(f.read(4096)) == "json":
+            records = read_records(filepath)
+            for start in range(0, len(records), batch_size):
+                yield records[start:start + batch_size]
+            return
+        f.seek(0)
+        lines = []
+        for line in f:
+            lines.append(line)
+            if len(lines) == batch_size:
+                yield json_codec.loads(b"".join(lines))
+                lines = []
+        if lines:
+            yield json_codec.loads(b"".join(lines))
+
+
+def load_json(filename: str):
+    """Load JSON file from raw directory."""
+    return read_records(RAW_DIR / filename)
+
+
+def load_typed(filename: str, kind: str) -> list:
+    """Load a canonical raw file as msgspec structs (see json_codec.decode_typed)."""
+    return json_codec.decode_typed((RAW_DIR / filename).read_bytes(), kind)
+
+
+def save_json(data: list, filename: str, fmt: str = None):
+    """Save data to JSON file in raw directory (and update the manifest)."""
     ensure_dirs()
     filepath = RAW_DIR / filename
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    fmt = fmt or RAW_FORMAT
+    tmp_path = filepath.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(json_codec.dumps(data, fmt))
+    os.replace(tmp_path, filepath)
+    update_manifest(filename, data, fmt)
     print(f"[io_load] Saved {len(data)} records to {filepath}")
 
 
+# -----------------------------------------------------------------------------
+# Manifest Sidecar (counts without parsing the raw files)
+# -----------------------------------------------------------------------------
+MANIFEST_PATH = RAW_DIR / "manifest.json"
+
+
+def _utc_iso(value) -> str:
+    """Post date as UTC ISO string ('' if unparseable)."""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return ""
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def summarize_records(data: Iterable) -> dict:
+    """Record count, unique usernames and post date range of raw records (one pass)."""
+    usernames = set()
+    n_records = 0
+    min_date = max_date = None
+    for record in data:
+        n_records += 1
+        fields = normalize_record(record, ["username", "post_date"]) if isinstance(record, dict) else {}
+        if fields.get("username"):
+            usernames.add(str(fields["username"]).lower())
+        if fields.get("post_date"):
+            date = _utc_iso(fields["post_date"])
+            if date:
+                min_date = date if min_date is None else min(min_date, date)
+                max_date = date if max_date is None else max(max_date, date)
+    return {
+        "records": n_records,
+        "unique_users": len(usernames),
+        "min_post_date": min_date,
+        "max_post_date": max_date,
+    }
+
+
+def load_manifest() -> dict:
+    """filename -> summary entry ({} if no manifest yet)."""
+    if not MANIFEST_PATH.exists():
+        return {}
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+
+
+def _sniff_format(filepath: Path) -> str:
+    with open(filepath, "rb") as f:
+        return json_codec.detect_format(f.read(64))
+
+
+def update_manifest(filename: str, data: Iterable, fmt: str = None):
+    """Record the summary of a raw file that was just written."""
+    filepath = RAW_DIR / filename
+    stat = filepath.stat()
+    manifest = load_manifest()
+    manifest[filename] = {
+        **summarize_records(data),
+        "format": fmt or _sniff_format(filepath),
+        "bytes": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "updated_at": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+    }
+    tmp_path = MANIFEST_PATH.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def manifest_entry(filename: str):
+    """
+    Summary of a raw file (None if it does not exist). Answered from the
+    manifest; the file is only parsed when it changed without the manifest
+    being updated (size/mtime mismatch).
+    """
+    filepath = RAW_DIR / filename
+    if not filepath.exists():
+        return None
+    entry = load_manifest().get(filename)
+    stat = filepath.stat()
+    if entry and entry.get("bytes") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return entry
+    print(f"[io_load] Manifest stale for {filename}, rescanning")
+    # Batches: a JSON Lines file is summarized without loading it whole
+    update_manifest(filename, chain.from_iterable(iter_record_batches(filepath)))
+    return load_manifest()[filename]
+
+
 # -----------------------------------------------------------------------------
 # Sample Data Generation (when Apify data not available)
 # -----------------------------------------------------------------------------
@@ -189,6 +335,36 @@ def generate_sample_data(n_users: int = 50) -> tuple:
     return comments, profiles, posts
 
 
+def data_as_of(filename: str = "posts.json") -> datetime:
+    """
+    Snapshot time of the raw data: its newest post date (manifest
+    max_post_date, UTC). Default as_of for cleaning, so re-runs on the same
+    content match however the file was written, copied or checked out.
+    Now if there are no dated posts.
+    """
+    entry = manifest_entry(filename)
+    if not entry or not entry.get("max_post_date"):
+        return datetime.now(timezone.utc)
+    return datetime.fromisoformat(entry["max_post_date"])
+
+
+RUN_INFO_PATH = PROCESSED_DIR / "run_info.json"
+
+
+def save_run_info(info: dict):
+    """Record how the current processed outputs were produced (as_of, inputs)."""
+    ensure_dirs()
+    with open(RUN_INFO_PATH, "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+
+
+def load_run_info() -> dict:
+    if not RUN_INFO_PATH.exists():
+        return {}
+    with open(RUN_INFO_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 def load_or_generate_data():
     """Load existing data or generate sample data if not available."""
     ensure_dirs()
@@ -0,0 +1,141 @@
+"""
+json_codec.py - Raw JSON encoding/decoding with optional fast backends
+
+Backends (RAW_JSON_BACKEND=auto|orjson|msgspec|json, auto = fastest installed):
+- orjson / msgspec: several times faster than the stdlib json module
+- msgspec also decodes straight into typed structs (Comment/Profile/Post)
+
+On-disk forms (io_load.RAW_FORMAT / save_json(fmt=...)):
+- "json":    indented array (default; same bytes as json.dump(indent=2))
+- "compact": array without whitespace
+- "jsonl":   one record per line (append/stream friendly)
+
+loads() detects the form, so readers do not need to know how a file was written.
+"""
+import json
+import os
+from typing import List, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # Optional dependency
+    msgspec = None
+
+FORMATS = ["json", "compact", "jsonl"]
+
+
+def _pick_backend(name: str) -> str:
+    if name == "auto":
+        return "orjson" if orjson is not None else ("msgspec" if msgspec is not None else "json")
+    if (name == "orjson" and orjson is None) or (name == "msgspec" and msgspec is None):
+        print(f"[Codec] {name} not installed, using json")
+        return "json"
+    return name
+
+
+BACKEND = _pick_backend(os.getenv("RAW_JSON_BACKEND", "auto"))
+
+
+# -----------------------------------------------------------------------------
+# Untyped (list of dicts)
+# -----------------------------------------------------------------------------
+def _dumps_one(obj, backend: str) -> bytes:
+    if backend == "orjson":
+        return orjson.dumps(obj)
+    if backend == "msgspec":
+        return msgspec.json.encode(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(data: list, fmt: str = "json", backend: Optional[str] = None) -> bytes:
+    """Serialize records in one of FORMATS."""
+    backend = backend or BACKEND
+    if fmt == "jsonl":
+        return b"".join(_dumps_one(record, backend) + b"\n" for record in data)
+    if fmt == "compact":
+        return _dumps_one(data, backend)
+    if fmt != "json":
+        raise ValueError(f"Unknown raw format '{fmt}' (expected one of {FORMATS})")
+    if backend == "orjson":
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    # msgspec has no indent option; the indented form stays on stdlib json
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def detect_format(payload: bytes) -> str:
+    """'json' for an array (indented or compact), 'jsonl' otherwise."""
+    head = payload.lstrip()[:1]
+    return "json" if head in (b"[", b"") else "jsonl"
+
+
+def loads(payload: bytes, backend: Optional[str] = None) -> list:
+    """Records from an array or JSON Lines payload."""
+    backend = backend or BACKEND
+    if detect_format(payload) == "jsonl":
+        if backend == "msgspec":
+            return msgspec.json.Decoder().decode_lines(payload)
+        decode = orjson.loads if backend == "orjson" else json.loads
+        return [decode(line) for line in payload.splitlines() if line.strip()]
+    if not payload.strip():
+        return []
+    if backend == "orjson":
+        return orjson.loads(payload)
+    if backend == "msgspec":
+        return msgspec.json.decode(payload)
+    return json.loads(payload)
+
+
+# -----------------------------------------------------------------------------
+# Typed structs (msgspec only)
+# -----------------------------------------------------------------------------
+if msgspec is not None:
+    class Comment(msgspec.Struct, omit_defaults=True):
+        """comments.json record."""
+        username: str
+        comment_text: str = ""
+        tagged_users_count: int = 0
+        post_shortcode: str = ""
+
+    class Profile(msgspec.Struct, omit_defaults=True):
+        """profiles.json record."""
+        username: str
+        followers: Optional[int] = None
+        following: Optional[int] = None
+        is_private: Optional[bool] = None
+        post_count: Optional[int] = None
+        bio: Optional[str] = None
+
+    class Post(msgspec.Struct, omit_defaults=True):
+        """posts.json record (counts of -1/None = not collected)."""
+        username: str
+        post_date: str = ""
+        caption: Optional[str] = None
+        like_count: Optional[int] = None
+        comment_count: Optional[int] = None
+        media_type: Optional[str] = None
+        hashtags: List[str] = []
+        post_url: Optional[str] = None
+        shortcode: Optional[str] = None
+
+    SCHEMAS = {"comments": Comment, "profiles": Profile, "posts": Post}
+else:
+    SCHEMAS = {}
+
+
+def decode_typed(payload: bytes, kind: str) -> list:
+    """
+    Decode a canonical raw file (comments/profiles/posts) into structs.
+    Raises msgspec.ValidationError on schema mismatches (e.g. alias keys from
+    older dumps); use loads() for those.
+    """
+    if msgspec is None:
+        raise RuntimeError("Typed decoding requires msgspec (pip install msgspec)")
+    schema = SCHEMAS[kind]
+    if detect_format(payload) == "jsonl":
+        return msgspec.json.Decoder(schema).decode_lines(payload)
+    return msgspec.json.Decoder(List[schema]).decode(payload)
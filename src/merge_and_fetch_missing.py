@@ -1,33 +1,26 @@
 """
 merge_and_fetch_missing.py - Consolidate data and fetch missing profiles/posts
 """
-import json
-import time
-import requests
+import sys
+import argparse
 from pathlib import Path
 
-APIFY_TOKEN = os.getenv("APIFY_TOKEN", "")
-BASE_URL = "https://api.apify.com/v2"
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-DATA_DIR = Path(__file__).resolve().parent.parent / "data" / "raw"
+from src.apify_collect import (
+    run_actor_batch, collect_posts_adaptive, normalize_profile, normalize_post
+)
+from src.collect_journal import CollectionJournal, batch_key
+from src.io_load import load_json, save_json
+from src.post_merge import PostIndex, print_merge_stats
 
-def load_json(filename):
-    path = DATA_DIR / filename
-    if path.exists():
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-def save_json(data, filename):
-    with open(DATA_DIR / filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-def collect_profiles(usernames):
+def collect_profiles(usernames, journal=None):
     """Collect user profiles."""
-    headers = {"Authorization": f"Bearer {APIFY_TOKEN}"}
     actor_id = "apify~instagram-profile-scraper"
     
     all_profiles = []
+    usernames = sorted(usernames)  # stable batches for resume
     
     # Batch usernames (max 50)
     for i in range(0, len(usernames), 50):
@@ -36,73 +29,39 @@ def collect_profiles(usernames):
         
         input_data = {"usernames": batch}
         
-        resp = requests.post(
-            f"{BASE_URL}/acts/{actor_id}/runs",
-            headers=headers,
-            json=input_data,
-            params={"waitForFinish": 300}
-        )
-        
-        if resp.status_code == 201:
-            run_data = resp.json()["data"]
-            dataset_id = run_data["defaultDatasetId"]
-            
-            items_resp = requests.get(
-                f"{BASE_URL}/datasets/{dataset_id}/items",
-                headers=headers
-            )
-            if items_resp.status_code == 200:
-                all_profiles.extend(items_resp.json())
+        items = run_actor_batch(journal, batch_key("profiles", batch), actor_id, input_data, batch)
+        all_profiles.extend(items)
                 
     return all_profiles
 
-def collect_user_posts(usernames, existing_private_users=set()):
-    """Collect posts for users."""
-    headers = {"Authorization": f"Bearer {APIFY_TOKEN}"}
-    actor_id = "apify~instagram-post-scraper"
-    
-    all_posts = []
-    
-    for username in usernames:
+def collect_user_posts(usernames, existing_private_users=set(), journal=None, post_counts=None):
+    """Collect posts for users (batched runs, deeper pages only for active users)."""
+    targets = []
+    for username in sorted(usernames):
         if username in existing_private_users:
             print(f"Skipping private user: {username}")
             continue
-            
-        print(f"Fetching posts for {username}")
-        input_data = {
-            "username": [username],
-            "resultsLimit": 5,
-        }
-        
-        resp = requests.post(
-            f"{BASE_URL}/acts/{actor_id}/runs",
-            headers=headers,
-            json=input_data,
-            params={"waitForFinish": 120}
-        )
-        
-        if resp.status_code == 201:
-            run_data = resp.json()["data"]
-            dataset_id = run_data["defaultDatasetId"]
-            
-            items_resp = requests.get(
-                f"{BASE_URL}/datasets/{dataset_id}/items",
-                headers=headers
-            )
-            if items_resp.status_code == 200:
-                posts = items_resp.json()
-                for p in posts:
-                    p["username"] = username
-                    all_posts.append(p)
-        time.sleep(1)
+        targets.append(username)
+    
+    print(f"Fetching posts for {len(targets)} users")
+    posts_by_user = collect_posts_adaptive(targets, journal=journal, post_counts=post_counts)
+    
+    all_posts = []
+    for username in targets:
+        for p in posts_by_user.get(username, []):
+            p["username"] = username
+            all_posts.append(p)
             
     return all_posts
 
-def main():
+def main(resume=False):
     print("="*60)
     print("Merging and Fetching Missing Data")
     print("="*60)
     
+    # Checkpoint every actor batch (resume=True skips finished ones)
+    journal = CollectionJournal("merge_fetch", resume=resume)
+    
     # 1. Load Data
     comments_v1 = load_json("comments.json")
     comments_v2 = load_json("comments_v2.json")
@@ -130,18 +89,11 @@ def main():
     print(f"Missing Profiles: {len(missing_users)}")
     
     if missing_users:
-        new_profiles_raw = collect_profiles(missing_users)
+        new_profiles_raw = collect_profiles(missing_users, journal=journal)
         
         # Process and normalize
         for p in new_profiles_raw:
-            profiles.append({
-                "username": p.get("username", ""),
-                "followers": p.get("followersCount", 0),
-                "following": p.get("followsCount", 0),
-                "is_private": p.get("isPrivate", False),
-                "post_count": p.get("postsCount", 0),
-                "bio": p.get("biography", "")
-            })
+            profiles.append(normalize_profile(p))
         
         save_json(profiles, "profiles.json")
         print(f"Updated Profiles: {len(profiles)} (Fetched {len(new_profiles_raw)})")
@@ -167,21 +119,15 @@ def main():
     
     if users_needing_posts:
         print(f"Fetching posts for {len(users_needing_posts)} users...")
-        new_posts_raw = collect_user_posts(users_needing_posts)
+        post_counts = {u: profile_map[u].get("post_count") for u in users_needing_posts}
+        new_posts_raw = collect_user_posts(users_needing_posts, journal=journal, post_counts=post_counts)
         
-        # Process
+        # Process (upsert by shortcode - refetched posts update counts, not duplicate)
+        index = PostIndex(posts)
         for p in new_posts_raw:
-            posts.append({
-                "username": p.get("username", ""),
-                "post_date": p.get("timestamp", ""),
-                "caption": p.get("caption", ""),
-                "like_count": p.get("likesCount", 0),
-                "comment_count": p.get("commentsCount", 0),
-                "media_type": p.get("type", "Image"),
-                "hashtags": p.get("hashtags", []),
-                "post_url": p.get("url", f"https://www.instagram.com/p/{p.get('shortCode', '')}/"),
-                "shortcode": p.get("shortCode", "")
-            })
+            index.upsert(normalize_post(p, p.get("username", "")))
+        posts = index.posts
+        print_merge_stats(index.stats)
             
         save_json(posts, "posts.json")
         print(f"Updated Posts: {len(posts)} (Fetched {len(new_posts_raw)})")
@@ -189,4 +135,8 @@ def main():
     print("\nData Sync Complete!")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Merge comments and fetch missing profiles/posts")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip finished batches and reattach to in-flight actor runs")
+    args = parser.parse_args()
+    main(resume=args.resume)
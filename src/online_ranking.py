@@ -0,0 +1,291 @@
+"""
+online_ranking.py - Streaming ranking maintained as collection data arrives
+
+Profile/post/comment events re-score only the affected users; their post
+features come from the batch path (features.compute_window_features and
+compute_features, run over just their posts), so online and batch scores
+share one implementation. Main-pool users are kept in an order-statistics
+tree (a treap with subtree sizes) keyed on the create_rankings order:
+(-final_score, risk_flag, arrival order). Updates, rank queries and
+locating the k-th user are O(log n) expected for n ranked users; Top-K
+winners/reserves are an in-order walk of the first k nodes.
+"""
+import random
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .io_load import normalize_record
+from .cleaning import clean_posts
+from .features import compute_features, compute_window_features
+from .post_merge import post_shortcode, date_key
+from .scoring import (
+    compute_relationship_score, compute_reliability_score, compute_runnerfit_score,
+    compute_final_score, N_WINNERS, N_RESERVES
+)
+
+N_RECENT = 12
+# Windows the scores read (compute_features' 12 posts, posts_90d)
+ONLINE_WINDOWS = {str(N_RECENT): ("posts", N_RECENT), "90d": ("days", 90)}
+
+
+class _Node:
+    __slots__ = ("key", "priority", "left", "right", "size")
+
+    def __init__(self, key: tuple, priority: float):
+        self.key = key
+        self.priority = priority
+        self.left = self.right = None
+        self.size = 1
+
+
+def _size(node: Optional[_Node]) -> int:
+    return node.size if node is not None else 0
+
+
+def _resize(node: _Node) -> _Node:
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return node
+
+
+def _split(node: Optional[_Node], key: tuple) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """(keys < key, keys >= key)."""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, rest = _split(node.right, key)
+        return _resize(node), rest
+    rest, node.left = _split(node.left, key)
+    return rest, _resize(node)
+
+
+def _merge(low: Optional[_Node], high: Optional[_Node]) -> Optional[_Node]:
+    """Join two treaps where every key of low < every key of high."""
+    if low is None or high is None:
+        return low if high is None else high
+    if low.priority > high.priority:
+        low.right = _merge(low.right, high)
+        return _resize(low)
+    high.left = _merge(low, high.left)
+    return _resize(high)
+
+
+class _OrderTree:
+    """Treap of unique keys with subtree sizes (order statistics)."""
+
+    def __init__(self, seed: int = 0):
+        self.root: Optional[_Node] = None
+        self.rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return _size(self.root)
+
+    def insert(self, key: tuple):
+        low, high = _split(self.root, key)
+        self.root = _merge(_merge(low, _Node(key, self.rng.random())), high)
+
+    def remove(self, key: tuple):
+        low, high = _split(self.root, key)
+        _, high = _split(high, key + (None,))  # drop the node equal to key
+        self.root = _merge(low, high)
+
+    def count_less(self, key: tuple) -> int:
+        """Number of keys < key."""
+        count, node = 0, self.root
+        while node is not None:
+            if node.key < key:
+                count += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return count
+
+    def first(self, k: int) -> List[tuple]:
+        """The k smallest keys in order."""
+        keys, stack, node = [], [], self.root
+        while (stack or node is not None) and len(keys) < k:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            keys.append(node.key)
+            node = node.right
+        return keys
+
+
+class OnlineRanking:
+    """
+    Live ranking of the main pool (public users with posts in the last 90 days).
+
+    Events:
+    - ("profile", record), ("post", record), ("comment", record)
+      with records in the profiles/posts/comments.json schemas
+    """
+
+    def __init__(self, as_of: Optional[datetime] = None):
+        self.as_of = as_of or datetime.now(timezone.utc)
+        self.tree = _OrderTree()             # keys (-final_score, risk_flag, seq, username)
+
+        self.profiles: Dict[str, dict] = {}
+        self.posts: Dict[str, dict] = {}     # username -> {post key: record}
+        self.comments: Dict[str, dict] = {}
+        self.rows: Dict[str, dict] = {}      # username -> latest scored row
+        self.keys: Dict[str, tuple] = {}     # username -> tree key
+        self.excluded: set = set()
+        self.seq: Dict[str, int] = {}
+
+    # -------------------------------------------------------------------------
+    # Event stream
+    # -------------------------------------------------------------------------
+    def _ingest(self, kind: str, record: dict) -> Optional[str]:
+        """Store one event; returns the affected username."""
+        username = normalize_record(record, ["username"])["username"]
+        if not username:
+            return None
+        self.seq.setdefault(username, len(self.seq))
+
+        if kind == "profile":
+            self.profiles[username] = record
+        elif kind == "post":
+            user_posts = self.posts.setdefault(username, {})
+            # Same identity as post_merge: shortcode (or its URL), else the post date
+            key = post_shortcode(record) or date_key(record)[1] or f"#{len(user_posts)}"
+            user_posts[key] = record  # Re-delivered posts replace the earlier copy
+        elif kind == "comment":
+            self.comments.setdefault(username, record)
+        else:
+            raise ValueError(f"Unknown event kind: {kind}")
+        return username
+
+    def apply(self, kind: str, record: dict):
+        """Apply one event and re-score the affected user."""
+        username = self._ingest(kind, record)
+        if username:
+            self._rescore([username])
+
+    def apply_many(self, kind: str, records: list):
+        """Apply a batch of events, re-scoring each affected user once."""
+        touched = {}
+        for record in records:
+            username = self._ingest(kind, record)
+            if username:
+                touched[username] = True
+        self._rescore(list(touched))
+
+    # -------------------------------------------------------------------------
+    # Scoring (affected users only)
+    # -------------------------------------------------------------------------
+    def _post_features(self, usernames: List[str]) -> pd.DataFrame:
+        """
+        Post features of the given users, indexed by username: the batch
+        compute_features columns plus last_post_days and posts_90d, from one
+        compute_window_features pass over just their posts.
+        """
+        posts_df = clean_posts([post for username in usernames
+                                for post in self.posts.get(username, {}).values()], self.as_of)
+        window_df = compute_window_features(posts_df, usernames, self.as_of, ONLINE_WINDOWS)
+        features_df = compute_features(pd.DataFrame({"username": usernames}), posts_df, N_RECENT,
+                                       self.as_of, window_df).set_index("username")
+        features_df["last_post_days"] = window_df["last_post_days"]
+        features_df["posts_90d"] = window_df["n_posts_90d"]
+        return features_df
+
+    def _score_row(self, username: str, features: dict) -> dict:
+        profile = self.profiles[username]
+        row = normalize_record(profile, ["username", "followers", "is_private", "post_count"])
+        row["username"] = username
+        row["is_private"] = bool(row["is_private"])
+        row["followers"] = int(pd.to_numeric(row["followers"], errors="coerce") or 0)
+        row["post_count"] = int(pd.to_numeric(row["post_count"], errors="coerce") or 0)
+
+        row["last_post_days"] = int(features["last_post_days"])
+        row["posts_90d"] = int(features["posts_90d"])
+        row.update({key: value for key, value in features.items() if key not in ("last_post_days", "posts_90d")})
+        row["engagement_rate"] = (
+            round(row["avg_comments_12"] / row["followers"] * 100, 2) if row["followers"] > 0 else 0.0
+        )
+
+        row["relationship_score"] = compute_relationship_score(row)
+        row["reliability_score"] = compute_reliability_score(row)
+        row["runnerfit_score"] = compute_runnerfit_score(row)
+        row["final_score"] = compute_final_score(
+            row["relationship_score"], row["reliability_score"], row["runnerfit_score"]
+        )
+
+        flags = []
+        if row["is_private"]:
+            flags.append("private")
+        if row["posts_90d"] == 0:
+            flags.append("inactive_90d")
+        if row["post_count"] <= 3:
+            flags.append("low_posts")
+        row["risk_flag"] = "|".join(flags)
+        return row
+
+    def _rescore(self, usernames: List[str]):
+        # Not scorable before the profile arrives
+        scorable = [username for username in usernames if username in self.profiles]
+        features_df = self._post_features(scorable) if scorable else None
+        for username in usernames:
+            self._remove(username)
+            if username not in self.profiles:
+                continue
+            row = self._score_row(username, features_df.loc[username].to_dict())
+            self.rows[username] = row
+            if row["is_private"] or row["posts_90d"] == 0:
+                self.excluded.add(username)
+            else:
+                self.excluded.discard(username)
+                self._insert(username, row)
+
+    # -------------------------------------------------------------------------
+    # Ordered structure
+    # -------------------------------------------------------------------------
+    def _insert(self, username: str, row: dict):
+        key = (-row["final_score"], row["risk_flag"], self.seq[username], username)
+        self.tree.insert(key)
+        self.keys[username] = key
+
+    def _remove(self, username: str):
+        key = self.keys.pop(username, None)
+        if key is not None:
+            self.tree.remove(key)
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def rank(self, username: str) -> Optional[int]:
+        """1-based rank in the main pool (None if excluded/unknown)."""
+        key = self.keys.get(username)
+        if key is None:
+            return None
+        return self.tree.count_less(key) + 1
+
+    def top(self, k: int) -> List[dict]:
+        """Top k scored rows in ranking order."""
+        return [self.rows[key[-1]] for key in self.tree.first(k)]
+
+    def winners(self) -> List[dict]:
+        return self.top(N_WINNERS)
+
+    def reserves(self) -> List[dict]:
+        return self.top(N_WINNERS + N_RESERVES)[N_WINNERS:]
+
+    def to_frame(self, k: Optional[int] = None) -> pd.DataFrame:
+        """Ranking DataFrame (create_rankings columns) for the top k (all if None)."""
+        rows = self.top(len(self) if k is None else k)
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+        df.insert(0, "rank", range(1, len(df) + 1))
+        output_cols = [
+            "rank", "username", "relationship_score", "reliability_score",
+            "runnerfit_score", "final_score", "risk_flag",
+            "avg_comments_12", "avg_likes_12", "low_comment_post_rate",
+            "running_hashtag_rate", "followers", "posts_90d", "engagement_rate"
+        ]
+        return df[[c for c in output_cols if c in df.columns]]
@@ -0,0 +1,100 @@
+"""
+parity_polars.py - Check the Polars backend against the pandas pipeline
+
+Runs cleaning, features, scoring and hard filters through both backends on
+the raw data (or sample data / --synthetic N posts) and compares every
+output frame value by value. Exits 1 on any difference.
+
+Usage:
+    python src/parity_polars.py [--as-of 2026-01-07T12:00:00] [--synthetic 100000]
+"""
+import sys
+import argparse
+import random
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import load_or_generate_data, data_as_of
+from src.cleaning import clean_participants, clean_posts, clean_comments, as_of_timestamp
+from src.features import compute_features
+from src.scoring import apply_scores, apply_hard_filters, create_rankings
+from src.polars_backend import run_polars
+
+OUTPUTS = ["participants", "posts", "comments", "features", "main_pool", "excluded_pool", "ranking"]
+
+
+def run_pandas(comments: list, profiles: list, posts: list, as_of) -> tuple:
+    participants_df = clean_participants(profiles, posts, as_of)
+    posts_df = clean_posts(posts, as_of)
+    features_df = compute_features(participants_df, posts_df, 12, as_of)
+    main_pool, excluded_pool = apply_hard_filters(apply_scores(participants_df, features_df))
+    return participants_df, posts_df, clean_comments(comments), features_df, main_pool, excluded_pool
+
+
+def synthetic_raw(n_posts: int, seed: int = 7) -> tuple:
+    """Raw records with every messy case: -1/None counts, mixed date forms, undated posts."""
+    rng = random.Random(seed)
+    n_users = max(n_posts // 8, 1)
+    profiles = [{"username": f"user_{i}", "followers": rng.choice([0, None, rng.randint(1, 20000)]),
+                 "following": rng.randint(0, 900), "is_private": rng.random() < 0.1,
+                 "post_count": rng.randint(0, 200), "bio": rng.choice(["", None, "러너"])} for i in range(n_users)]
+    posts = []
+    for _ in range(n_posts):
+        day, hour = rng.randint(1, 28), rng.randint(0, 23)
+        month = rng.randint(1, 12)
+        posts.append({
+            "username": f"user_{rng.randrange(n_users)}",
+            "post_date": rng.choice([f"2025-{month:02d}-{day:02d}T{hour:02d}:15:00.000Z",
+                                     f"2025-{month:02d}-{day:02d}T{hour:02d}:15:00+09:00",
+                                     f"2025-{month:02d}-{day:02d}T{hour:02d}:15:00", "", None]),
+            "caption": rng.choice(["오늘도 러닝", "lunch", "Half marathon 10K", None]),
+            "like_count": rng.choice([-1, None, rng.randint(0, 900)]),
+            "comment_count": rng.choice([-1, 0, 2, 3, 4, rng.randint(0, 60)]),
+            "media_type": rng.choice(["Image", None]),
+            "hashtags": rng.choice([[], ["런린이"], ["food"], None]),
+            "post_url": "",
+        })
+    comments = [{"username": p["username"], "comment_text": "참여", "tagged_users_count": 1} for p in profiles]
+    return comments, profiles, posts
+
+
+def compare(name: str, expected: pd.DataFrame, actual: pd.DataFrame) -> bool:
+    expected = expected.reset_index(drop=True)
+    actual = actual.reset_index(drop=True)
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        print(f"  ✗ {name}: shape/columns differ {expected.shape} {list(expected.columns)} "
+              f"vs {actual.shape} {list(actual.columns)}")
+        return False
+    bad = [col for col in expected.columns
+           if not expected[col].astype(str).equals(actual[col].astype(str))]
+    print(f"  {'✓' if not bad else '✗'} {name}: {len(expected)} rows" + (f", differs in {bad}" if bad else ""))
+    return not bad
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Polars backend with the pandas pipeline")
+    parser.add_argument("--as-of", help="reference time (default: data snapshot time)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="use N synthetic posts instead of raw data")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        raw = synthetic_raw(args.synthetic)
+        as_of = as_of_timestamp(datetime.fromisoformat(args.as_of) if args.as_of else datetime(2025, 10, 1))
+    else:
+        raw = load_or_generate_data()
+        as_of = as_of_timestamp(datetime.fromisoformat(args.as_of) if args.as_of else data_as_of())
+    print(f"[Parity] {len(raw[2])} posts, {len(raw[1])} profiles, as of {as_of.isoformat()}")
+
+    expected = list(run_pandas(*raw, as_of))
+    actual = list(run_polars(*raw, as_of))
+    expected.append(create_rankings(expected[4], expected[5])[0])
+    actual.append(create_rankings(actual[4], actual[5])[0])
+
+    ok = all([compare(name, e, a) for name, e, a in zip(OUTPUTS, expected, actual)])
+    print("[Parity] OK" if ok else "[Parity] MISMATCH")
+    sys.exit(0 if ok else 1)
@@ -2,25 +2,78 @@
 pipeline.py - End-to-end pipeline execution
 """
 import sys
+import argparse
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, Optional
 
 # Add src to path for module imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.io_load import load_or_generate_data, PROCESSED_DIR, ensure_dirs
-from src.cleaning import clean_participants, clean_posts, clean_comments
-from src.features import compute_features
-from src.scoring import apply_scores, apply_hard_filters, create_rankings
+from src.io_load import (
+    load_or_generate_data, manifest_entry, data_as_of, save_run_info, PROCESSED_DIR, RAW_DIR, ensure_dirs,
+    load_json, iter_record_batches
+)
+from src.cleaning import clean_participants, clean_posts, clean_comments, as_of_timestamp
+from src.features import compute_features, compute_window_features, compute_decay_features
+from src.scoring import apply_scores, apply_hard_filters, create_rankings, RECENCY_HALF_LIFE_DAYS
+from src.snapshots import create_snapshot, load_manifest, load_snapshot_data, snapshot_summary, snapshot_as_of
+from src.raw_schema import validate_raw
+from src.stage_cache import cached, stage_key, raw_files_key, snapshot_key
+from src.polars_backend import run_polars
+from src.chunked import run_chunked, batched, default_partitions, BATCH_SIZE
 
+RAW_FILES = ["comments.json", "profiles.json", "posts.json"]
+N_RECENT = 12
 
-def run_pipeline():
+
+def preflight(as_of: datetime, summary: Callable[[str], Optional[dict]] = manifest_entry) -> list:
+    """Warnings about the raw inputs, answered from the manifest (or a snapshot's summaries)."""
+    comments = summary("comments.json")
+    profiles = summary("profiles.json")
+    posts = summary("posts.json")
+    if comments is None or profiles is None or posts is None:
+        return ["Raw data missing: sample data will be generated"]
+
+    warnings = []
+    if comments["records"] == 0:
+        warnings.append("comments.json is empty: no participants")
+    if profiles["unique_users"] < comments["unique_users"]:
+        warnings.append(f"{comments['unique_users'] - profiles['unique_users']} commenters have no profile "
+                        "(python src/merge_and_fetch_missing.py)")
+    if posts["max_post_date"]:
+        newest = datetime.fromisoformat(posts["max_post_date"])
+        if (as_of - newest).days > 90:  # only with an explicit --as-of
+            warnings.append(f"Newest post is {(as_of - newest).days} days before as-of: "
+                            "every participant will be inactive")
+        elif (datetime.now(timezone.utc) - newest).days > 90:
+            warnings.append(f"Newest post is {(datetime.now(timezone.utc) - newest).days} days old: "
+                            "re-collect for current activity")
+    elif posts["records"] == 0:
+        warnings.append("posts.json is empty: every participant will be inactive")
+    return warnings
+
+
+def run_pipeline(snapshot: Optional[str] = None, as_of: Optional[datetime] = None, use_cache: bool = True,
+                 half_life_days: Optional[float] = None, backend: str = "pandas", chunked: bool = False,
+                 partitions: Optional[int] = None):
     """
     Execute the full pipeline:
-    1. Load or generate data
+    1. Load or generate data (or the pinned raw snapshot: ID, "latest", or
+       "new" to snapshot the current raw files first)
     2. Clean data
     3. Compute features
     4. Apply scoring
     5. Generate outputs
+    
+    Activity metrics are computed as of `as_of` (default: the newest post
+    date of the raw files or snapshot), so identical inputs give identical outputs; stages 2-5 are cached
+    by content key (stage_cache.py). With half_life_days, time-decayed
+    engagement features (features.compute_decay_features) are scored too.
+    backend="polars" runs cleaning, features and scoring as one lazy Polars
+    plan (polars_backend.py) with the same outputs. chunked=True streams
+    posts through on-disk username-range partitions (chunked.py) for
+    histories larger than memory; it is not stage-cached.
     """
     print("=" * 60)
     print("관계형 영향력 기반 러너 20명 선정 파이프라인")
@@ -30,13 +83,46 @@ def run_pipeline():
     
     # Step 1: Load data
     print("\n[1/5] Loading data...")
-    comments, profiles, posts = load_or_generate_data()
+    if snapshot:
+        snapshot_id = create_snapshot(label="pipeline") if snapshot == "new" else load_manifest(snapshot)["id"]
+        manifest = load_manifest(snapshot_id)
+        raw_key = snapshot_key(manifest)
+        as_of = as_of_timestamp(as_of or snapshot_as_of(manifest))
+        for warning in preflight(as_of, lambda name: snapshot_summary(manifest, name)):
+            print(f"  [Pre-flight] {warning}")
+        load_raw = lambda: load_snapshot_data(snapshot_id)
+        print(f"  - Input snapshot: {snapshot_id}")
+    else:
+        if not all((RAW_DIR / name).exists() for name in RAW_FILES):
+            load_or_generate_data()  # Generates sample data
+        as_of = as_of_timestamp(as_of or data_as_of())
+        for warning in preflight(as_of):
+            print(f"  [Pre-flight] {warning}")
+        raw_key = raw_files_key(RAW_FILES)
+        load_raw = load_or_generate_data
+        snapshot_id = None
+    as_of = as_of_timestamp(as_of)
+    print(f"  - As of: {as_of.isoformat()}")
+    if backend == "polars" and half_life_days:
+        print("  [Polars] Time-decayed scoring is pandas-only: using the pandas backend")
+        backend = "pandas"
+    if chunked:
+        if backend != "pandas":
+            print(f"  [Chunked] Chunked mode uses the pandas backend (not {backend})")
+        return run_chunked_pipeline(snapshot_id, raw_key, as_of, half_life_days, partitions)
+    if backend == "polars":
+        return run_polars_pipeline(load_raw, raw_key, as_of, snapshot_id, use_cache)
     
     # Step 2: Clean data
     print("\n[2/5] Cleaning data...")
-    participants_df = clean_participants(profiles, posts)
-    posts_df = clean_posts(posts)
-    comments_df = clean_comments(comments)
+    
+    def clean():
+        comments, profiles, posts = validate_raw(*load_raw())
+        return (clean_participants(profiles, posts, as_of), clean_posts(posts, as_of),
+                clean_comments(comments))
+    
+    clean_key = stage_key("clean", raw_key, as_of.isoformat())
+    participants_df, posts_df, comments_df = cached("clean", clean_key, clean, use_cache)
     
     print(f"  - Participants: {len(participants_df)}")
     print(f"  - Posts: {len(posts_df)}")
@@ -49,34 +135,153 @@ def run_pipeline():
     
     # Step 3: Compute features
     print("\n[3/5] Computing features...")
-    features_df = compute_features(participants_df, posts_df)
+    
+    def features():
+        usernames = participants_df["username"]
+        window_df = compute_window_features(posts_df, usernames, as_of)
+        decay_df = compute_decay_features(posts_df, usernames, as_of, half_life_days) if half_life_days else None
+        return compute_features(participants_df, posts_df, N_RECENT, as_of, window_df), window_df, decay_df
+    
+    features_key = stage_key("features", clean_key, N_RECENT, half_life_days)
+    features_df, window_df, decay_df = cached("features", features_key, features, use_cache)
     features_df.to_csv(PROCESSED_DIR / "features.csv", index=False, encoding="utf-8-sig")
-    print(f"  - Features computed for {len(features_df)} participants")
+    window_df.to_csv(PROCESSED_DIR / "window_features.csv", encoding="utf-8-sig")
+    print(f"  - Features computed for {len(features_df)} participants ({len(window_df.columns)} window features)")
+    if decay_df is not None:
+        decay_df.to_csv(PROCESSED_DIR / "decay_features.csv", index=False, encoding="utf-8-sig")
+        print(f"  - Time-decayed features: half-life {half_life_days:g} days")
     
     # Step 4: Apply scoring
     print("\n[4/5] Applying scoring rules...")
-    scored_df = apply_scores(participants_df, features_df)
-    main_pool, excluded_pool = apply_hard_filters(scored_df)
+    
+    def score():
+        scored = apply_scores(participants_df, features_df, decay_df, half_life_days or RECENCY_HALF_LIFE_DAYS)
+        main_pool, excluded_pool = apply_hard_filters(scored)
+        return main_pool, excluded_pool, create_rankings(main_pool, excluded_pool)
+    
+    scores_key = stage_key("scores", features_key)
+    main_pool, excluded_pool, (ranking, shortlist, winners_draft) = cached("scores", scores_key, score, use_cache)
     
     print(f"  - Main pool: {len(main_pool)}")
     print(f"  - Excluded (private/inactive): {len(excluded_pool)}")
     
     # Step 5: Create rankings
     print("\n[5/5] Creating rankings...")
-    ranking, shortlist, winners_draft = create_rankings(main_pool, excluded_pool)
+    ranking.to_csv(PROCESSED_DIR / "ranking.csv", index=False, encoding="utf-8-sig")
+    shortlist.to_csv(PROCESSED_DIR / "shortlist.csv", index=False, encoding="utf-8-sig")
+    winners_draft.to_csv(PROCESSED_DIR / "winners_draft.csv", index=False, encoding="utf-8-sig")
+    save_run_info({
+        "as_of": as_of.isoformat(),
+        "snapshot": snapshot_id,
+        "backend": "pandas",
+        "half_life_days": half_life_days,
+        "raw_key": raw_key,
+        "stage_keys": {"clean": clean_key, "features": features_key, "scores": scores_key},
+        "created": datetime.now().isoformat(timespec="seconds"),
+    })
+    
+    report(ranking, excluded_pool)
+    return ranking, shortlist, winners_draft
+
+
+def run_polars_pipeline(load_raw, raw_key: str, as_of, snapshot_id: Optional[str], use_cache: bool):
+    """Stages 2-5 of run_pipeline on the Polars backend, cached as one stage."""
+    print("\n[2-4/5] Cleaning, features and scoring (polars)...")
+    
+    def run():
+        comments, profiles, posts = validate_raw(*load_raw())
+        participants_df, posts_df, comments_df, features_df, main_pool, excluded_pool = run_polars(
+            comments, profiles, posts, as_of, N_RECENT)
+        window_df = compute_window_features(posts_df, participants_df["username"], as_of)
+        return (participants_df, posts_df, comments_df, features_df, window_df,
+                main_pool, excluded_pool, create_rankings(main_pool, excluded_pool))
+    
+    polars_key = stage_key("polars", raw_key, as_of.isoformat(), N_RECENT)
+    (participants_df, posts_df, comments_df, features_df, window_df,
+     main_pool, excluded_pool, (ranking, shortlist, winners_draft)) = cached("polars", polars_key, run, use_cache)
+    print(f"  - Participants: {len(participants_df)}, posts: {len(posts_df)}, comments: {len(comments_df)}")
+    print(f"  - Main pool: {len(main_pool)}, excluded (private/inactive): {len(excluded_pool)}")
     
+    print("\n[5/5] Creating rankings...")
+    outputs = {
+        "participants_clean.csv": participants_df, "posts_clean.csv": posts_df,
+        "comments_clean.csv": comments_df, "features.csv": features_df,
+        "ranking.csv": ranking, "shortlist.csv": shortlist, "winners_draft.csv": winners_draft,
+    }
+    for name, df in outputs.items():
+        df.to_csv(PROCESSED_DIR / name, index=False, encoding="utf-8-sig")
+    window_df.to_csv(PROCESSED_DIR / "window_features.csv", encoding="utf-8-sig")
+    save_run_info({
+        "as_of": as_of.isoformat(),
+        "snapshot": snapshot_id,
+        "backend": "polars",
+        "half_life_days": None,
+        "raw_key": raw_key,
+        "stage_keys": {"polars": polars_key},
+        "created": datetime.now().isoformat(timespec="seconds"),
+    })
+    
+    report(ranking, excluded_pool)
+    return ranking, shortlist, winners_draft
+
+
+def run_chunked_pipeline(snapshot_id: Optional[str], raw_key: str, as_of, half_life_days: Optional[float],
+                         partitions: Optional[int]):
+    """Stages 2-5 of run_pipeline with posts partitioned on disk (chunked.run_chunked)."""
+    print("\n[2-3/5] Cleaning and features by username range (chunked)...")
+    if snapshot_id:
+        comments, profiles, posts = load_snapshot_data(snapshot_id)
+        post_batches, n_posts = batched(posts), len(posts)
+    else:
+        comments, profiles = load_json("comments.json"), load_json("profiles.json")
+        post_batches = iter_record_batches(RAW_DIR / "posts.json", BATCH_SIZE)
+        n_posts = manifest_entry("posts.json")["records"]
+    
+    participants_df, comments_df, features_df, window_df, decay_df = run_chunked(
+        comments, profiles, post_batches, as_of, N_RECENT, half_life_days,
+        partitions or default_partitions(n_posts), PROCESSED_DIR / "posts_clean.csv")
+    participants_df.to_csv(PROCESSED_DIR / "participants_clean.csv", index=False, encoding="utf-8-sig")
+    comments_df.to_csv(PROCESSED_DIR / "comments_clean.csv", index=False, encoding="utf-8-sig")
+    features_df.to_csv(PROCESSED_DIR / "features.csv", index=False, encoding="utf-8-sig")
+    window_df.to_csv(PROCESSED_DIR / "window_features.csv", encoding="utf-8-sig")
+    if decay_df is not None:
+        decay_df.to_csv(PROCESSED_DIR / "decay_features.csv", index=False, encoding="utf-8-sig")
+    print(f"  - Participants: {len(participants_df)}, comments: {len(comments_df)}")
+    
+    print("\n[4/5] Applying scoring rules...")
+    scored = apply_scores(participants_df, features_df, decay_df, half_life_days or RECENCY_HALF_LIFE_DAYS)
+    main_pool, excluded_pool = apply_hard_filters(scored)
+    print(f"  - Main pool: {len(main_pool)}")
+    print(f"  - Excluded (private/inactive): {len(excluded_pool)}")
+    
+    print("\n[5/5] Creating rankings...")
+    ranking, shortlist, winners_draft = create_rankings(main_pool, excluded_pool)
     ranking.to_csv(PROCESSED_DIR / "ranking.csv", index=False, encoding="utf-8-sig")
     shortlist.to_csv(PROCESSED_DIR / "shortlist.csv", index=False, encoding="utf-8-sig")
     winners_draft.to_csv(PROCESSED_DIR / "winners_draft.csv", index=False, encoding="utf-8-sig")
+    save_run_info({
+        "as_of": as_of.isoformat(),
+        "snapshot": snapshot_id,
+        "backend": "chunked",
+        "half_life_days": half_life_days,
+        "raw_key": raw_key,
+        "stage_keys": {},
+        "created": datetime.now().isoformat(timespec="seconds"),
+    })
     
-    # Report
+    report(ranking, excluded_pool)
+    return ranking, shortlist, winners_draft
+
+
+def report(ranking, excluded_pool):
+    """Console summary: output files, top 10 and risk flag counts."""
     print("\n" + "=" * 60)
     print("파이프라인 완료!")
     print("=" * 60)
     
     print("\n[생성된 파일]")
     for f in ["participants_clean.csv", "posts_clean.csv", "comments_clean.csv",
-              "features.csv", "ranking.csv", "shortlist.csv", "winners_draft.csv"]:
+              "features.csv", "window_features.csv", "ranking.csv", "shortlist.csv", "winners_draft.csv"]:
         filepath = PROCESSED_DIR / f
         if filepath.exists():
             print(f"  ✓ {f}")
@@ -109,9 +314,23 @@ def run_pipeline():
             print("  (No risk flags in main pool)")
     
     print(f"\n  - 제외된 참여자 (비공개/비활동): {len(excluded_pool)}명")
-    
-    return ranking, shortlist, winners_draft
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser(description="Run the selection pipeline")
+    parser.add_argument("--snapshot", help="run on a raw data snapshot (ID, 'latest' or 'new')")
+    parser.add_argument("--as-of", help="reference time, e.g. 2026-01-07 or 2026-01-07T09:00:00+09:00 "
+                                        "(default: newest post date in the data)")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every stage")
+    parser.add_argument("--half-life", type=float, metavar="DAYS",
+                        help="score time-decayed engagement with this half-life (default: fixed windows)")
+    parser.add_argument("--backend", choices=["pandas", "polars"], default="pandas",
+                        help="dataframe engine for cleaning/features/scoring (polars needs the polars package)")
+    parser.add_argument("--chunked", action="store_true",
+                        help="partition posts by username range on disk (histories larger than memory)")
+    parser.add_argument("--partitions", type=int, metavar="N",
+                        help="username ranges for --chunked (default: ~500k posts each)")
+    args = parser.parse_args()
+    as_of = datetime.fromisoformat(args.as_of) if args.as_of else None
+    run_pipeline(args.snapshot, as_of, not args.no_cache, args.half_life, args.backend, args.chunked,
+                 args.partitions)
@@ -0,0 +1,247 @@
+"""
+polars_backend.py - Polars lazy backend for cleaning, features and scoring
+
+The pandas pipeline runs clean_participants / clean_posts ->
+compute_features -> apply_scores -> apply_hard_filters eagerly, copying a
+frame at every step. Here the same steps are expressions on LazyFrames
+built from the raw records, and every output (clean participants/posts,
+features, main/excluded pools) is collected together with pl.collect_all,
+so Polars optimizes one plan (shared subplans run once) and executes it
+multi-threaded.
+
+Definitions follow cleaning.py / features.py / scoring.py exactly (see
+src/parity_polars.py); time-decayed scoring (--half-life) is pandas-only.
+
+Usage:
+    python src/pipeline.py --backend polars
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:  # Optional dependency
+    pl = None
+
+from .io_load import record_column
+from .cleaning import as_of_timestamp, clean_comments, NS_PER_DAY, POST_KEYS, PROFILE_KEYS
+from .features import RUNNING_PATTERN
+from .scoring import FINAL_WEIGHTS
+
+# ISO 8601 layouts accepted by cleaning.parse_post_dates (after the offset is cut off)
+DATE_FORMATS = ["%Y-%m-%dT%H:%M:%S%.f", "%Y-%m-%d %H:%M:%S%.f", "%Y-%m-%dT%H:%M", "%Y-%m-%d"]
+
+
+def _require_polars():
+    if pl is None:
+        raise RuntimeError("The polars backend requires polars (pip install polars)")
+
+
+def _records_frame(records: list, keys: list, schema: dict) -> "pl.LazyFrame":
+    """Records as a LazyFrame, built column by column (cast leniently)."""
+    return pl.DataFrame([
+        pl.Series(key, record_column(records, key), dtype=schema[key], strict=False) for key in keys
+    ]).lazy()
+
+
+def _bucket(expr: "pl.Expr", cases: list, default) -> "pl.Expr":
+    """when/then chain for (condition(expr), points) cases, first match wins."""
+    chain = None
+    for condition, points in cases:
+        chain = (pl.when(condition(expr)) if chain is None else chain.when(condition(expr))).then(pl.lit(points))
+    return chain.otherwise(pl.lit(default))
+
+
+# -----------------------------------------------------------------------------
+# Cleaning
+# -----------------------------------------------------------------------------
+def parse_dates(col: "pl.Expr") -> "pl.Expr":
+    """ISO 8601 strings -> Datetime(ns, UTC); naive = UTC, offsets applied, bad -> null."""
+    # Offsets after a time of day: "+09:00", "+0900" or "+09" (cleaning.OFFSET_FORMS)
+    offset = col.str.extract(r"[T ][\d:.]+([+-]\d\d(?::?\d\d)?)$", 1)
+    local = col.str.replace(r"([T ][\d:.]+)[+-]\d\d(?::?\d\d)?$", "${1}").str.replace(r"Z$", "")
+    parsed = pl.coalesce([local.str.strptime(pl.Datetime("ns"), fmt, strict=False) for fmt in DATE_FORMATS])
+    sign = pl.when(offset.str.slice(0, 1) == "-").then(-1).otherwise(1)
+    digits = offset.str.replace(":", "", literal=True)
+    minutes = (digits.str.slice(1, 2).cast(pl.Int64) * 60
+               + digits.str.slice(3, 2).cast(pl.Int64, strict=False).fill_null(0)).fill_null(0)
+    return (parsed - pl.duration(minutes=sign * minutes)).dt.replace_time_zone("UTC")
+
+
+def clean_posts_lazy(posts: list, hashtags: list, as_of: pd.Timestamp) -> "pl.LazyFrame":
+    """
+    clean_posts as a LazyFrame (posts dated after as_of dropped).
+
+    Hashtag lists stay in Python (building Polars list columns from Python
+    lists costs more than the whole plan): the frame carries them joined as
+    hashtag_text plus the record position "row" to restore them on output.
+    """
+    keys = [key for key in POST_KEYS if key != "hashtags"]
+    lf = _records_frame(posts, keys, {
+        "username": pl.Utf8, "post_date": pl.Utf8, "caption": pl.Utf8, "like_count": pl.Int64,
+        "comment_count": pl.Int64, "media_type": pl.Utf8, "post_url": pl.Utf8,
+    })
+    hashtag_text = pl.Series("hashtag_text", [
+        " ".join(map(str, tags)) if isinstance(tags, list) else "" for tags in hashtags
+    ], dtype=pl.Utf8)
+    return lf.with_columns(
+        parse_dates(pl.col("post_date")).alias("post_date"),
+        pl.col("like_count").fill_null(0),
+        pl.col("comment_count").fill_null(0),
+        pl.col("caption").fill_null(""),
+        pl.col("post_url").fill_null(""),
+        pl.col("media_type").fill_null("Unknown"),
+        pl.lit(hashtag_text),
+        pl.int_range(pl.len(), dtype=pl.Int64).alias("row"),
+    ).filter(~(pl.col("post_date") > pl.lit(as_of)).fill_null(False))
+
+
+def clean_participants_lazy(profiles: list, posts_lf: "pl.LazyFrame", as_of: pd.Timestamp) -> "pl.LazyFrame":
+    """clean_participants as a LazyFrame (activity from the cleaned posts)."""
+    ref = as_of.as_unit("ns").value
+    activity = posts_lf.group_by("username").agg(
+        pl.col("post_date").max().alias("last_post_date"),
+        (pl.col("post_date").dt.epoch("ns") >= ref - 90 * NS_PER_DAY).sum().alias("posts_90d"),
+    )
+    lf = _records_frame(profiles, PROFILE_KEYS, {
+        "username": pl.Utf8, "followers": pl.Int64, "following": pl.Int64,
+        "is_private": pl.Boolean, "post_count": pl.Int64, "bio": pl.Utf8,
+    })
+    return (
+        lf.with_columns(
+            pl.col("is_private").fill_null(False),
+            pl.col(["followers", "following", "post_count"]).fill_null(0),
+            pl.col("bio").fill_null(""),
+        )
+        .join(activity, on="username", how="left", maintain_order="left")
+        .with_columns(
+            pl.col("posts_90d").fill_null(0).cast(pl.Int64),
+            ((ref - pl.col("last_post_date").dt.epoch("ns")) // NS_PER_DAY).fill_null(999).alias("last_post_days"),
+        )
+        .unique(subset="username", keep="first", maintain_order=True)
+    )
+
+
+# -----------------------------------------------------------------------------
+# Features / scoring
+# -----------------------------------------------------------------------------
+def features_lazy(participants_lf: "pl.LazyFrame", posts_lf: "pl.LazyFrame", n_recent: int) -> "pl.LazyFrame":
+    """compute_features: the n_recent newest posts per participant."""
+    comments, likes = pl.col("comment_count"), pl.col("like_count")
+    text = (pl.col("caption") + " " + pl.col("hashtag_text")).str.to_lowercase()
+    per_user = (
+        posts_lf.sort(["username", "post_date"], descending=[False, True], nulls_last=True, maintain_order=True)
+        .filter(pl.int_range(pl.len()).over("username") < n_recent)
+        .group_by("username")
+        .agg(
+            pl.len().alias("n"),
+            comments.mean().alias("avg_comments"),
+            likes.filter(likes >= 0).mean().fill_null(0.0).alias("avg_likes"),
+            (comments >= 0).sum().alias("n_valid"),
+            ((comments >= 0) & (comments <= 3)).sum().alias("n_low"),
+            text.str.contains(RUNNING_PATTERN).mean().alias("running_rate"),
+        )
+        .with_columns(
+            pl.when(pl.col("avg_likes") > 0)
+            .then(pl.col("avg_comments") / pl.max_horizontal(pl.col("avg_likes"), 1))
+            .otherwise(0.0).alias("ratio"),
+            pl.when(pl.col("n_valid") > 0).then(pl.col("n_low") / pl.col("n_valid")).otherwise(1.0).alias("low"),
+        )
+    )
+    has_posts = pl.col("n").fill_null(0) > 0
+    return participants_lf.select("username").join(per_user, on="username", how="left", maintain_order="left").select(
+        "username",
+        pl.when(has_posts).then(pl.col("avg_comments")).otherwise(0.0).round(2).alias("avg_comments_12"),
+        pl.when(has_posts).then(pl.col("avg_likes")).otherwise(0.0).round(2).alias("avg_likes_12"),
+        pl.when(has_posts).then(pl.col("ratio")).otherwise(0.0).round(4).alias("comment_like_ratio"),
+        pl.when(has_posts).then(pl.col("low")).otherwise(1.0).round(4).alias("low_comment_post_rate"),
+        pl.when(has_posts)
+        .then(pl.col("avg_comments").log1p() + 0.5 * pl.col("ratio") - pl.col("low"))
+        .otherwise(0.0).round(4).alias("community_signal"),
+        pl.when(has_posts).then(pl.col("running_rate")).otherwise(0.0).round(4).alias("running_hashtag_rate"),
+    )
+
+
+def scores_lazy(participants_lf: "pl.LazyFrame", features_lf: "pl.LazyFrame") -> "pl.LazyFrame":
+    """apply_scores + apply_hard_filters risk flags (scoring.py bucket tables)."""
+    comment_score = _bucket(pl.col("avg_comments_12"), [
+        (lambda x: x < 0.5, 3), (lambda x: x < 1, 6), (lambda x: x < 2, 12), (lambda x: x < 4, 21)], 30)
+    engagement_score = _bucket(pl.col("engagement_rate"), [
+        (lambda x: x >= 1.0, 20), (lambda x: x >= 0.5, 15), (lambda x: x >= 0.2, 10), (lambda x: x >= 0.1, 5)], 0)
+    low_penalty = _bucket(pl.col("low_comment_post_rate"), [
+        (lambda x: x >= 0.8, -15), (lambda x: x >= 0.6, -10), (lambda x: x >= 0.4, -5)], 0)
+    last_post_score = _bucket(pl.col("last_post_days"), [
+        (lambda x: x <= 7, 30), (lambda x: x <= 14, 25), (lambda x: x <= 30, 18),
+        (lambda x: x <= 60, 10), (lambda x: x <= 90, 5)], 0)
+    posts_90d_score = _bucket(pl.col("posts_90d"), [
+        (lambda x: x == 0, 0), (lambda x: x <= 1, 10), (lambda x: x <= 3, 20)], 30)
+    running_score = _bucket(pl.col("running_hashtag_rate"), [
+        (lambda x: x == 0, 0), (lambda x: x <= 0.25, 5), (lambda x: x <= 0.5, 10), (lambda x: x <= 0.75, 15)], 20)
+    private_penalty = pl.when(pl.col("is_private")).then(-10).otherwise(0)
+    w_rel, w_reli, w_fit = FINAL_WEIGHTS
+
+    return (
+        participants_lf.join(features_lf, on="username", how="left", maintain_order="left")
+        .with_columns(
+            pl.when(pl.col("followers") > 0)
+            .then(pl.col("avg_comments_12") / pl.col("followers") * 100)
+            .otherwise(0.0).round(2).alias("engagement_rate"),
+        )
+        .with_columns(
+            (comment_score + engagement_score + low_penalty).clip(0, 50).alias("relationship_score"),
+            (((last_post_score + posts_90d_score) / 2 + private_penalty).cast(pl.Int64)).clip(0, 30)
+            .alias("reliability_score"),
+            running_score.alias("runnerfit_score"),
+        )
+        .with_columns(
+            (w_rel * pl.col("relationship_score") + w_reli * pl.col("reliability_score")
+             + w_fit * pl.col("runnerfit_score")).round(2).alias("final_score"),
+            pl.concat_str([
+                pl.when(pl.col("is_private")).then(pl.lit("private")),
+                pl.when(pl.col("posts_90d") == 0).then(pl.lit("inactive_90d")),
+                pl.when(pl.col("post_count") <= 3).then(pl.lit("low_posts")),
+            ], separator="|", ignore_nulls=True).alias("risk_flag"),
+        )
+    )
+
+
+# -----------------------------------------------------------------------------
+# Entry point
+# -----------------------------------------------------------------------------
+def _posts_to_pandas(df: "pl.DataFrame", hashtags: list) -> pd.DataFrame:
+    """Collected posts with the original hashtag lists put back (clean_posts columns)."""
+    if not hashtags:
+        return pd.DataFrame(columns=POST_KEYS)
+    out = df.drop("hashtag_text", "row").to_pandas()
+    out.insert(POST_KEYS.index("hashtags"), "hashtags", [
+        tags if isinstance(tags, list) else [] for tags in map(hashtags.__getitem__, df["row"].to_list())
+    ])
+    return out
+
+
+def run_polars(comments: list, profiles: list, posts: list, as_of: Optional[datetime],
+               n_recent: int = 12) -> Tuple[pd.DataFrame, ...]:
+    """
+    Clean, featurize and score in one collected plan.
+
+    Returns pandas frames shaped like the pandas path:
+    (participants_df, posts_df, comments_df, features_df, main_pool, excluded_pool)
+    """
+    _require_polars()
+    as_of = as_of_timestamp(as_of)
+    hashtags = record_column(posts, "hashtags")
+    # cache(): the posts and participants subplans feed several outputs; run each once
+    posts_lf = clean_posts_lazy(posts, hashtags, as_of).cache()
+    participants_lf = clean_participants_lazy(profiles, posts_lf, as_of).cache()
+    features_lf = features_lazy(participants_lf, posts_lf, n_recent)
+    scored_lf = scores_lazy(participants_lf, features_lf)
+    excluded = pl.col("is_private") | (pl.col("posts_90d") == 0)
+
+    frames = pl.collect_all([
+        participants_lf, posts_lf, features_lf, scored_lf.filter(~excluded), scored_lf.filter(excluded),
+    ])
+    participants, posts_clean, features, main_pool, excluded_pool = frames
+    return (participants.to_pandas(), _posts_to_pandas(posts_clean, hashtags), clean_comments(comments),
+            features.to_pandas(), main_pool.to_pandas(), excluded_pool.to_pandas())
@@ -0,0 +1,167 @@
+"""
+post_merge.py - Deduplicating merge of posts (posts.json schema)
+
+Posts are identified by (username, shortcode), falling back to
+(username, post_date) when the shortcode is missing (older dumps, sample
+data). PostIndex keeps a hash index on both keys, so each upsert is O(1);
+a duplicate keeps the newest engagement counts (like_count/comment_count)
+and fills fields the stored copy is missing.
+
+Usage (consolidate overlapping dumps/backups into one file):
+    python src/post_merge.py posts.json posts_backup_v1.json backup/posts_*.json [-o posts.json]
+"""
+import sys
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import load_json, save_json, normalize_record, RAW_DIR
+
+ENGAGEMENT_FIELDS = ["like_count", "comment_count"]
+
+
+def post_shortcode(post: dict) -> str:
+    """Shortcode from the record or its post URL ('' if unknown)."""
+    code = post.get("shortcode") or post.get("shortCode")
+    if code:
+        return str(code)
+    url = normalize_record(post, ["post_url"])["post_url"] or ""
+    if "/p/" in url:
+        return url.split("/p/")[-1].strip("/").split("/")[0]
+    return ""
+
+
+def date_key(post: dict) -> Tuple[str, str]:
+    """(username, post_date) with the date normalized to UTC ISO when parseable."""
+    fields = normalize_record(post, ["username", "post_date"])
+    username = str(fields["username"] or "").lower()
+    value = str(fields["post_date"] or "")
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return username, value
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return username, parsed.astimezone(timezone.utc).isoformat()
+
+
+class PostIndex:
+    """
+    Insertion-ordered post store with O(1) upserts.
+
+    - by_code: (username, shortcode) -> slot
+    - by_date: (username, post_date) -> slots (matches a post seen without
+      a shortcode on one side; only when the match is unambiguous, since
+      several posts can share a timestamp)
+    """
+
+    def __init__(self, posts: Iterable[dict] = ()):
+        self.posts: List[dict] = []
+        self.by_code: Dict[Tuple[str, str], int] = {}
+        self.by_date: Dict[Tuple[str, str], List[int]] = {}
+        self.stats = {"input": 0, "inserted": 0, "duplicates": 0, "updated": 0, "date_keyed": 0}
+        self.merge(posts)
+
+    def _find(self, post: dict) -> Tuple[Optional[int], Tuple[str, str], Tuple[str, str]]:
+        dkey = date_key(post)
+        code = post_shortcode(post)
+        ckey = (dkey[0], code)
+        if code and ckey in self.by_code:
+            return self.by_code[ckey], ckey, dkey
+        slots = self.by_date.get(dkey, []) if dkey[1] else []
+        codeless = [slot for slot in slots if not post_shortcode(self.posts[slot])]
+        if code:
+            # A shortcode-less copy stored earlier; coded slots are other posts
+            candidates = codeless
+        else:
+            # Any post at this time, or the one earlier shortcode-less copy
+            candidates = slots if len(slots) == 1 else codeless
+        return (candidates[0] if len(candidates) == 1 else None), ckey, dkey
+
+    def upsert(self, post: dict) -> str:
+        """Insert or merge one post; returns 'inserted', 'updated' or 'duplicate'."""
+        self.stats["input"] += 1
+        slot, ckey, dkey = self._find(post)
+
+        if slot is None:
+            slot = len(self.posts)
+            self.posts.append(dict(post))
+            if ckey[1]:
+                self.by_code[ckey] = slot
+            else:
+                self.stats["date_keyed"] += 1
+            if dkey[1]:
+                self.by_date.setdefault(dkey, []).append(slot)
+            self.stats["inserted"] += 1
+            return "inserted"
+
+        self.stats["duplicates"] += 1
+        if ckey[1]:
+            self.by_code[ckey] = slot
+        return "updated" if self._merge_into(self.posts[slot], post) else "duplicate"
+
+    def _merge_into(self, stored: dict, incoming: dict) -> bool:
+        """Newest engagement counts win; missing fields are filled. True if changed."""
+        changed = False
+        newer = str(incoming.get("fetched_at") or "") >= str(stored.get("fetched_at") or "")
+        for key, value in incoming.items():
+            if key in ENGAGEMENT_FIELDS:
+                # -1 / None mean "not collected" and never overwrite a real count
+                if value is None or (isinstance(value, (int, float)) and value < 0):
+                    continue
+                current = stored.get(key)
+                invalid = current is None or (isinstance(current, (int, float)) and current < 0)
+                if (newer or invalid) and current != value:
+                    stored[key] = value
+                    changed = True
+            elif stored.get(key) in (None, "", []) and value not in (None, "", []):
+                stored[key] = value
+                changed = True
+        if changed:
+            self.stats["updated"] += 1
+        return changed
+
+    def merge(self, posts: Iterable[dict]):
+        for post in posts:
+            self.upsert(post)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.posts)
+
+
+def merge_posts(*sources: Iterable[dict]) -> Tuple[List[dict], dict]:
+    """Merge post lists (later sources are newer); returns (posts, stats)."""
+    index = PostIndex()
+    for source in sources:
+        index.merge(source)
+    return index.posts, index.stats
+
+
+def print_merge_stats(stats: dict, label: str = "Posts"):
+    print(f"[Merge] {label}: {stats['input']} in -> {stats['inserted']} unique "
+          f"({stats['duplicates']} duplicates, {stats['updated']} updated, "
+          f"{stats['date_keyed']} keyed by date)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge post dumps without duplicates")
+    parser.add_argument("files", nargs="+", help="JSON files under data/raw, oldest first")
+    parser.add_argument("-o", "--output", help="write merged posts to this data/raw file")
+    args = parser.parse_args()
+
+    index = PostIndex()
+    for filename in args.files:
+        before = len(index)
+        index.merge(load_json(filename))
+        print(f"  {filename}: +{len(index) - before} new")
+    print_merge_stats(index.stats)
+
+    if args.output:
+        save_json(index.posts, args.output)
+    else:
+        print(f"(dry run - pass -o posts.json to write under {RAW_DIR})")
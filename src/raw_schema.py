@@ -0,0 +1,220 @@
+"""
+raw_schema.py - Schema validation for raw comments/profiles/posts records
+
+Each kind has a strict msgspec struct: every canonical field present and
+well-typed, counts >= 0, post_date parseable. Whole batches are checked with
+one msgspec.convert call at C speed; failing batches are bisected, so only
+the bad records (and the ones using KEY_ALIASES names, e.g. likesCount) take
+the per-field Python path, which alias-maps them and counts one rejection
+reason per field (missing / type / negative / unparseable).
+
+Records that are not objects (null, strings, ...) are counted as
+record:type and records without a username are dropped (cleaning cannot
+key them). Other
+rejected values are left for cleaning's coercion unless drop_invalid=True,
+so -1 "not collected" counts still reach features.py as before - they are
+now reported at load time instead of by investigate_anomalies.py.
+
+Usage:
+    python src/raw_schema.py [--drop-invalid]
+"""
+import sys
+import argparse
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import msgspec
+    from typing import Annotated
+except ImportError:  # Optional dependency: pure Python validation
+    msgspec = None
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import load_json, normalize_record
+
+# field -> rule (see _check)
+FIELD_RULES: Dict[str, Dict[str, str]] = {
+    "comments": {
+        "username": "username", "comment_text": "text",
+        "tagged_users_count": "count", "post_shortcode": "text",
+    },
+    "profiles": {
+        "username": "username", "followers": "count", "following": "count",
+        "is_private": "bool", "post_count": "count", "bio": "text",
+    },
+    "posts": {
+        "username": "username", "post_date": "date", "caption": "text",
+        "like_count": "count", "comment_count": "count", "media_type": "text",
+        "hashtags": "list", "post_url": "text",
+    },
+}
+
+
+# -----------------------------------------------------------------------------
+# Compiled strict types (msgspec)
+# -----------------------------------------------------------------------------
+if msgspec is not None:
+    Username = Annotated[str, msgspec.Meta(min_length=1)]
+    Count = Annotated[int, msgspec.Meta(ge=0)]
+
+    class StrictComment(msgspec.Struct):
+        username: Username
+        comment_text: str
+        tagged_users_count: Count
+        post_shortcode: str
+
+    class StrictProfile(msgspec.Struct):
+        username: Username
+        followers: Count
+        following: Count
+        is_private: bool
+        post_count: Count
+        bio: str
+
+    class StrictPost(msgspec.Struct):
+        username: Username
+        post_date: datetime
+        caption: str
+        like_count: Count
+        comment_count: Count
+        media_type: str
+        hashtags: List[str]
+        post_url: str
+
+    STRICT_TYPES = {
+        "comments": List[StrictComment],
+        "profiles": List[StrictProfile],
+        "posts": List[StrictPost],
+    }
+else:
+    STRICT_TYPES = {}
+
+
+def _invalid_indices(records: list, list_type, lo: int, hi: int, out: List[int]):
+    """Indices in records[lo:hi] failing list_type (bisection over C checks)."""
+    try:
+        msgspec.convert(records[lo:hi], list_type)
+        return
+    except msgspec.ValidationError:
+        pass
+    if hi - lo == 1:
+        out.append(lo)
+        return
+    mid = (lo + hi) // 2
+    _invalid_indices(records, list_type, lo, mid, out)
+    _invalid_indices(records, list_type, mid, hi, out)
+
+
+# -----------------------------------------------------------------------------
+# Per-field checks (fallback path)
+# -----------------------------------------------------------------------------
+def _check(value, rule: str) -> Optional[str]:
+    """Rejection reason for a value, or None if valid."""
+    if value is None or (rule in ("username", "date") and value == ""):
+        return "missing"
+    if rule in ("username", "text"):
+        return None if isinstance(value, str) else "type"
+    if rule == "count":
+        if isinstance(value, bool) or not isinstance(value, int):
+            return "type"
+        return "negative" if value < 0 else None
+    if rule == "bool":
+        return None if isinstance(value, bool) else "type"
+    if rule == "list":
+        return None if isinstance(value, list) else "type"
+    if rule == "date":
+        try:
+            datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return "unparseable"
+    return None
+
+
+def check_record(record: dict, kind: str) -> Tuple[dict, Dict[str, str]]:
+    """(alias-mapped record, {field: reason}) for one record."""
+    rules = FIELD_RULES[kind]
+    fields = normalize_record(record, list(rules)) if isinstance(record, dict) else {}
+    errors = {}
+    for field, rule in rules.items():
+        reason = _check(fields.get(field), rule)
+        if reason:
+            errors[field] = reason
+    return {**record, **fields} if isinstance(record, dict) else fields, errors
+
+
+def validate_records(records: list, kind: str, drop_invalid: bool = False) -> Tuple[list, dict]:
+    """
+    Validate raw records of one kind ("comments", "profiles", "posts").
+
+    Returns (records, report). report["fields"] counts "field:reason".
+    """
+    if msgspec is not None:
+        suspect: List[int] = []
+        if records:
+            _invalid_indices(records, STRICT_TYPES[kind], 0, len(records), suspect)
+    else:
+        suspect = list(range(len(records)))
+
+    out = list(records)
+    fields = Counter()
+    dropped = set()
+    aliased = flagged = 0
+    for i in suspect:
+        if not isinstance(records[i], dict):
+            fields["record:type"] += 1
+            flagged += 1
+            dropped.add(i)
+            continue
+        record, errors = check_record(records[i], kind)
+        if any(field not in records[i] and record[field] is not None for field in FIELD_RULES[kind]):
+            aliased += 1
+        for field, reason in errors.items():
+            fields[f"{field}:{reason}"] += 1
+        if errors:
+            flagged += 1
+        if "username" in errors or (errors and drop_invalid):
+            dropped.add(i)
+        out[i] = record
+
+    if dropped:
+        out = [r for i, r in enumerate(out) if i not in dropped]
+    report = {
+        "kind": kind,
+        "records": len(records),
+        "valid": len(records) - flagged,
+        "flagged": flagged,
+        "aliased": aliased,
+        "dropped": len(dropped),
+        "fields": dict(fields),
+    }
+    return out, report
+
+
+def print_validation_report(report: dict):
+    print(f"[Schema] {report['kind']}: {report['valid']}/{report['records']} valid, "
+          f"{report['flagged']} flagged, {report['dropped']} dropped, {report['aliased']} alias-mapped")
+    for key, count in sorted(report["fields"].items(), key=lambda kv: -kv[1]):
+        print(f"    {key:<32} {count}")
+
+
+def validate_raw(comments: list, profiles: list, posts: list, drop_invalid: bool = False) -> tuple:
+    """Validate all three raw lists (printing reports); returns them validated."""
+    validated = []
+    for kind, records in [("comments", comments), ("profiles", profiles), ("posts", posts)]:
+        records, report = validate_records(records, kind, drop_invalid)
+        print_validation_report(report)
+        validated.append(records)
+    return tuple(validated)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate raw comments/profiles/posts.json")
+    parser.add_argument("--drop-invalid", action="store_true", help="drop records with any rejected field")
+    args = parser.parse_args()
+    print(f"[Schema] Backend: {'msgspec' if msgspec is not None else 'python'}")
+    validate_raw(load_json("comments.json"), load_json("profiles.json"), load_json("posts.json"),
+                 args.drop_invalid)
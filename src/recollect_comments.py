@@ -1,105 +1,221 @@
 """
 recollect_comments.py - Dedicated script to collect ALL comments
+
+Incremental by default: a per-post high-water mark (latest comment
+timestamp, the ids seen at that timestamp and usernames already seen) is
+kept in comments_state.json. Each refresh streams the actor's dataset page
+by page while it runs, keeps only comments newer than the mark, and aborts
+the run once full pages stop yielding newer comments (the read has reached
+the old mark). The early stop assumes the actor lists comments
+newest-first; if a page breaks that order the whole dataset is read. The mark only
+advances after such a stop or a drained successful run, so comments left
+unread by a failed run are fetched again next time. Use --full for a
+complete rescrape.
 """
-import requests
+import sys
+import argparse
 import json
 import time
 from pathlib import Path
 
-APIFY_TOKEN = os.getenv("APIFY_TOKEN", "")
-BASE_URL = "https://api.apify.com/v2"
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.apify_collect import (
+    start_actor_run, get_run, fetch_dataset_page, abort_run, parse_timestamp,
+    FINISHED_STATUSES
+)
+from src import run_metrics
+from src.io_load import load_json, save_json
+from src.scraper_adapters import get_adapter
 
 TARGET_POSTS = [
     "DSuGGGvDFB7",
-    "DSuGISfjPUk", 
+    "DSuGISfjPUk",
     "DSlsKZGE9KS"
 ]
 
 RAW_DIR = Path(__file__).resolve().parent.parent / "data" / "raw"
+STATE_FILE = RAW_DIR / "comments_state.json"
+OUTPUT_FILE = RAW_DIR / "comments_v2.json"
+
+# Dataset paging / early stop
+PAGE_SIZE = 50
+MAX_COMMENTS = 1000  # High limit per post
+STALE_PAGES = 2      # Consecutive full pages without newer comments before stopping
+
+# Comment source (scraper_adapters); nested replies are included
+ADAPTER = "comment_scraper_nested"
+
+
+def load_state():
+    if STATE_FILE.exists():
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state):
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+def mark_ids(post_state):
+    """Ids of the comments at the high-water mark's timestamp."""
+    if "latest_ids" in post_state:
+        return set(post_state["latest_ids"])
+    return {post_state["latest_id"]} if post_state.get("latest_id") else set()  # Older state files
+
+
+def is_newer(c, post_state, seen_ids=None):
+    """True if the comment is past the post's high-water mark (timestamp, then id)."""
+    latest_ts = parse_timestamp(post_state.get("latest_ts"))
+    if latest_ts is None:
+        return True
+    ts = parse_timestamp(c.get("timestamp"))
+    if ts is None:
+        return True  # Undated: keep, username dedup happens downstream
+    if ts != latest_ts:
+        return ts > latest_ts
+    return str(c.get("id", "")) not in (seen_ids if seen_ids is not None else mark_ids(post_state))
+
+
+def out_of_order(page, last_ts):
+    """
+    Whether the page breaks newest-first order (the early stop relies on it);
+    returns (broken, timestamp of the page's last dated comment).
+    """
+    broken = False
+    for c in page:
+        ts = parse_timestamp(c.get("timestamp"))
+        if ts is None:
+            continue
+        if last_ts is not None and ts > last_ts:
+            broken = True
+        last_ts = ts
+    return broken, last_ts
+
+
+def harvest_post(shortcode, post_state, adapter=None):
+    """
+    Harvest new comments for a SINGLE post.
+
+    Returns (new comment items, updated post state).
+    """
+    adapter = adapter or get_adapter(ADAPTER)
+    input_data = adapter.build_input([shortcode], MAX_COMMENTS)
+    print(f"\n[Scraping] {input_data['directUrls'][0]} ({adapter.name})")
+
+    run_data = start_actor_run(adapter.actor_id, input_data, phase="comments_refresh")
+    if run_data is None:
+        return [], post_state
 
-def run_scraper_per_post(shortcode):
-    """Run scraper for a SINGLE post to ensure max coverage."""
-    headers = {"Authorization": f"Bearer {APIFY_TOKEN}"}
-    actor_id = "apify~instagram-comment-scraper"
-    
-    post_url = f"https://www.instagram.com/p/{shortcode}/"
-    print(f"\n[Scraping] {post_url}")
-    
-    input_data = {
-        "directUrls": [post_url],
-        "resultsLimit": 1000,  # High limit per post
-        "includeNestedComments": True, # Ensure we catch replies if they count as entries
-    }
-    
-    url = f"{BASE_URL}/acts/{actor_id}/runs"
-    resp = requests.post(
-        url,
-        headers=headers,
-        json=input_data,
-        params={"waitForFinish": 300}
-    )
-    
-    if resp.status_code != 201:
-        print(f"Error starting scraper: {resp.status_code}")
-        return []
-    
-    run_data = resp.json()["data"]
     run_id = run_data["id"]
+    dataset_id = run_data.get("defaultDatasetId")
     print(f"Run ID: {run_id}")
-    
-    # Wait
+
+    known_users = set(post_state.get("users", []))
+    seen_ids = mark_ids(post_state)
+    new_items = []
+    offset = 0
+    stale_pages = 0
+    reached_mark = False
+    newest_first, last_ts = True, None
+    finished = run_data.get("status") in FINISHED_STATUSES
+
     while True:
-        status_url = f"{BASE_URL}/actor-runs/{run_id}"
-        status_resp = requests.get(status_url, headers=headers)
-        status = status_resp.json()["data"]["status"]
-        if status in ["SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"]:
+        page = fetch_dataset_page(dataset_id, offset, PAGE_SIZE)
+
+        if page:
+            offset += len(page)
+            fresh = [c for c in page if is_newer(c, post_state, seen_ids)]
+            broken, last_ts = out_of_order(page, last_ts)
+            if broken and newest_first:
+                print("  Comments are not newest-first - reading the whole dataset (no early stop)")
+                newest_first = False
+            page_users = {adapter.username(c) for c in fresh} - {None}
+            new_users = page_users - known_users
+            known_users |= page_users
+            new_items.extend(fresh)
+            print(f"  page @{offset}: {len(fresh)}/{len(page)} newer, {len(new_users)} new users")
+
+            if len(page) == PAGE_SIZE and newest_first:
+                stale_pages = 0 if fresh else stale_pages + 1
+                if stale_pages >= STALE_PAGES:
+                    print("  No newer comments - stopping early")
+                    reached_mark = True
+                    if not finished:
+                        abort_run(run_id)
+                    break
+            continue
+
+        if finished:
             break
+
         time.sleep(3)
-    
-    if status == "SUCCEEDED":
-        dataset_id = run_data.get("defaultDatasetId")
-        items_url = f"{BASE_URL}/datasets/{dataset_id}/items"
-        items_resp = requests.get(items_url, headers=headers)
-        items = items_resp.json()
-        print(f"Found {len(items)} comments")
-        return items
-    
-    return []
-
-def main():
+        run_data = get_run(run_id) or run_data
+        finished = run_data.get("status") in FINISHED_STATUSES
+
+    print(f"Found {len(new_items)} new comments ({offset} read)")
+    run_data = get_run(run_id) or run_data
+    run_metrics.finish_run(run_data)
+
+    # Advance the high-water mark only if every newer comment was read: the
+    # early stop saw full pages at/below the old mark, or the run succeeded
+    # and its dataset was drained
+    new_state = dict(post_state)
+    new_state["users"] = sorted(known_users)
+    if not (reached_mark or run_data.get("status") == "SUCCEEDED"):
+        print(f"  Run ended {run_data.get('status')} before reaching the mark - keeping it")
+        return new_items, new_state
+    dated = [(parse_timestamp(c.get("timestamp")), c) for c in new_items]
+    dated = [(ts, c) for ts, c in dated if ts is not None]
+    if dated:
+        newest_ts = max(ts for ts, _ in dated)
+        latest_ts = parse_timestamp(post_state.get("latest_ts"))
+        # Every id at the mark's timestamp, so comments sharing it are not counted again
+        ids = {str(c.get("id", "")) for ts, c in dated if ts == newest_ts}
+        if newest_ts == latest_ts:
+            ids |= seen_ids
+        else:
+            new_state["latest_ts"] = next(c.get("timestamp") for ts, c in dated if ts == newest_ts)
+        new_state["latest_ids"] = sorted(ids)
+        new_state.pop("latest_id", None)
+    return new_items, new_state
+
+
+def main(full=False, adapter_name=ADAPTER):
     RAW_DIR.mkdir(parents=True, exist_ok=True)
-    all_comments = []
-    
+    adapter = get_adapter(adapter_name)
+    state = {} if full else load_state()
+
+    # Existing participants (first comment per user is kept)
+    processed = []
+    if OUTPUT_FILE.exists() and not full:
+        processed = load_json(OUTPUT_FILE.name)
+    seen_users = {c["username"] for c in processed}
+    n_before = len(processed)
+
     for code in TARGET_POSTS:
-        comments = run_scraper_per_post(code)
+        comments, state[code] = harvest_post(code, state.get(code, {}), adapter)
         for c in comments:
-            c["post_shortcode"] = code # Ensure shortcode is attached
-            all_comments.append(c)
+            record = adapter.normalize(c, code)
+            if record and record["username"] not in seen_users:
+                seen_users.add(record["username"])
+                processed.append(record)
+        save_state(state)
         time.sleep(2)
-    
-    # Process
-    processed = []
-    seen_users = set()
-    
-    for c in all_comments:
-        username = c.get("ownerUsername") or c.get("username") or c.get("owner", {}).get("username")
-        if username:
-            if username not in seen_users:
-                seen_users.add(username)
-                processed.append({
-                    "username": username,
-                    "comment_text": c.get("text", ""),
-                    "tagged_users_count": len(c.get("mentions", [])),
-                    "post_shortcode": c.get("post_shortcode", "")
-                })
-    
-    print(f"\nTotal unique participants: {len(processed)}")
-    
-    # Merge with existing if needed, but for now just overwrite "comments_v2.json"
-    # to avoid breaking the running script's output file
-    with open(RAW_DIR / "comments_v2.json", "w", encoding="utf-8") as f:
-        json.dump(processed, f, ensure_ascii=False, indent=2)
-    print(f"Saved to {RAW_DIR / 'comments_v2.json'}")
+
+    print(f"\nTotal unique participants: {len(processed)} (+{len(processed) - n_before})")
+
+    # Write to "comments_v2.json" to avoid breaking the running script's output file
+    save_json(processed, OUTPUT_FILE.name)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Collect event post comments")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore high-water marks and rescrape every comment")
+    parser.add_argument("--adapter", default=ADAPTER,
+                        help="comment source from scraper_adapters (default: %(default)s)")
+    args = parser.parse_args()
+    main(full=args.full, adapter_name=args.adapter)
@@ -0,0 +1,224 @@
+"""
+run_metrics.py - Cost/latency accounting for Apify actor runs
+
+Every actor run started through apify_collect is tracked from start to the
+final dataset read and appended to data/raw/metrics/apify_runs.jsonl:
+
+    {ts, run_id, actor, phase, status, targets, input_bytes,
+     queue_wait_secs, run_secs, wall_secs, polls, requests, items, bytes,
+     compute_units, usage_usd}
+
+phase is the collection step (journal batch kind such as profiles/posts_p1,
+or the script name), targets the number of usernames/URLs in the input.
+compute_units/usage_usd are copied from the run object when Apify reports
+them (None on the fake server).
+
+Usage:
+    python src/run_metrics.py [--since 2026-01-01] [--top 10]
+"""
+import sys
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import manifest_entry
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+METRICS_DIR = BASE_DIR / "data" / "raw" / "metrics"
+METRICS_PATH = METRICS_DIR / "apify_runs.jsonl"
+
+# Runs in flight: run_id -> partial metrics
+_ACTIVE: Dict[str, dict] = {}
+_DATASETS: Dict[str, str] = {}  # dataset_id -> run_id
+
+
+def input_targets(input_data: dict) -> int:
+    """Number of usernames/URLs an actor input covers."""
+    for key in ["usernames", "username", "directUrls"]:
+        value = input_data.get(key)
+        if isinstance(value, list):
+            return len(value)
+        if value:
+            return 1
+    return 0
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _secs_between(start, end) -> Optional[float]:
+    start, end = _parse_time(start), _parse_time(end)
+    if start is None or end is None:
+        return None
+    return round((end - start).total_seconds(), 3)
+
+
+# -----------------------------------------------------------------------------
+# Tracking (called from apify_collect)
+# -----------------------------------------------------------------------------
+def _entry(run_id: str) -> dict:
+    """Metrics for a run; runs reattached after a restart are tracked from here."""
+    if run_id not in _ACTIVE:
+        _ACTIVE[run_id] = {
+            "run_id": run_id, "actor": None, "phase": "", "targets": 0,
+            "input_bytes": 0, "polls": 0, "requests": 0, "items": 0, "bytes": 0,
+            "_t0": time.time(),
+        }
+    return _ACTIVE[run_id]
+
+
+def begin_run(run_data: dict, actor_id: str, input_data: dict, phase: str = "",
+              response_bytes: int = 0):
+    """Start tracking a freshly started run."""
+    entry = _entry(run_data["id"])
+    entry.update({
+        "actor": actor_id,
+        "phase": phase,
+        "targets": input_targets(input_data),
+        "input_bytes": len(json.dumps(input_data, ensure_ascii=False).encode("utf-8")),
+    })
+    entry["requests"] += 1
+    entry["bytes"] += response_bytes
+    link_dataset(run_data["id"], run_data.get("defaultDatasetId"))
+
+
+def link_dataset(run_id: str, dataset_id: Optional[str]):
+    """Attribute reads of dataset_id to run_id (runs reattached by ID)."""
+    if dataset_id:
+        _DATASETS[dataset_id] = run_id
+
+
+def track_request(run_id: Optional[str] = None, dataset_id: Optional[str] = None,
+                  response_bytes: int = 0, items: int = 0, poll: bool = False):
+    """Account one API request against its run (by run ID or dataset ID)."""
+    run_id = run_id or _DATASETS.get(dataset_id)
+    if run_id is None:
+        return
+    entry = _entry(run_id)
+    entry["requests"] += 1
+    entry["bytes"] += response_bytes
+    entry["items"] += items
+    if poll:
+        entry["polls"] += 1
+
+
+def finish_run(run_data: Optional[dict], run_id: Optional[str] = None):
+    """Write the run's metrics line and stop tracking it."""
+    run_id = run_id or (run_data or {}).get("id")
+    entry = _ACTIVE.pop(run_id, None)
+    if entry is None:
+        return
+    run_data = run_data or {}
+    _DATASETS.pop(run_data.get("defaultDatasetId"), None)
+
+    stats = run_data.get("stats") or {}
+    record = {k: v for k, v in entry.items() if not k.startswith("_")}
+    record.update({
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "actor": entry["actor"] or run_data.get("actId"),
+        "status": run_data.get("status"),
+        "queue_wait_secs": _secs_between(run_data.get("createdAt"), run_data.get("startedAt")),
+        "run_secs": _secs_between(run_data.get("startedAt"), run_data.get("finishedAt")),
+        "wall_secs": round(time.time() - entry["_t0"], 3),
+        "compute_units": stats.get("computeUnits"),
+        "usage_usd": run_data.get("usageTotalUsd"),
+    })
+
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(METRICS_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+# -----------------------------------------------------------------------------
+# Summary
+# -----------------------------------------------------------------------------
+def load_metrics(since: Optional[str] = None) -> List[dict]:
+    if not METRICS_PATH.exists():
+        return []
+    cutoff = _parse_time(since) if since else None
+    if cutoff is not None and cutoff.tzinfo is None:
+        cutoff = cutoff.replace(tzinfo=timezone.utc)
+    records = []
+    with open(METRICS_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if cutoff is not None and (_parse_time(record.get("ts")) or cutoff) < cutoff:
+                continue
+            records.append(record)
+    return records
+
+
+def _sum(records: List[dict], key: str) -> float:
+    return sum(r.get(key) or 0 for r in records)
+
+
+def summarize(records: List[dict], participants: Optional[int] = None, top: int = 10):
+    """Print spend/latency per phase, cost per participant and the slowest actors."""
+    if not records:
+        print("[Metrics] No runs recorded")
+        return
+
+    print(f"[Metrics] {len(records)} runs, {_sum(records, 'requests'):.0f} requests "
+          f"({_sum(records, 'polls'):.0f} polls), {_sum(records, 'items'):.0f} items, "
+          f"{_sum(records, 'bytes') / 1e6:.1f} MB")
+
+    by_phase: Dict[str, List[dict]] = {}
+    for r in records:
+        by_phase.setdefault(r.get("phase") or r.get("actor") or "?", []).append(r)
+
+    print(f"\n{'phase':<20}{'runs':>6}{'targets':>9}{'run s':>9}{'queue s':>9}"
+          f"{'CU':>8}{'USD':>9}{'USD/target':>12}")
+    for phase, rs in sorted(by_phase.items(), key=lambda kv: -_sum(kv[1], "wall_secs")):
+        targets = _sum(rs, "targets")
+        usd = _sum(rs, "usage_usd")
+        per_target = f"{usd / targets:.4f}" if targets else "-"
+        print(f"{phase:<20}{len(rs):>6}{targets:>9.0f}{_sum(rs, 'run_secs'):>9.1f}"
+              f"{_sum(rs, 'queue_wait_secs'):>9.1f}{_sum(rs, 'compute_units'):>8.2f}"
+              f"{usd:>9.3f}{per_target:>12}")
+
+    total_usd = _sum(records, "usage_usd")
+    if participants:
+        print(f"\nCost per participant: ${total_usd / participants:.4f} "
+              f"(${total_usd:.3f} / {participants} participants)")
+
+    by_actor: Dict[str, List[dict]] = {}
+    for r in records:
+        by_actor.setdefault(r.get("actor") or "?", []).append(r)
+    print("\nSlowest actors (mean run secs):")
+    ranked = sorted(by_actor.items(), key=lambda kv: -_sum(kv[1], "run_secs") / len(kv[1]))
+    for actor, rs in ranked[:top]:
+        mean = _sum(rs, "run_secs") / len(rs)
+        slowest = max(rs, key=lambda r: r.get("run_secs") or 0)
+        print(f"  {actor:<40} {mean:8.1f}s mean, {slowest.get('run_secs') or 0:8.1f}s max "
+              f"({slowest['run_id']}), {len(rs)} runs")
+
+
+def count_participants() -> Optional[int]:
+    """Participants in comments.json (denominator for cost per participant)."""
+    entry = manifest_entry("comments.json")
+    return entry["unique_users"] if entry else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize Apify run metrics")
+    parser.add_argument("--since", help="only runs logged at/after this ISO date")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest actors to list")
+    parser.add_argument("--participants", type=int,
+                        help="participant count for cost per participant (default: comments.json)")
+    args = parser.parse_args()
+    summarize(load_metrics(args.since), args.participants or count_participants(), args.top)
@@ -3,7 +3,7 @@ scoring.py - Tiered scoring system for runner selection
 """
 import pandas as pd
 import numpy as np
-from typing import Tuple
+from typing import Optional, Tuple
 
 
 # =============================================================================
@@ -63,12 +63,26 @@ def score_last_post_days(days: int) -> int:
         return 0
 
 
+# Half-life of the continuous recency score (days)
+RECENCY_HALF_LIFE_DAYS = 30.0
+
+
+def score_recency(days, half_life_days: float = RECENCY_HALF_LIFE_DAYS):
+    """
+    C') last_post_days -> continuous Reliability score (replaces C when
+    apply_scores gets decay features)
+    30 * 0.5^(days / half_life); half_life 30: 0d: 30, 30d: 15, 60d: 7.5, 90d: 3.75
+    """
+    return 30 * 0.5 ** (np.asarray(days, dtype=float) / half_life_days)
+
+
 def score_posts_90d(posts_90d: int) -> int:
     """
     D) posts_90d score (added to Reliability base from last_post_days)
     0: 0, 1: 10, 2~3: 20, >=4: 30
     
-    NOTE: Adjusted for fetch limit of 5.
+    NOTE: Top bucket is 4+, so the 4-post first page of adaptive
+    collection (apify_collect.POSTS_FIRST_PAGE) can already reach it.
     """
     if posts_90d == 0:
         return 0
@@ -157,7 +171,8 @@ def compute_relationship_score(row: pd.Series) -> int:
     - 평균 댓글 5개 (30점) + 참여율 1% (20점) = 50점 (만점)
     - 평균 댓글 5개 (30점) + 참여율 0.05% (0점) = 30점
     """
-    comment_score = score_avg_comments(row["avg_comments_12"])
+    avg_comments = row["decayed_avg_comments"] if "decayed_avg_comments" in row else row["avg_comments_12"]
+    comment_score = score_avg_comments(avg_comments)
     engagement_score = score_engagement_rate(row.get("engagement_rate", 0))
     penalty = score_low_comment_penalty(row["low_comment_post_rate"])
     return max(0, min(50, comment_score + engagement_score + penalty))
@@ -170,8 +185,12 @@ def compute_reliability_score(row: pd.Series) -> int:
     Clamped to [0, 30]
     
     Since C max=30 and D max=30, we average them to get base 0-30.
+    With decay features, C is the continuous recency_score (score_recency).
     """
-    last_post_score = score_last_post_days(row["last_post_days"])
+    if "recency_score" in row:
+        last_post_score = row["recency_score"]
+    else:
+        last_post_score = score_last_post_days(row["last_post_days"])
     posts_90d_score = score_posts_90d(row["posts_90d"])
     # Average the two components (both 0-30 max)
     base = (last_post_score + posts_90d_score) / 2
@@ -182,9 +201,14 @@ def compute_reliability_score(row: pd.Series) -> int:
 def compute_runnerfit_score(row: pd.Series) -> int:
     """
     RunnerFit Score (0-20)
-    = score_running_hashtag
+    = score_running_hashtag (of decayed_running_rate with decay features)
     """
-    return score_running_hashtag(row["running_hashtag_rate"])
+    rate = row["decayed_running_rate"] if "decayed_running_rate" in row else row["running_hashtag_rate"]
+    return score_running_hashtag(rate)
+
+
+# Final score weights (Relationship, Reliability, RunnerFit)
+FINAL_WEIGHTS = (0.50, 0.30, 0.20)
 
 
 def compute_final_score(
@@ -195,18 +219,33 @@ def compute_final_score(
     """
     Final Score = 0.50*Relationship + 0.30*Reliability + 0.20*RunnerFit
     """
-    return round(0.50 * relationship + 0.30 * reliability + 0.20 * runnerfit, 2)
+    w_rel, w_reli, w_fit = FINAL_WEIGHTS
+    return round(w_rel * relationship + w_reli * reliability + w_fit * runnerfit, 2)
 
 
 def apply_scores(
     participants_df: pd.DataFrame,
-    features_df: pd.DataFrame
+    features_df: pd.DataFrame,
+    decay_df: Optional[pd.DataFrame] = None,
+    half_life_days: float = RECENCY_HALF_LIFE_DAYS
 ) -> pd.DataFrame:
     """
     Apply all scoring rules to compute final rankings.
+    
+    Optional decay_df (features.compute_decay_features) switches recency to
+    continuous inputs: Relationship and engagement_rate use
+    decayed_avg_comments, RunnerFit decayed_running_rate, and Reliability's
+    last-post step score becomes score_recency(last_post_days, half_life_days).
     """
     # Merge participant info with features
     df = participants_df.merge(features_df, on="username", how="left")
+    comment_col = "avg_comments_12"
+    if decay_df is not None:
+        df = df.merge(decay_df, on="username", how="left")
+        decay_cols = [col for col in decay_df.columns if col != "username"]
+        df[decay_cols] = df[decay_cols].fillna(0)
+        df["recency_score"] = score_recency(df["last_post_days"], half_life_days)
+        comment_col = "decayed_avg_comments"
     
     # Fill missing feature values
     feature_cols = ["avg_comments_12", "avg_likes_12", "comment_like_ratio", 
@@ -216,13 +255,13 @@ def apply_scores(
             df[col] = 0
         df[col] = df[col].fillna(0)
 
-    # Calculate Engagement Rate (avg_comments_12 / followers * 100)
+    # Calculate Engagement Rate (avg_comments_12 or decayed_avg_comments / followers * 100)
     df["followers"] = pd.to_numeric(df["followers"], errors="coerce").fillna(0)
     df["engagement_rate"] = 0.0
     
     # Vectorized calculation
     mask = df["followers"] > 0
-    df.loc[mask, "engagement_rate"] = (df.loc[mask, "avg_comments_12"] / df.loc[mask, "followers"]) * 100
+    df.loc[mask, "engagement_rate"] = (df.loc[mask, comment_col] / df.loc[mask, "followers"]) * 100
     df["engagement_rate"] = df["engagement_rate"].round(2)
     
     # Compute scores
@@ -281,23 +320,80 @@ def apply_hard_filters(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     return main_pool, excluded_pool
 
 
+# Output sizes (spec: shortlist Top 40, winners Top 20 + 10 reserves)
+SHORTLIST_SIZE = 40
+N_WINNERS = 20
+N_RESERVES = 10
+
+
+def sort_ranked(
+    df: pd.DataFrame,
+    score_col: str = "final_score",
+    flag_col: str = "risk_flag"
+) -> pd.DataFrame:
+    """
+    Sort by score (descending), then by risk flag (empty first).
+    Ties keep their original order (stable sort).
+    """
+    by = [score_col]
+    ascending = [False]
+    if flag_col in df.columns:
+        by.append(flag_col)
+        ascending.append(True)
+    return df.sort_values(by=by, ascending=ascending, kind="mergesort")
+
+
+def select_top_k(
+    df: pd.DataFrame,
+    k: int,
+    score_col: str = "final_score",
+    flag_col: str = "risk_flag"
+) -> pd.DataFrame:
+    """
+    Select the top k rows in ranking order without sorting the whole frame.
+    
+    np.argpartition finds the k-th best score in O(n); every row scoring at
+    least that much (including all ties at the boundary) is then sorted with
+    the same rules as sort_ranked. Result equals sort_ranked(df).head(k).
+    """
+    n = len(df)
+    if k <= 0 or n == 0:
+        return df.iloc[0:0]
+    if k >= n:
+        return sort_ranked(df, score_col, flag_col)
+    
+    scores = pd.to_numeric(df[score_col], errors="coerce").to_numpy(dtype=float)
+    scores = np.where(np.isnan(scores), -np.inf, scores)
+    
+    kth = np.argpartition(-scores, k - 1)[k - 1]
+    candidates = np.flatnonzero(scores >= scores[kth])
+    
+    return sort_ranked(df.iloc[candidates], score_col, flag_col).head(k)
+
+
 def create_rankings(
     main_pool: pd.DataFrame,
-    excluded_pool: pd.DataFrame
+    excluded_pool: pd.DataFrame,
+    full_ranking: bool = True
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Create final rankings and output DataFrames.
     
+    If full_ranking is False, only the top SHORTLIST_SIZE rows are selected
+    (O(n) via select_top_k) and ranking holds just those rows.
+    
     Returns:
     - ranking: Full ranking of main pool
     - shortlist: Top 40
     - winners_draft: Top 20 + 10 reserves
     """
     # Sort by final score (descending), then by risk_flag (empty first)
-    main_pool = main_pool.sort_values(
-        by=["final_score", "risk_flag"],
-        ascending=[False, True]
-    ).reset_index(drop=True)
+    if full_ranking:
+        main_pool = sort_ranked(main_pool)
+    else:
+        k = max(SHORTLIST_SIZE, N_WINNERS + N_RESERVES)
+        main_pool = select_top_k(main_pool, k)
+    main_pool = main_pool.reset_index(drop=True)
     
     main_pool["rank"] = range(1, len(main_pool) + 1)
     
@@ -311,12 +407,12 @@ def create_rankings(
     available_cols = [c for c in output_cols if c in main_pool.columns]
     
     ranking = main_pool[available_cols].copy()
-    shortlist = ranking.head(40).copy()
+    shortlist = ranking.head(SHORTLIST_SIZE).copy()
     
     # Winners: Top 20 + 10 reserves
-    winners = ranking.head(20).copy()
+    winners = ranking.head(N_WINNERS).copy()
     winners["status"] = "winner"
-    reserves = ranking.iloc[20:30].copy()
+    reserves = ranking.iloc[N_WINNERS:N_WINNERS + N_RESERVES].copy()
     reserves["status"] = "reserve"
     winners_draft = pd.concat([winners, reserves], ignore_index=True)
     
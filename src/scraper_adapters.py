@@ -0,0 +1,191 @@
+"""
+scraper_adapters.py - One interface for Apify comment/profile/post sources
+
+Each actor configuration is a plugin (a ScraperAdapter instance registered
+under a name), so collectors and bench_adapters.py can swap sources without
+copying polling code. All runs go through apify_collect.run_actor_batch
+(retries, journal checkpointing, run metrics).
+
+    adapter = get_adapter("comment_scraper")
+    records = adapter.collect(["DSuGGGvDFB7"])   # comments.json records
+"""
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.apify_collect import (
+    run_actor_batch, collect_posts_batched, normalize_comment, normalize_profile, normalize_post
+)
+from src.collect_journal import CollectionJournal, batch_key
+
+ADAPTERS: Dict[str, "ScraperAdapter"] = {}
+
+
+def post_url(shortcode: str) -> str:
+    return f"https://www.instagram.com/p/{shortcode}/"
+
+
+class ScraperAdapter:
+    """
+    A single actor + input configuration.
+
+    - kind: "comments" (targets = post shortcodes), "profiles" or "posts"
+      (targets = usernames)
+    - batch_size: targets per actor run
+    - journal_kind: journal key prefix (also the run_metrics phase)
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, actor_id: str, default_limit: int = 0, batch_size: int = 1,
+                 extra_input: Optional[dict] = None, journal_kind: Optional[str] = None):
+        self.name = name
+        self.actor_id = actor_id
+        self.default_limit = default_limit
+        self.batch_size = batch_size
+        self.extra_input = extra_input or {}
+        self.journal_kind = journal_kind or name
+
+    def build_input(self, targets: list, limit: Optional[int] = None) -> dict:
+        raise NotImplementedError
+
+    def normalize(self, item: dict, target: Optional[str] = None) -> Optional[dict]:
+        """Map a raw item to the repo schema (None = skip)."""
+        raise NotImplementedError
+
+    def journal_key(self, batch: list) -> str:
+        if len(batch) == 1:
+            return f"{self.journal_kind}:{batch[0]}"
+        return batch_key(self.journal_kind, batch)
+
+    def fetch(self, targets: list, limit: Optional[int] = None,
+              journal: Optional[CollectionJournal] = None) -> List[Dict]:
+        """Raw items for all targets, batch_size targets per run."""
+        items = []
+        for i in range(0, len(targets), self.batch_size):
+            batch = targets[i:i + self.batch_size]
+            items.extend(run_actor_batch(
+                journal, self.journal_key(batch), self.actor_id,
+                self.build_input(batch, limit), batch if self.kind != "comments" else None
+            ))
+        return items
+
+    def collect(self, targets: list, limit: Optional[int] = None,
+                journal: Optional[CollectionJournal] = None) -> List[Dict]:
+        """Normalized records for all targets."""
+        records = []
+        for i in range(0, len(targets), self.batch_size):
+            batch = targets[i:i + self.batch_size]
+            target = batch[0] if len(batch) == 1 else None
+            for item in self.fetch(batch, limit, journal):
+                record = self.normalize(item, target)
+                if record is not None:
+                    records.append(record)
+        return records
+
+
+class CommentAdapter(ScraperAdapter):
+    """Comments on event posts -> comments.json records."""
+
+    kind = "comments"
+
+    def build_input(self, targets: list, limit: Optional[int] = None) -> dict:
+        return {
+            "directUrls": [post_url(code) for code in targets],
+            "resultsLimit": limit or self.default_limit,
+            **self.extra_input,
+        }
+
+    @staticmethod
+    def username(item: dict) -> Optional[str]:
+        return item.get("ownerUsername") or item.get("username") or (item.get("owner") or {}).get("username")
+
+    def normalize(self, item: dict, target: Optional[str] = None) -> Optional[dict]:
+        return normalize_comment(item, target or "")
+
+
+class ProfileAdapter(ScraperAdapter):
+    """User profiles -> profiles.json records."""
+
+    kind = "profiles"
+
+    def build_input(self, targets: list, limit: Optional[int] = None) -> dict:
+        return {"usernames": list(targets), **self.extra_input}
+
+    def journal_key(self, batch: list) -> str:
+        return batch_key(self.journal_kind, batch)
+
+    def normalize(self, item: dict, target: Optional[str] = None) -> Optional[dict]:
+        profile = normalize_profile(item, target or "")
+        return profile if profile["username"] else None
+
+
+class PostAdapter(ScraperAdapter):
+    """Recent posts per user -> posts.json records (adaptive batching)."""
+
+    kind = "posts"
+
+    def build_input(self, targets: list, limit: Optional[int] = None) -> dict:
+        return {"username": list(targets), "resultsLimit": limit or self.default_limit, **self.extra_input}
+
+    def fetch(self, targets: list, limit: Optional[int] = None,
+              journal: Optional[CollectionJournal] = None) -> List[Dict]:
+        by_user = collect_posts_batched(targets, limit or self.default_limit, journal, kind=self.journal_kind)
+        return [post for u in targets for post in by_user.get(u, [])]
+
+    def collect(self, targets: list, limit: Optional[int] = None,
+                journal: Optional[CollectionJournal] = None) -> List[Dict]:
+        by_user = collect_posts_batched(targets, limit or self.default_limit, journal, kind=self.journal_kind)
+        return [normalize_post(post, u) for u in targets for post in by_user.get(u, [])]
+
+
+# -----------------------------------------------------------------------------
+# Registry
+# -----------------------------------------------------------------------------
+def register(adapter: ScraperAdapter) -> ScraperAdapter:
+    ADAPTERS[adapter.name] = adapter
+    return adapter
+
+
+def get_adapter(name: str) -> ScraperAdapter:
+    if name not in ADAPTERS:
+        raise KeyError(f"Unknown adapter '{name}' (available: {', '.join(sorted(ADAPTERS))})")
+    return ADAPTERS[name]
+
+
+def adapters_for(kind: str) -> List[ScraperAdapter]:
+    return [a for a in ADAPTERS.values() if a.kind == kind]
+
+
+# Comment sources (previously separate scripts)
+register(CommentAdapter(
+    "comment_scraper", "apify~instagram-comment-scraper",
+    default_limit=500, journal_kind="comments"
+))
+register(CommentAdapter(  # recollect_comments.py
+    "comment_scraper_nested", "apify~instagram-comment-scraper",
+    default_limit=1000, extra_input={"includeNestedComments": True}
+))
+register(CommentAdapter(  # try_single_post_deep.py
+    "comment_scraper_deep", "apify~instagram-comment-scraper",
+    default_limit=300, extra_input={"resultsType": "comments", "searchType": "hashtag"}
+))
+register(CommentAdapter(  # try_alt_scraper.py
+    "instagram_scraper", "apify~instagram-scraper",
+    default_limit=1000, batch_size=10,
+    extra_input={"resultsType": "comments", "searchType": "url", "searchLimit": 1}
+))
+register(CommentAdapter(  # try_alt_scraper_v2.py
+    "instagram_scraper_v2", "apify~instagram-scraper",
+    default_limit=200, batch_size=10,
+    extra_input={"resultsType": "comments", "addParentData": True}
+))
+
+# Profile / post sources
+register(ProfileAdapter("profile_scraper", "apify~instagram-profile-scraper",
+                        batch_size=50, journal_kind="profiles"))
+register(PostAdapter("post_scraper", "apify~instagram-post-scraper",
+                     default_limit=12, journal_kind="posts"))
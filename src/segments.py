@@ -0,0 +1,147 @@
+"""
+segments.py - Per-user segment reductions over post arrays
+
+Per-user post statistics (counts, sums, means, newest/oldest dates) are
+reductions over contiguous runs: UserSegments sorts posts once by
+(user, date desc) and every statistic is then one call over all users
+(np.add/maximum/minimum.reduceat over the run offsets) instead of a pandas
+filter or groupby per user.
+
+Kernels (SEGMENT_BACKEND=auto|numba|numpy, auto = numba when installed):
+- numpy: ufunc.reduceat
+- numba: the same reductions as one jitted loop over the runs (optional)
+
+Undated posts carry NAT_NS (int64 min), so a segment max skips them and
+sorts them last.
+"""
+import os
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:  # Optional dependency: NumPy kernels
+    numba = None
+
+NAT_NS = np.iinfo(np.int64).min
+
+
+def _pick_backend(name: str) -> str:
+    if name == "auto":
+        return "numba" if numba is not None else "numpy"
+    if name == "numba" and numba is None:
+        print("[Segments] numba not installed, using numpy")
+        return "numpy"
+    return name
+
+
+BACKEND = _pick_backend(os.getenv("SEGMENT_BACKEND", "auto"))
+
+
+# -----------------------------------------------------------------------------
+# Kernels (values: 1-D or 2-D with segments along the last axis)
+# -----------------------------------------------------------------------------
+if numba is not None:
+    @numba.njit(cache=True)
+    def _numba_reduce(values, starts, op):
+        n_rows, n = values.shape
+        out = np.empty((n_rows, len(starts)), dtype=values.dtype)
+        for s in range(len(starts)):
+            lo = starts[s]
+            hi = starts[s + 1] if s + 1 < len(starts) else n
+            for r in range(n_rows):
+                acc = values[r, lo]
+                for i in range(lo + 1, hi):
+                    v = values[r, i]
+                    if op == 0:
+                        acc += v
+                    elif op == 1:
+                        acc = max(acc, v)
+                    else:
+                        acc = min(acc, v)
+                out[r, s] = acc
+        return out
+
+_UFUNCS = {"sum": (np.add, 0), "max": (np.maximum, 1), "min": (np.minimum, 2)}
+
+
+def segment_reduce(values: np.ndarray, starts: np.ndarray, op: str = "sum",
+                   backend: Optional[str] = None) -> np.ndarray:
+    """Per-segment sum/max/min of user-sorted values (segments must be non-empty)."""
+    values = np.asarray(values)
+    if values.dtype == bool:
+        values = values.astype(np.int64)
+    if len(starts) == 0:
+        return np.zeros(values.shape[:-1] + (0,), dtype=values.dtype)
+    ufunc, code = _UFUNCS[op]
+    if (backend or BACKEND) == "numba":
+        flat = np.ascontiguousarray(values.reshape(-1, values.shape[-1]))
+        out = _numba_reduce(flat, starts.astype(np.int64), code)
+        return out.reshape(values.shape[:-1] + (len(starts),))
+    return ufunc.reduceat(values, starts, axis=-1)
+
+
+# -----------------------------------------------------------------------------
+# User segments
+# -----------------------------------------------------------------------------
+class UserSegments:
+    """
+    Posts grouped into one contiguous run per user, newest first (undated
+    last, ties in input order). Rows without a user are left out.
+
+    order:  row positions in segment order (values[order] = sorted values)
+    starts: offset of each user's run; keys: the user of each run
+    ns:     sorted epoch-ns dates (NAT_NS = undated)
+    """
+
+    def __init__(self, users, date_ns: Optional[np.ndarray] = None):
+        codes, keys = pd.factorize(users if isinstance(users, pd.Series) else pd.Series(users, dtype=object))
+        ns = np.full(len(codes), NAT_NS, dtype=np.int64) if date_ns is None else np.asarray(date_ns, dtype=np.int64)
+        rows = np.flatnonzero(codes >= 0)
+        # (user, date desc, input order) as one unique int64 key: cheaper than lexsort
+        newest_first = np.where(ns[rows] == NAT_NS, np.iinfo(np.int64).max, -ns[rows])
+        date_rank = np.empty(len(rows), dtype=np.int64)
+        date_rank[np.argsort(newest_first, kind="stable")] = np.arange(len(rows))
+        self.order = rows[np.argsort(codes[rows].astype(np.int64) * len(rows) + date_rank)]
+        self.codes = codes[self.order]
+        self.ns = ns[self.order]
+        boundary = np.r_[True, self.codes[1:] != self.codes[:-1]] if len(self.order) else np.zeros(0, dtype=bool)
+        self.starts = np.flatnonzero(boundary)
+        self.sizes = np.diff(np.r_[self.starts, len(self.order)]).astype(np.int64)
+        self.keys = keys[self.codes[self.starts]]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def take(self, values) -> np.ndarray:
+        """Row-aligned values in segment order."""
+        return np.asarray(values)[self.order]
+
+    def rank(self) -> np.ndarray:
+        """Position of each sorted row within its user's run (0 = newest)."""
+        return np.arange(len(self.order)) - np.repeat(self.starts, self.sizes)
+
+    def sum(self, values, backend: Optional[str] = None) -> np.ndarray:
+        return segment_reduce(values, self.starts, "sum", backend)
+
+    def max(self, values, backend: Optional[str] = None) -> np.ndarray:
+        return segment_reduce(values, self.starts, "max", backend)
+
+    def min(self, values, backend: Optional[str] = None) -> np.ndarray:
+        return segment_reduce(values, self.starts, "min", backend)
+
+    def newest(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Newest date (epoch ns) per user among masked sorted rows, NAT_NS if none."""
+        return self.max(self.ns if mask is None else np.where(mask, self.ns, NAT_NS))
+
+    def oldest(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Oldest dated row (epoch ns) per user among masked sorted rows, NAT_NS if none."""
+        dated = self.ns != NAT_NS if mask is None else mask & (self.ns != NAT_NS)
+        oldest = self.min(np.where(dated, self.ns, np.iinfo(np.int64).max))
+        return np.where(oldest == np.iinfo(np.int64).max, NAT_NS, oldest)
+
+    def bounds(self) -> Iterator[Tuple[object, int, int]]:
+        """(user, start, end) of each run in the sorted rows."""
+        return zip(self.keys, self.starts.tolist(), (self.starts + self.sizes).tolist())
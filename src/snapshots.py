@@ -0,0 +1,347 @@
+"""
+snapshots.py - Content-addressed, compressed snapshots of raw JSON data
+
+Each raw file (a JSON list of records) is split into content-defined chunks
+of records; every chunk is stored once under its SHA-256 in
+data/raw/snapshots/objects (zstd when the zstandard package is installed,
+zlib otherwise). A snapshot is a small manifest listing the chunk hashes
+(and a record summary, like io_load's manifest) per file, so a new snapshot
+only stores chunks that changed since earlier ones, diffs only decompress
+differing chunks, and the pipeline can run on an exact pinned snapshot
+(pipeline.py --snapshot).
+
+Usage:
+    python src/snapshots.py create [--label import]
+    python src/snapshots.py list
+    python src/snapshots.py diff <id|latest> <id|latest>
+    python src/snapshots.py restore <id|latest> [--files posts.json]
+    python src/snapshots.py import-backups     # data/raw/backup/*_<ts>.json -> snapshots
+    python src/snapshots.py gc                 # drop unreferenced chunks
+"""
+import sys
+import argparse
+import hashlib
+import json
+import os
+import re
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency: fall back to zlib
+    zstandard = None
+
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import RAW_DIR, read_records, update_manifest, summarize_records
+
+SNAPSHOT_DIR = RAW_DIR / "snapshots"
+OBJECTS_DIR = SNAPSHOT_DIR / "objects"
+MANIFESTS_DIR = SNAPSHOT_DIR / "manifests"
+BACKUP_DIR = RAW_DIR / "backup"
+
+DEFAULT_FILES = ["comments.json", "profiles.json", "posts.json"]
+
+# Content-defined chunking: a chunk ends after a record whose hash hits
+# CHUNK_MOD (avg ~64 records), bounded to [MIN_CHUNK, MAX_CHUNK] records, so
+# an inserted/edited record only changes its own chunk.
+CHUNK_MOD = 64
+MIN_CHUNK = 16
+MAX_CHUNK = 256
+ZSTD_LEVEL = 10
+
+
+# -----------------------------------------------------------------------------
+# Chunk objects
+# -----------------------------------------------------------------------------
+def _record_bytes(record) -> bytes:
+    return json.dumps(record, ensure_ascii=False).encode("utf-8")
+
+
+def chunk_records(records: list) -> List[List[bytes]]:
+    """Split serialized records into content-defined chunks."""
+    chunks, current = [], []
+    for record in records:
+        line = _record_bytes(record)
+        current.append(line)
+        boundary = int.from_bytes(hashlib.sha1(line).digest()[:4], "big") % CHUNK_MOD == 0
+        if (boundary and len(current) >= MIN_CHUNK) or len(current) >= MAX_CHUNK:
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _object_path(digest: str, ext: str) -> Path:
+    return OBJECTS_DIR / digest[:2] / f"{digest}.{ext}"
+
+
+def _compress(payload: bytes):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload), "zst"
+    return zlib.compress(payload, 9), "zz"
+
+
+def put_chunk(lines: List[bytes]) -> Tuple[str, bool]:
+    """Store a chunk once; returns (sha256, newly_written)."""
+    payload = b"\n".join(lines)
+    digest = hashlib.sha256(payload).hexdigest()
+    if _object_path(digest, "zst").exists() or _object_path(digest, "zz").exists():
+        return digest, False
+
+    data, ext = _compress(payload)
+    path = _object_path(digest, ext)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return digest, True
+
+
+def get_chunk(digest: str) -> list:
+    """Records of a stored chunk."""
+    path = _object_path(digest, "zst")
+    if path.exists():
+        if zstandard is None:
+            raise RuntimeError(f"Chunk {digest[:12]} is zstd-compressed; install zstandard to read it")
+        payload = zstandard.ZstdDecompressor().decompress(path.read_bytes())
+    else:
+        payload = zlib.decompress(_object_path(digest, "zz").read_bytes())
+    return [json.loads(line) for line in payload.split(b"\n") if line]
+
+
+# -----------------------------------------------------------------------------
+# Snapshots
+# -----------------------------------------------------------------------------
+def create_snapshot(files: Optional[list] = None, label: str = "", source_dir: Path = RAW_DIR,
+                    created: Optional[datetime] = None, source_names: Optional[dict] = None) -> str:
+    """
+    Snapshot raw JSON files; returns the snapshot ID.
+
+    source_names maps snapshot file names to other file names in source_dir
+    (used when importing timestamped backups).
+    """
+    files = files or DEFAULT_FILES
+    source_names = source_names or {}
+    created = created or datetime.now()
+    MANIFESTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    manifest_files = {}
+    new_chunks = new_bytes = 0
+    for filename in files:
+        path = source_dir / source_names.get(filename, filename)
+        if not path.exists():
+            continue
+        records = read_records(path)
+
+        hashes = []
+        for lines in chunk_records(records):
+            digest, written = put_chunk(lines)
+            hashes.append(digest)
+            if written:
+                new_chunks += 1
+                new_bytes += sum(len(line) + 1 for line in lines)
+        manifest_files[filename] = {
+            **summarize_records(records),
+            "content_sha256": hashlib.sha256(",".join(hashes).encode()).hexdigest(),
+            "chunks": hashes,
+        }
+
+    content = hashlib.sha256(json.dumps(manifest_files, sort_keys=True).encode()).hexdigest()
+    snapshot_id = f"{created.strftime('%Y%m%d_%H%M%S')}_{content[:8]}"
+    manifest = {
+        "id": snapshot_id,
+        "created": created.isoformat(),
+        "label": label,
+        "files": manifest_files,
+    }
+    with open(MANIFESTS_DIR / f"{snapshot_id}.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    codec = "zstd" if zstandard is not None else "zlib"
+    print(f"[Snapshot] {snapshot_id}: {len(manifest_files)} files, {new_chunks} new chunks "
+          f"({new_bytes / 1024:.1f} KB raw, {codec})")
+    return snapshot_id
+
+
+def list_snapshots() -> List[dict]:
+    """Manifests, oldest first."""
+    if not MANIFESTS_DIR.exists():
+        return []
+    manifests = []
+    for path in sorted(MANIFESTS_DIR.glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            manifests.append(json.load(f))
+    return sorted(manifests, key=lambda m: (m["created"], m["id"]))
+
+
+def load_manifest(snapshot_id: str) -> dict:
+    """Manifest by ID, unique ID prefix, or 'latest'."""
+    if snapshot_id == "latest":
+        manifests = list_snapshots()
+        if not manifests:
+            raise FileNotFoundError("No snapshots yet (python src/snapshots.py create)")
+        return manifests[-1]
+    path = MANIFESTS_DIR / f"{snapshot_id}.json"
+    if not path.exists():
+        matches = list(MANIFESTS_DIR.glob(f"{snapshot_id}*.json"))
+        if len(matches) != 1:
+            raise FileNotFoundError(f"Snapshot not found (or ambiguous): {snapshot_id}")
+        path = matches[0]
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_snapshot_file(snapshot_id: str, filename: str) -> list:
+    """Records of one file in a snapshot ([] if the file was not captured)."""
+    entry = load_manifest(snapshot_id)["files"].get(filename)
+    if entry is None:
+        return []
+    records = []
+    for digest in entry["chunks"]:
+        records.extend(get_chunk(digest))
+    return records
+
+
+def snapshot_summary(manifest: dict, filename: str) -> dict:
+    """
+    Summary of one snapshot file, like io_load.manifest_entry (records,
+    unique_users, post date range). Snapshots written before summaries were
+    stored are summarized from their records.
+    """
+    entry = manifest["files"].get(filename)
+    if entry is not None and "max_post_date" in entry:
+        return entry
+    return summarize_records(load_snapshot_file(manifest["id"], filename))
+
+
+def snapshot_as_of(manifest: dict) -> datetime:
+    """Newest post date of a snapshot (now if none), like io_load.data_as_of."""
+    max_post_date = snapshot_summary(manifest, "posts.json")["max_post_date"]
+    return datetime.fromisoformat(max_post_date) if max_post_date else datetime.now(timezone.utc)
+
+
+def load_snapshot_data(snapshot_id: str) -> tuple:
+    """(comments, profiles, posts) from a snapshot, like io_load.load_or_generate_data."""
+    return tuple(load_snapshot_file(snapshot_id, name) for name in DEFAULT_FILES)
+
+
+def restore_snapshot(snapshot_id: str, files: Optional[list] = None, dest_dir: Path = RAW_DIR):
+    """Write snapshot files back as JSON (overwrites the live files)."""
+    manifest = load_manifest(snapshot_id)
+    for filename in files or list(manifest["files"]):
+        records = load_snapshot_file(manifest["id"], filename)
+        with open(dest_dir / filename, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        if dest_dir == RAW_DIR:
+            update_manifest(filename, records)
+        print(f"[Snapshot] Restored {filename} ({len(records)} records) from {manifest['id']}")
+
+
+def diff_snapshots(id_a: str, id_b: str) -> Dict[str, dict]:
+    """
+    Per-file record changes from snapshot a to b. Only chunks that differ
+    are decompressed.
+    """
+    files_a = load_manifest(id_a)["files"]
+    files_b = load_manifest(id_b)["files"]
+    result = {}
+    for filename in sorted(set(files_a) | set(files_b)):
+        chunks_a = (files_a.get(filename) or {}).get("chunks", [])
+        chunks_b = (files_b.get(filename) or {}).get("chunks", [])
+        only_a = set(chunks_a) - set(chunks_b)
+        only_b = set(chunks_b) - set(chunks_a)
+
+        lines_a = {_record_bytes(r) for d in only_a for r in get_chunk(d)}
+        lines_b = {_record_bytes(r) for d in only_b for r in get_chunk(d)}
+        result[filename] = {
+            "shared_chunks": len(set(chunks_a) & set(chunks_b)),
+            "removed": len(lines_a - lines_b),
+            "added": len(lines_b - lines_a),
+            "records_a": (files_a.get(filename) or {}).get("records", 0),
+            "records_b": (files_b.get(filename) or {}).get("records", 0),
+        }
+    return result
+
+
+def gc_objects() -> int:
+    """Delete chunks not referenced by any manifest; returns the count."""
+    referenced = {
+        digest
+        for manifest in list_snapshots()
+        for entry in manifest["files"].values()
+        for digest in entry["chunks"]
+    }
+    removed = 0
+    for path in OBJECTS_DIR.glob("*/*.*"):
+        if path.stem not in referenced:
+            path.unlink()
+            removed += 1
+    print(f"[Snapshot] GC removed {removed} unreferenced chunks")
+    return removed
+
+
+def import_backups() -> List[str]:
+    """Turn data/raw/backup/<name>_<YYYYmmdd_HHMMSS>.json copies into snapshots."""
+    groups: Dict[str, Dict[str, str]] = {}
+    for path in sorted(BACKUP_DIR.glob("*.json")):
+        match = re.match(r"(.+)_(\d{8}_\d{6})\.json$", path.name)
+        if match:
+            groups.setdefault(match.group(2), {})[f"{match.group(1)}.json"] = path.name
+
+    ids = []
+    for ts, names in sorted(groups.items()):
+        ids.append(create_snapshot(
+            list(names), label=f"backup {ts}", source_dir=BACKUP_DIR,
+            created=datetime.strptime(ts, "%Y%m%d_%H%M%S"), source_names=names
+        ))
+    if ids:
+        print(f"[Snapshot] Imported {len(ids)} backups; the copies in {BACKUP_DIR} can now be removed")
+    return ids
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) if path.exists() else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Content-addressed raw data snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_create = sub.add_parser("create", help="snapshot comments/profiles/posts.json")
+    p_create.add_argument("--label", default="")
+    p_create.add_argument("--files", nargs="+", help=f"raw files (default: {' '.join(DEFAULT_FILES)})")
+    sub.add_parser("list", help="list snapshots")
+    p_diff = sub.add_parser("diff", help="record changes between two snapshots")
+    p_diff.add_argument("a")
+    p_diff.add_argument("b")
+    p_restore = sub.add_parser("restore", help="overwrite raw files from a snapshot")
+    p_restore.add_argument("snapshot")
+    p_restore.add_argument("--files", nargs="+")
+    sub.add_parser("import-backups", help="convert data/raw/backup copies into snapshots")
+    sub.add_parser("gc", help="delete unreferenced chunks")
+    args = parser.parse_args()
+
+    if args.command == "create":
+        create_snapshot(args.files, args.label)
+    elif args.command == "list":
+        for m in list_snapshots():
+            counts = ", ".join(f"{name}={e['records']}" for name, e in m["files"].items())
+            print(f"{m['id']}  {m['label'] or '-':<20} {counts}")
+        print(f"\nStore: {_dir_size(SNAPSHOT_DIR) / 1024:.1f} KB "
+              f"(backup copies: {_dir_size(BACKUP_DIR) / 1024:.1f} KB)")
+    elif args.command == "diff":
+        for filename, d in diff_snapshots(args.a, args.b).items():
+            print(f"{filename:<16} {d['records_a']:>6} -> {d['records_b']:<6} "
+                  f"+{d['added']} -{d['removed']} ({d['shared_chunks']} chunks shared)")
+    elif args.command == "restore":
+        restore_snapshot(args.snapshot, args.files)
+    elif args.command == "import-backups":
+        import_backups()
+    elif args.command == "gc":
+        gc_objects()
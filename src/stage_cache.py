@@ -0,0 +1,98 @@
+"""
+stage_cache.py - Content-keyed cache for pipeline stages
+
+A stage key hashes the stage name, its inputs' keys (raw data content, the
+as_of time, parameters) and the source of the modules the stage runs, so
+any change to data, time or code produces a new key, and an unchanged re-run
+(or a re-run of a past as_of against the same snapshot) loads the pickled
+result instead of recomputing.
+
+Keys chain: raw -> clean -> features -> scores (see pipeline.run_pipeline).
+"""
+import hashlib
+import pickle
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .io_load import PROCESSED_DIR, RAW_DIR
+
+CACHE_DIR = PROCESSED_DIR / "cache"
+MAX_ENTRIES_PER_STAGE = 20
+
+SRC_DIR = Path(__file__).resolve().parent
+STAGE_CODE = {
+    "clean": ["io_load.py", "json_codec.py", "raw_schema.py", "cleaning.py", "segments.py"],
+    "features": ["features.py", "segments.py"],
+    "scores": ["scoring.py"],
+    "polars": ["io_load.py", "json_codec.py", "raw_schema.py", "cleaning.py", "segments.py",
+               "features.py", "scoring.py", "polars_backend.py"],
+}
+
+
+def _sha256(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def code_fingerprint(stage: str) -> str:
+    return _sha256(*((SRC_DIR / name).read_bytes() for name in STAGE_CODE.get(stage, [])))
+
+
+def stage_key(stage: str, *inputs) -> str:
+    """Key of a stage run from its input keys/parameters and its code."""
+    return _sha256(stage, code_fingerprint(stage), *inputs)
+
+
+def raw_files_key(filenames: Iterable[str]) -> str:
+    """Key of raw input files by content (same digest as _sha256(name, bytes, ...), read in blocks)."""
+    h = hashlib.sha256()
+    for name in filenames:
+        path = RAW_DIR / name
+        h.update(name.encode("utf-8") + b"\0")
+        if path.exists():
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def snapshot_key(manifest: dict) -> str:
+    """Key of a snapshot's contents (independent of its ID/creation time)."""
+    return _sha256(*(f"{name}:{entry['content_sha256']}" for name, entry in sorted(manifest["files"].items())))
+
+
+def _prune(stage: str):
+    entries = sorted(CACHE_DIR.glob(f"{stage}_*.pkl"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in entries[MAX_ENTRIES_PER_STAGE:]:
+        path.unlink()
+
+
+def cached(stage: str, key: str, compute: Callable, enabled: bool = True):
+    """Result of compute() for this stage key, from the cache when present."""
+    path = CACHE_DIR / f"{stage}_{key[:16]}.pkl"
+    if enabled and path.exists():
+        print(f"  [Cache] {stage}: hit ({key[:8]})")
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    result = compute()
+    if enabled:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+        _prune(stage)
+    return result
+
+
+def clear_cache() -> int:
+    removed = 0
+    for path in CACHE_DIR.glob("*.pkl"):
+        path.unlink()
+        removed += 1
+    return removed
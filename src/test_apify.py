@@ -1,11 +1,17 @@
 """
 test_apify.py - Test Apify API connection and collect data
 """
+import os
+import sys
 import requests
-import json
 import time
 from pathlib import Path
 
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import save_json
+
 APIFY_TOKEN = os.getenv("APIFY_TOKEN", "")
 BASE_URL = "https://api.apify.com/v2"
 
@@ -237,8 +243,7 @@ def main():
             seen.add(c["username"])
             deduped.append(c)
     
-    with open(RAW_DIR / "comments.json", "w", encoding="utf-8") as f:
-        json.dump(deduped, f, ensure_ascii=False, indent=2)
+    save_json(deduped, "comments.json")
     print(f"\nSaved {len(deduped)} unique comments")
     
     # Step 2: Collect profiles
@@ -257,8 +262,7 @@ def main():
             "bio": p.get("biography", "")
         })
     
-    with open(RAW_DIR / "profiles.json", "w", encoding="utf-8") as f:
-        json.dump(processed_profiles, f, ensure_ascii=False, indent=2)
+    save_json(processed_profiles, "profiles.json")
     print(f"Saved {len(processed_profiles)} profiles")
     
     # Step 3: Collect posts (for non-private users)
@@ -278,8 +282,7 @@ def main():
             "hashtags": post.get("hashtags", [])
         })
     
-    with open(RAW_DIR / "posts.json", "w", encoding="utf-8") as f:
-        json.dump(processed_posts, f, ensure_ascii=False, indent=2)
+    save_json(processed_posts, "posts.json")
     print(f"Saved {len(processed_posts)} posts")
     
     print("\n" + "=" * 60)
@@ -1,12 +1,15 @@
 """
 try_alt_scraper.py - Try general 'apify/instagram-scraper' to get comments
+(instagram_scraper adapter in scraper_adapters.py)
 """
-import requests
-import json
-import time
+import sys
+from pathlib import Path
 
-APIFY_TOKEN = os.getenv("APIFY_TOKEN", "")
-BASE_URL = "https://api.apify.com/v2"
+# Add src to path for module imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.io_load import save_json
+from src.scraper_adapters import get_adapter
 
 # Target Post Shortcodes
 TARGET_POSTS = [
@@ -16,80 +19,24 @@ TARGET_POSTS = [
 ]
 
 def run_scraper():
-    headers = {"Authorization": f"Bearer {APIFY_TOKEN}"}
     # Using the general instagram-scraper which often handles parsing better
-    actor_id = "apify~instagram-scraper"
-    
-    direct_urls = [f"https://www.instagram.com/p/{code}/" for code in TARGET_POSTS]
-    
-    print(f"Starting alt scraper for {len(direct_urls)} posts...")
-    
-    input_data = {
-        "directUrls": direct_urls,
-        "resultsType": "comments",  # Requesting comments specifically
-        "resultsLimit": 1000,       # High limit
-        "searchType": "url",
-        "searchLimit": 1,
-    }
+    adapter = get_adapter("instagram_scraper")
     
-    resp = requests.post(
-        f"{BASE_URL}/acts/{actor_id}/runs",
-        headers=headers,
-        json=input_data,
-        params={"waitForFinish": 300}
-    )
+    print(f"Starting alt scraper for {len(TARGET_POSTS)} posts...")
+    records = adapter.collect(TARGET_POSTS)
+    print(f"Items found: {len(records)}")
     
-    if resp.status_code != 201:
-        print(f"Error: {resp.status_code} {resp.text}")
-        return
-        
-    run_data = resp.json()["data"]
-    run_id = run_data["id"]
-    print(f"Run ID: {run_id}")
-    
-    while True:
-        status_resp = requests.get(f"{BASE_URL}/actor-runs/{run_id}", headers=headers)
-        status = status_resp.json()["data"]["status"]
-        print(f"Status: {status}")
-        
-        if status in ["SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"]:
-            break
-        time.sleep(5)
-        
-    if status == "SUCCEEDED":
-        dataset_id = run_data["defaultDatasetId"]
-        items_resp = requests.get(f"{BASE_URL}/datasets/{dataset_id}/items", headers=headers)
-        items = items_resp.json()
-        print(f"Items found: {len(items)}")
+    if records:
+        # Process and save
+        processed = []
+        seen = set()
+        for record in records:
+            if record["username"] not in seen:
+                seen.add(record["username"])
+                processed.append(record)
         
-        if items:
-            # Process and save
-            processed = []
-            seen = set()
-            for item in items:
-                # Structure might be different in this scraper
-                # usually: { "text": "...", "ownerUsername": "...", ... }
-                username = item.get("ownerUsername") or item.get("username") or item.get("owner", {}).get("username")
-                
-                # Check link to post to ensure it belongs to one of ours
-                # item might have 'postUrl' or 'inputUrl'
-                
-                if username:
-                    if username not in seen:
-                        seen.add(username)
-                        processed.append({
-                            "username": username,
-                            "comment_text": item.get("text", "") or item.get("content", ""),
-                            "tagged_users_count": 0, # Might not be parsed
-                            "post_shortcode": "unknown" # Need to map back if possible
-                        })
-            
-            print(f"Unique participants found: {len(processed)}")
-            with open("data/raw/comments_alt.json", "w", encoding="utf-8") as f:
-                json.dump(processed, f, ensure_ascii=False, indent=2)
-            print("Saved to data/raw/comments_alt.json")
-    else:
-        print(f"Run failed: {status}")
+        print(f"Unique participants found: {len(processed)}")
+        save_json(processed, "comments_alt.json")
 
 if __name__ == "__main__":
     run_scraper()